@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Measure Lambda cold-start cost: module import plus first invocation.
+
+Each Lambda is loaded in a fresh interpreter pointed at a moto server
+(``AWS_ENDPOINT_URL``), mirroring the init phase and first request of a new
+execution environment.
+
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --lambdas stripe-event-processor --output cold-start.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Callable, Dict, List
+
+from benchmarks import events, standin
+
+LAMBDA_EVENTS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "shopify-order-processor": events.shopify_order_event,
+    "shopify-customer-processor": events.shopify_customer_event,
+    "shopify-product-processor": events.shopify_product_event,
+    "shopify-cart-processor": events.shopify_checkout_event,
+    "shopify-event-processor": events.shopify_order_event,
+    "recharge-event-processor": lambda: events.recharge_event(standin.RECHARGE_WEBHOOK_SECRET),
+    "stripe-event-processor": lambda: events.stripe_event(standin.STRIPE_WEBHOOK_SECRET),
+    "data-quality-checker": events.scheduled_event,
+}
+
+PROBE = """
+import importlib, json, sys, time
+sys.path[:0] = [sys.argv[1], sys.argv[2]]
+event = json.loads(sys.stdin.read())
+started = time.perf_counter()
+module = importlib.import_module("index")
+imported = time.perf_counter()
+response = module.handler(event, None)
+invoked = time.perf_counter()
+# ru_maxrss survives exec on Linux and would report the parent's peak; VmHWM is per process image.
+with open("/proc/self/status") as status:
+    peak_kb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_invoke_ms": (invoked - imported) * 1000,
+    "max_rss_mb": peak_kb / 1024,
+    "status_code": response.get("statusCode"),
+}))
+"""
+
+
+def probe(name: str, env: Dict[str, str]) -> Dict[str, Any]:
+    lambda_dir = standin.LAMBDAS_ROOT / name
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE, str(lambda_dir), str(standin.LAMBDAS_ROOT)],
+        input=json.dumps(LAMBDA_EVENTS[name]()),
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{name} probe failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    totals = [s["import_ms"] + s["first_invoke_ms"] for s in samples]
+    return {
+        "runs": len(samples),
+        "import_ms_p50": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "first_invoke_ms_p50": round(statistics.median(s["first_invoke_ms"] for s in samples), 1),
+        "total_ms_p50": round(statistics.median(totals), 1),
+        "total_ms_max": round(max(totals), 1),
+        "max_rss_mb": round(max(s["max_rss_mb"] for s in samples), 1),
+        "status_codes": sorted({s["status_code"] for s in samples}, key=str),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lambdas", default="all", help="Comma-separated Lambda directories (default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per Lambda")
+    parser.add_argument("--output", help="Optional path for JSON results")
+    args = parser.parse_args()
+
+    names = list(LAMBDA_EVENTS) if args.lambdas == "all" else [n.strip() for n in args.lambdas.split(",")]
+
+    results: Dict[str, Any] = {}
+    with standin.moto_server() as endpoint:
+        resources = standin.provision(endpoint)
+        env = {
+            **os.environ,
+            **standin.lambda_environment(resources["alert_topic_arn"]),
+            "AWS_ENDPOINT_URL": endpoint,
+        }
+        for name in names:
+            results[name] = summarize([probe(name, env) for _ in range(args.runs)])
+
+    header = f"{'lambda':32} {'import p50':>11} {'invoke p50':>11} {'total p50':>10} {'total max':>10} {'rss MB':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, summary in results.items():
+        print(
+            f"{name:32} {summary['import_ms_p50']:>11} {summary['first_invoke_ms_p50']:>11} "
+            f"{summary['total_ms_p50']:>10} {summary['total_ms_max']:>10} {summary['max_rss_mb']:>7}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Representative webhook payloads for exercising the Lambda handlers locally."""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def eventbridge_event(topic: str, payload: Dict[str, Any], event_time: Optional[str] = None) -> Dict[str, Any]:
+    event_time = event_time or _now_iso()
+    return {
+        "version": "0",
+        "id": f"bench-{topic.replace('/', '-')}-{payload.get('id')}",
+        "detail-type": topic,
+        "source": "aws.partner/shopify.com/bench/default",
+        "time": event_time,
+        "region": "us-east-1",
+        "detail": {
+            "payload": payload,
+            "metadata": {
+                "X-Shopify-Topic": topic,
+                "X-Shopify-Triggered-At": event_time,
+                "X-Shopify-Shop-Domain": "bench.myshopify.com",
+            },
+        },
+    }
+
+
+def shopify_order_event(order_id: int = 5500000000001, line_items: int = 4, topic: str = "orders/create") -> Dict[str, Any]:
+    created_at = _now_iso()
+    items = [
+        {
+            "id": order_id * 10 + idx,
+            "sku": "MARS_MONTHLY" if idx == 0 else f"MARS-SKU-{idx:03d}",
+            "title": f"Bench Product {idx}",
+            "variant_id": 4400000000000 + idx,
+            "product_id": 3300000000000 + idx,
+            "quantity": 1 + idx % 3,
+            "price": f"{19.99 + idx:.2f}",
+            "vendor": "Mars Men",
+        }
+        for idx in range(line_items)
+    ]
+    order = {
+        "id": order_id,
+        "order_number": order_id % 100000,
+        "email": "bench@example.com",
+        "created_at": created_at,
+        "updated_at": created_at,
+        "processed_at": created_at,
+        "total_price": "129.95",
+        "subtotal_price": "119.95",
+        "total_tax": "10.00",
+        "total_discounts": "0.00",
+        "total_line_items_price": "119.95",
+        "currency": "USD",
+        "financial_status": "paid",
+        "fulfillment_status": None,
+        "tags": "subscription",
+        "checkout_token": f"chk-{order_id}",
+        "customer": {
+            "id": 6600000000001,
+            "email": "bench@example.com",
+            "first_name": "Bench",
+            "last_name": "Customer",
+            "orders_count": 3,
+            "total_spent": "389.85",
+        },
+        "shipping_address": {"city": "Austin", "province": "TX", "zip": "78701", "country": "US"},
+        "billing_address": {"city": "Austin", "province": "TX", "zip": "78701", "country": "US"},
+        "line_items": items,
+        "discount_codes": [],
+        "fulfillments": [],
+        "refunds": [],
+    }
+    return eventbridge_event(topic, order)
+
+
+def shopify_customer_event(customer_id: int = 6600000000001, topic: str = "customers/update") -> Dict[str, Any]:
+    customer = {
+        "id": customer_id,
+        "email": f"customer-{customer_id}@example.com",
+        "first_name": "Bench",
+        "last_name": "Customer",
+        "created_at": _now_iso(),
+        "updated_at": _now_iso(),
+        "orders_count": 3,
+        "total_spent": "389.85",
+        "tags": "vip",
+        "state": "enabled",
+    }
+    return eventbridge_event(topic, customer)
+
+
+def shopify_checkout_event(token: str = "bench-checkout-token", topic: str = "checkouts/create") -> Dict[str, Any]:
+    checkout = {
+        "id": 7700000000001,
+        "token": token,
+        "email": "bench@example.com",
+        "created_at": _now_iso(),
+        "updated_at": _now_iso(),
+        "completed_at": None,
+        "abandoned_checkout_url": f"https://bench.myshopify.com/checkouts/{token}/recover",
+        "total_price": "49.99",
+        "currency": "USD",
+        "customer": {"id": 6600000000001},
+        "line_items": [{"sku": "MARS-SKU-001", "quantity": 1, "price": "49.99"}],
+    }
+    return eventbridge_event(topic, checkout)
+
+
+def shopify_product_event(product_id: int = 3300000000001, topic: str = "products/update") -> Dict[str, Any]:
+    product = {
+        "id": product_id,
+        "title": "Bench Product",
+        "vendor": "Mars Men",
+        "product_type": "Supplement",
+        "updated_at": _now_iso(),
+        "variants": [
+            {"id": 4400000000000 + idx, "product_id": product_id, "sku": f"MARS-SKU-{idx:03d}", "price": "19.99"}
+            for idx in range(3)
+        ],
+    }
+    return eventbridge_event(topic, product)
+
+
+def recharge_event(secret: str, event_type: str = "subscription/created", record_id: int = 880001) -> Dict[str, Any]:
+    if event_type.startswith("charge/"):
+        data: Dict[str, Any] = {
+            "id": record_id,
+            "subscription_id": 990001,
+            "customer_id": 770001,
+            "status": "error" if event_type == "charge/failed" else "success",
+            "total_price": "39.99",
+            "billing_attempt_count": 2,
+            "error": "card_declined" if event_type == "charge/failed" else None,
+        }
+    else:
+        data = {
+            "id": record_id,
+            "customer_id": 770001,
+            "shopify_customer_id": 6600000000001,
+            "status": "cancelled" if event_type == "subscription/cancelled" else "active",
+            "created_at": _now_iso(),
+            "product_title": "Mars Monthly",
+            "price": "39.99",
+            "quantity": 1,
+            "sku": "MARS_MONTHLY",
+        }
+    return signed_recharge_request({"type": event_type, "data": data}, secret)
+
+
+def stripe_event(secret: str, event_type: str = "charge.succeeded", event_id: str = "evt_bench_0001") -> Dict[str, Any]:
+    created = int(time.time())
+    if event_type.startswith("charge.dispute"):
+        obj: Dict[str, Any] = {
+            "id": "dp_bench_0001",
+            "object": "dispute",
+            "charge": "ch_bench_0001",
+            "amount": 4999,
+            "currency": "usd",
+            "reason": "fraudulent",
+            "status": "needs_response",
+            "created": created,
+        }
+    elif event_type.startswith("invoice."):
+        obj = {
+            "id": "in_bench_0001",
+            "object": "invoice",
+            "customer": "cus_bench_0001",
+            "subscription": "sub_bench_0001",
+            "amount_due": 3999,
+            "amount_paid": 3999 if event_type == "invoice.paid" else 0,
+            "amount_remaining": 0 if event_type == "invoice.paid" else 3999,
+            "currency": "usd",
+            "status": "paid" if event_type == "invoice.paid" else "open",
+            "attempt_count": 1,
+            "created": created,
+        }
+    elif event_type.startswith("payment_intent."):
+        obj = {"id": "pi_bench_0001", "object": "payment_intent", "status": "succeeded", "created": created}
+    else:
+        failed = event_type == "charge.failed"
+        obj = {
+            "id": "ch_bench_0001",
+            "object": "charge",
+            "customer": "cus_bench_0001",
+            "payment_intent": "pi_bench_0001",
+            "amount": 4999,
+            "currency": "usd",
+            "status": "failed" if failed else "succeeded",
+            "paid": not failed,
+            "failure_code": "card_declined" if failed else None,
+            "failure_message": "Your card was declined." if failed else None,
+            "created": created,
+            "metadata": {"order_id": "5500000000001", "customer_id": "6600000000001"},
+        }
+    return signed_stripe_request({
+        "id": event_id,
+        "object": "event",
+        "type": event_type,
+        "created": created,
+        "api_version": "2024-06-20",
+        "data": {"object": obj},
+    }, secret)
+
+
+def signed_recharge_request(body: Dict[str, Any], secret: str) -> Dict[str, Any]:
+    """Wrap a Recharge webhook body as an API Gateway request with a valid HMAC header."""
+    raw = json.dumps(body)
+    signature = hmac.new(secret.encode(), raw.encode(), hashlib.sha256).hexdigest()
+    return {"headers": {"x-recharge-hmac-sha256": signature}, "body": raw}
+
+
+def signed_stripe_request(stripe_event: Dict[str, Any], secret: str) -> Dict[str, Any]:
+    """Wrap a Stripe event as an API Gateway request with a valid ``Stripe-Signature`` header."""
+    payload = json.dumps(stripe_event)
+    timestamp = int(time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return {"headers": {"stripe-signature": f"t={timestamp},v1={digest}"}, "body": payload}
+
+
+def scheduled_event() -> Dict[str, Any]:
+    return {
+        "version": "0",
+        "id": "bench-scheduled",
+        "detail-type": "Scheduled Event",
+        "source": "aws.events",
+        "time": _now_iso(),
+        "region": "us-east-1",
+        "detail": {},
+    }
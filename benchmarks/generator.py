@@ -0,0 +1,297 @@
+"""Seeded synthetic webhook traffic for load testing the processors.
+
+Payload shapes follow the fields the processors read (and the extra fields Shopify,
+Recharge and Stripe actually send, so serialization costs are realistic). The mix of
+subscription SKUs, abandoned vs completed checkouts, and failed charges is
+configurable through the class attributes.
+"""
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List
+
+from benchmarks.events import eventbridge_event, signed_recharge_request, signed_stripe_request
+
+CATALOG_SKUS = [f"MARS-SKU-{idx:03d}" for idx in range(1, 121)]
+SUBSCRIPTION_SKUS = ["MARS_MONTHLY", "mars_quarterly_3x", "QUARTERLY_MARS_03", "marsupgrade90_02"]
+FIRST_NAMES = ["Alex", "Jordan", "Sam", "Taylor", "Morgan", "Casey", "Riley", "Jamie"]
+CITIES = [("Austin", "TX", "78701"), ("Denver", "CO", "80202"), ("Seattle", "WA", "98101"), ("Miami", "FL", "33101")]
+FAILURE_CODES = ["card_declined", "insufficient_funds", "expired_card", "incorrect_cvc", "processing_error"]
+
+
+class SyntheticEventGenerator:
+    """Produce Lambda events for each workload; the same seed yields the same stream."""
+
+    subscription_order_ratio = 0.35
+    completed_checkout_ratio = 0.4
+    failed_charge_ratio = 0.08
+    max_line_items = 12
+
+    def __init__(self, seed: int = 7, recharge_secret: str = "", stripe_secret: str = "") -> None:
+        self.rng = random.Random(seed)
+        self.recharge_secret = recharge_secret
+        self.stripe_secret = stripe_secret
+        self._next_id = 5_500_000_000_000
+
+    # -- helpers -----------------------------------------------------------------
+    def _id(self) -> int:
+        self._next_id += self.rng.randint(1, 50)
+        return self._next_id
+
+    def _timestamp(self) -> str:
+        offset = timedelta(seconds=self.rng.randint(0, 3600))
+        return (datetime.now(timezone.utc) - offset).isoformat()
+
+    def _money(self, low: float, high: float) -> str:
+        return f"{self.rng.uniform(low, high):.2f}"
+
+    def _customer(self) -> Dict[str, Any]:
+        customer_id = 6_600_000_000_000 + self.rng.randint(1, 50_000)
+        name = self.rng.choice(FIRST_NAMES)
+        return {
+            "id": customer_id,
+            "email": f"{name.lower()}.{customer_id % 100000}@example.com",
+            "first_name": name,
+            "last_name": "Customer",
+            "created_at": self._timestamp(),
+            "updated_at": self._timestamp(),
+            "orders_count": self.rng.randint(0, 40),
+            "total_spent": self._money(0, 4000),
+            "tags": self.rng.choice(["", "vip", "wholesale", "vip, newsletter"]),
+            "accepts_marketing": self.rng.random() < 0.6,
+            "state": "enabled",
+        }
+
+    def _address(self, name: str) -> Dict[str, Any]:
+        city, province, zip_code = self.rng.choice(CITIES)
+        return {
+            "name": name,
+            "address1": f"{self.rng.randint(1, 9999)} Main St",
+            "city": city,
+            "province": province,
+            "zip": zip_code,
+            "country": "US",
+            "phone": "+15555550100",
+        }
+
+    def _line_items(self, subscription: bool) -> List[Dict[str, Any]]:
+        count = self.rng.randint(1, self.max_line_items)
+        items = []
+        for idx in range(count):
+            sku = self.rng.choice(SUBSCRIPTION_SKUS) if subscription and idx == 0 else self.rng.choice(CATALOG_SKUS)
+            items.append({
+                "id": self._id(),
+                "variant_id": 4_400_000_000_000 + CATALOG_SKUS.index(sku) if sku in CATALOG_SKUS else 4_400_000_000_999,
+                "product_id": 3_300_000_000_000 + self.rng.randint(1, 40),
+                "sku": sku,
+                "title": f"Product {sku}",
+                "vendor": "Mars Men",
+                "quantity": self.rng.randint(1, 4),
+                "price": self._money(9, 89),
+                "total_discount": "0.00",
+                "tax_lines": [{"title": "State Tax", "price": self._money(0, 8), "rate": 0.0825}],
+                "properties": [],
+            })
+        return items
+
+    # -- Shopify -------------------------------------------------------------------
+    def shopify_order(self) -> Dict[str, Any]:
+        subscription = self.rng.random() < self.subscription_order_ratio
+        customer = self._customer()
+        line_items = self._line_items(subscription)
+        subtotal = sum(float(item["price"]) * item["quantity"] for item in line_items)
+        created_at = self._timestamp()
+        order_id = self._id()
+        order = {
+            "id": order_id,
+            "order_number": order_id % 1_000_000,
+            "email": customer["email"],
+            "created_at": created_at,
+            "updated_at": created_at,
+            "processed_at": created_at,
+            "total_price": f"{subtotal * 1.0825:.2f}",
+            "subtotal_price": f"{subtotal:.2f}",
+            "total_tax": f"{subtotal * 0.0825:.2f}",
+            "total_discounts": "0.00",
+            "total_line_items_price": f"{subtotal:.2f}",
+            "total_shipping_price_set": {"shop_money": {"amount": "0.00", "currency_code": "USD"}},
+            "currency": "USD",
+            "financial_status": self.rng.choice(["paid", "paid", "paid", "pending", "refunded"]),
+            "fulfillment_status": self.rng.choice([None, None, "fulfilled", "partial"]),
+            "tags": "subscription, recurring" if subscription and self.rng.random() < 0.5 else "",
+            "checkout_token": f"chk{self.rng.getrandbits(64):016x}",
+            "cart_token": f"cart{self.rng.getrandbits(64):016x}",
+            "gateway": "shopify_payments",
+            "payment_gateway_names": ["shopify_payments"],
+            "source_name": self.rng.choice(["web", "subscription_contract", "pos"]),
+            "landing_site": "/products/mars-monthly?utm_source=meta",
+            "customer": customer,
+            "shipping_address": self._address(customer["first_name"]),
+            "billing_address": self._address(customer["first_name"]),
+            "line_items": line_items,
+            "discount_codes": [],
+            "discount_applications": [],
+            "note_attributes": [],
+            "fulfillments": [],
+            "refunds": [],
+        }
+        topic = self.rng.choice(["orders/create", "orders/create", "orders/updated", "orders/paid"])
+        return eventbridge_event(topic, order, created_at)
+
+    def shopify_customer(self) -> Dict[str, Any]:
+        topic = self.rng.choice(["customers/create", "customers/update", "customers/update"])
+        return eventbridge_event(topic, self._customer())
+
+    def shopify_checkout(self) -> Dict[str, Any]:
+        customer = self._customer()
+        completed = self.rng.random() < self.completed_checkout_ratio
+        checkout = {
+            "id": self._id(),
+            "token": f"chk{self.rng.getrandbits(64):016x}",
+            "cart_token": f"cart{self.rng.getrandbits(64):016x}",
+            "email": customer["email"],
+            "created_at": self._timestamp(),
+            "updated_at": self._timestamp(),
+            "completed_at": self._timestamp() if completed else None,
+            "abandoned_checkout_url": "https://bench.myshopify.com/checkouts/recover",
+            "total_price": self._money(20, 300),
+            "currency": "USD",
+            "customer": {"id": customer["id"]},
+            "line_items": self._line_items(False),
+        }
+        topic = self.rng.choice(["checkouts/create", "checkouts/update"])
+        return eventbridge_event(topic, checkout)
+
+    def shopify_product(self) -> Dict[str, Any]:
+        product_id = 3_300_000_000_000 + self.rng.randint(1, 40)
+        product = {
+            "id": product_id,
+            "title": f"Product {product_id % 1000}",
+            "vendor": "Mars Men",
+            "product_type": self.rng.choice(["Supplement", "Apparel", "Bundle"]),
+            "updated_at": self._timestamp(),
+            "tags": "",
+            "variants": [
+                {
+                    "id": 4_400_000_000_000 + idx,
+                    "product_id": product_id,
+                    "sku": CATALOG_SKUS[idx],
+                    "price": self._money(9, 89),
+                    "inventory_quantity": self.rng.randint(0, 500),
+                }
+                for idx in self.rng.sample(range(len(CATALOG_SKUS)), 3)
+            ],
+        }
+        return eventbridge_event("products/update", product)
+
+    # -- Recharge ------------------------------------------------------------------
+    def recharge(self) -> Dict[str, Any]:
+        roll = self.rng.random()
+        customer_id = 770_000 + self.rng.randint(1, 20_000)
+        if roll < 0.5:
+            event_type = "subscription/cancelled" if self.rng.random() < 0.1 else "subscription/updated"
+            data: Dict[str, Any] = {
+                "id": self._id(),
+                "customer_id": customer_id,
+                "shopify_customer_id": 6_600_000_000_000 + self.rng.randint(1, 50_000),
+                "status": "cancelled" if event_type == "subscription/cancelled" else "active",
+                "created_at": self._timestamp(),
+                "updated_at": self._timestamp(),
+                "cancelled_at": self._timestamp() if event_type == "subscription/cancelled" else None,
+                "cancellation_reason": "price" if event_type == "subscription/cancelled" else None,
+                "next_charge_scheduled_at": self._timestamp(),
+                "order_interval_frequency": self.rng.choice(["1", "3"]),
+                "order_interval_unit": "month",
+                "product_title": "Mars Monthly",
+                "price": self._money(29, 89),
+                "quantity": 1,
+                "sku": self.rng.choice(SUBSCRIPTION_SKUS),
+            }
+        else:
+            failed = self.rng.random() < self.failed_charge_ratio
+            event_type = "charge/failed" if failed else "charge/paid"
+            data = {
+                "id": self._id(),
+                "subscription_id": self._id(),
+                "customer_id": customer_id,
+                "status": "error" if failed else "success",
+                "type": "recurring",
+                "scheduled_at": self._timestamp(),
+                "processed_at": self._timestamp(),
+                "total_price": self._money(29, 89),
+                "subtotal_price": self._money(29, 89),
+                "error": self.rng.choice(FAILURE_CODES) if failed else None,
+                "error_type": "CLOSED_MAX_RETRIES_REACHED" if failed else None,
+                "billing_attempt_count": self.rng.randint(1, 4) if failed else 1,
+            }
+        return signed_recharge_request({"type": event_type, "data": data}, self.recharge_secret)
+
+    # -- Stripe --------------------------------------------------------------------
+    def stripe(self) -> Dict[str, Any]:
+        created = int(time.time()) - self.rng.randint(0, 3600)
+        customer = f"cus_{self.rng.getrandbits(48):012x}"
+        roll = self.rng.random()
+        if roll < 0.6:
+            failed = self.rng.random() < self.failed_charge_ratio
+            event_type = "charge.failed" if failed else "charge.succeeded"
+            obj: Dict[str, Any] = {
+                "id": f"ch_{self.rng.getrandbits(64):016x}",
+                "object": "charge",
+                "customer": customer,
+                "payment_intent": f"pi_{self.rng.getrandbits(64):016x}",
+                "amount": self.rng.randint(1500, 25000),
+                "currency": "usd",
+                "status": "failed" if failed else "succeeded",
+                "paid": not failed,
+                "failure_code": self.rng.choice(FAILURE_CODES) if failed else None,
+                "failure_message": "The card was declined." if failed else None,
+                "payment_method": f"pm_{self.rng.getrandbits(48):012x}",
+                "created": created,
+                "metadata": {"order_id": str(self._id()), "customer_id": str(6_600_000_000_000 + self.rng.randint(1, 50_000))},
+            }
+        elif roll < 0.9:
+            paid = self.rng.random() > self.failed_charge_ratio
+            event_type = "invoice.paid" if paid else "invoice.payment_failed"
+            amount = self.rng.randint(1500, 9000)
+            obj = {
+                "id": f"in_{self.rng.getrandbits(64):016x}",
+                "object": "invoice",
+                "customer": customer,
+                "subscription": f"sub_{self.rng.getrandbits(48):012x}",
+                "amount_due": amount,
+                "amount_paid": amount if paid else 0,
+                "amount_remaining": 0 if paid else amount,
+                "currency": "usd",
+                "status": "paid" if paid else "open",
+                "attempt_count": 1 if paid else self.rng.randint(1, 4),
+                "next_payment_attempt": None if paid else created + 86400,
+                "created": created,
+            }
+        else:
+            event_type = "charge.dispute.created"
+            obj = {
+                "id": f"dp_{self.rng.getrandbits(64):016x}",
+                "object": "dispute",
+                "charge": f"ch_{self.rng.getrandbits(64):016x}",
+                "amount": self.rng.randint(1500, 25000),
+                "currency": "usd",
+                "reason": self.rng.choice(["fraudulent", "product_not_received", "duplicate"]),
+                "status": "needs_response",
+                "created": created,
+            }
+        stripe_event = {
+            "id": f"evt_{self.rng.getrandbits(64):016x}",
+            "object": "event",
+            "type": event_type,
+            "created": created,
+            "api_version": "2024-06-20",
+            "data": {"object": obj},
+        }
+        return signed_stripe_request(stripe_event, self.stripe_secret)
+
+    def stream(self, kind: str, count: int) -> Iterator[Dict[str, Any]]:
+        factory: Callable[[], Dict[str, Any]] = getattr(self, kind)
+        for _ in range(count):
+            yield factory()
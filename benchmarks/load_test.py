@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Drive the event processors with synthetic webhook traffic and report throughput.
+
+Handlers run in-process against moto (S3, DynamoDB tables from
+``dynamodb-tables.yaml``, SNS) and are invoked from a thread pool at the requested
+concurrency. For each workload the report includes events/sec, p50/p95/p99 handler
+latency and AWS API calls per event, and can be compared against a committed baseline.
+Calls per event come from a separate single-threaded pass over fresh tables: at higher
+concurrency, racing updates to the same record (product variant pruning, for one) make
+the count vary from run to run.
+
+    python -m benchmarks.load_test --events 500 --concurrency 8
+    python -m benchmarks.load_test --baseline benchmarks/baselines/load_test.json
+    python -m benchmarks.load_test --output benchmarks/baselines/load_test.json
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks import standin
+from benchmarks.generator import SyntheticEventGenerator
+
+# workload name -> (Lambda directory, generator method)
+WORKLOADS: Dict[str, Tuple[str, str]] = {
+    "shopify-orders": ("shopify-order-processor", "shopify_order"),
+    "shopify-customers": ("shopify-customer-processor", "shopify_customer"),
+    "shopify-checkouts": ("shopify-cart-processor", "shopify_checkout"),
+    "shopify-products": ("shopify-product-processor", "shopify_product"),
+    "recharge": ("recharge-event-processor", "recharge"),
+    "stripe": ("stripe-event-processor", "stripe"),
+}
+
+COUNTED_SERVICES = ("s3", "dynamodb", "sns")
+
+
+class CallCounter:
+    """Count AWS API calls made through the shared ``lambda_common`` session."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+
+    def __call__(self, event_name: str, **_: Any) -> None:
+        # event_name is "before-call.<service>.<Operation>"
+        service = event_name.split(".")[1]
+        with self._lock:
+            self.calls[service] += 1
+
+    def reset(self) -> Counter:
+        with self._lock:
+            snapshot, self.calls = self.calls, Counter()
+        return snapshot
+
+
+def load_handler(lambda_dir: str) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    """Import ``lambdas/<lambda_dir>/index.py`` under a unique module name."""
+    path = standin.LAMBDAS_ROOT / lambda_dir / "index.py"
+    spec = importlib.util.spec_from_file_location(f"load_test_{lambda_dir.replace('-', '_')}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.handler
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_workload(
+    handler: Callable[[Dict[str, Any], Any], Dict[str, Any]],
+    events: List[Dict[str, Any]],
+    concurrency: int,
+    counter: CallCounter,
+) -> Dict[str, Any]:
+    def invoke(event: Dict[str, Any]) -> Tuple[float, Any]:
+        started = time.perf_counter()
+        response = handler(event, None)
+        return (time.perf_counter() - started) * 1000, response.get("statusCode")
+
+    counter.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(invoke, events))
+    elapsed = time.perf_counter() - started
+    calls = counter.reset()
+
+    latencies = [latency for latency, _ in results]
+    return {
+        "events": len(events),
+        "concurrency": concurrency,
+        "events_per_sec": round(len(events) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "calls_per_event": {service: round(calls[service] / len(events), 3) for service in COUNTED_SERVICES},
+        "status_codes": dict(sorted(Counter(str(status) for _, status in results).items())),
+    }
+
+
+def measure_workload(lambda_dir: str, events: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """Run ``events`` through a freshly loaded handler against freshly provisioned moto resources."""
+    from moto import mock_aws
+
+    from lambda_common import clients
+
+    with mock_aws():
+        os.environ["ALERT_TOPIC_ARN"] = standin.provision()["alert_topic_arn"]
+        clients.reset_clients()
+        counter = CallCounter()
+        clients._session().events.register("before-call", counter)
+        handler = load_handler(lambda_dir)
+        handler(events[0], None)  # warm-up: client construction is measured by cold_start.py
+        return run_workload(handler, events, concurrency, counter)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], latency_tolerance: float) -> List[str]:
+    """Return regressions against the baseline.
+
+    Calls per event, measured single-threaded, are deterministic for a given seed and
+    event count, so any increase is reported. A workload run with a different ``--events``
+    than its baseline mixes event types differently; it is only checked for non-2xx
+    responses, with a warning. Latency and throughput depend on the machine and get
+    ``latency_tolerance`` slack; p99 is reported but too noisy at these sample sizes to
+    gate on.
+    """
+    regressions = []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        failed = {status: count for status, count in current["status_codes"].items() if not status.startswith("2")}
+        if failed:
+            regressions.append(f"{name}: non-2xx responses {failed}")
+        if current["events"] != expected.get("events"):
+            print(
+                f"WARNING {name}: ran {current['events']} events but the baseline has {expected.get('events')}; "
+                "skipping the baseline comparison",
+                file=sys.stderr,
+            )
+            continue
+        for service, value in current["calls_per_event"].items():
+            limit = expected["calls_per_event"].get(service, 0)
+            if value > limit + 0.01:
+                regressions.append(f"{name}: {service} calls/event {value} > baseline {limit}")
+        for key in ("p50_ms", "p95_ms"):
+            if current[key] > expected[key] * (1 + latency_tolerance):
+                regressions.append(f"{name}: {key} {current[key]} > baseline {expected[key]} (+{latency_tolerance:.0%})")
+        if current["events_per_sec"] < expected["events_per_sec"] / (1 + latency_tolerance):
+            regressions.append(
+                f"{name}: events/sec {current['events_per_sec']} < baseline {expected['events_per_sec']} (-{latency_tolerance:.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workloads", default="all", help=f"Comma-separated subset of: {', '.join(WORKLOADS)}")
+    parser.add_argument("--events", type=int, default=300, help="Events per workload")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent handler invocations")
+    parser.add_argument("--seed", type=int, default=7, help="Generator seed")
+    parser.add_argument("--output", help="Write JSON results (use to refresh the baseline)")
+    parser.add_argument("--baseline", help="Fail if results regress against this JSON file")
+    parser.add_argument("--latency-tolerance", type=float, default=1.0, help="Allowed latency/throughput slack vs baseline (1.0 = 2x)")
+    args = parser.parse_args(argv)
+
+    names = list(WORKLOADS) if args.workloads == "all" else [n.strip() for n in args.workloads.split(",")]
+
+    # Configuration is read at import time by the processors, so it must be in place first.
+    os.environ.update(standin.lambda_environment())
+    os.environ["EMF_METRICS_ENABLED"] = "false"
+    os.environ.pop("AWS_ENDPOINT_URL", None)
+    sys.path.insert(0, str(standin.LAMBDAS_ROOT))
+
+    generator = SyntheticEventGenerator(
+        seed=args.seed,
+        recharge_secret=standin.RECHARGE_WEBHOOK_SECRET,
+        stripe_secret=standin.STRIPE_WEBHOOK_SECRET,
+    )
+    results: Dict[str, Any] = {}
+    for name in names:
+        lambda_dir, kind = WORKLOADS[name]
+        events = list(generator.stream(kind, args.events))
+        counted = measure_workload(lambda_dir, events, 1)
+        results[name] = {**measure_workload(lambda_dir, events, args.concurrency), "calls_per_event": counted["calls_per_event"]}
+
+    header = f"{'workload':20} {'events/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'s3/ev':>6} {'ddb/ev':>7} {'sns/ev':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, summary in results.items():
+        calls = summary["calls_per_event"]
+        print(
+            f"{name:20} {summary['events_per_sec']:>9} {summary['p50_ms']:>8} {summary['p95_ms']:>8} "
+            f"{summary['p99_ms']:>8} {calls['s3']:>6} {calls['dynamodb']:>7} {calls['sns']:>7}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.latency_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
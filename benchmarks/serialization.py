@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Compare per-event CPU of the stdlib JSON paths with ``lambda_common.serialization``.
+
+Each step is timed with ``time.process_time`` over the same seeded synthetic events:
+
+- ``archive_body``: encode the raw archive document (``default=str``).
+- ``enrich_order``: run ``shopify_events.orders.enrich_order``, which serializes its JSON blobs.
+- ``dynamodb_item``: coerce the orders-cache item. Before: JSON round trip with ``parse_float=Decimal``.
+- ``webhook_parse``: parse Recharge/Stripe request bodies.
+- ``bulk_jsonl``: parse and flatten bulk export lines (``shopify-bulk-download``).
+
+    python -m benchmarks.serialization --events 2000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import standin
+from benchmarks.generator import SyntheticEventGenerator
+
+
+def cpu_us_per_event(func: Callable[[Any], Any], inputs: List[Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        for item in inputs:
+            func(item)
+        best = min(best, time.process_time() - started)
+    return best / len(inputs) * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5, help="Best of N passes")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    os.environ.update(standin.lambda_environment())
+    os.environ["EMF_METRICS_ENABLED"] = "false"
+    sys.path.insert(0, str(standin.LAMBDAS_ROOT))
+
+    from lambda_common import serialization
+    from shopify_events import orders
+    from shopify_events.common import build_raw_event_body
+
+    if serialization.orjson is None:
+        raise SystemExit("orjson is not installed; nothing to compare")
+
+    generator = SyntheticEventGenerator(args.seed, standin.RECHARGE_WEBHOOK_SECRET, standin.STRIPE_WEBHOOK_SECRET)
+    order_events = [generator.shopify_order()["detail"] for _ in range(args.events)]
+    archive_docs = [
+        build_raw_event_body(detail["payload"], detail["metadata"], "orders/create", detail["metadata"]["X-Shopify-Triggered-At"])
+        for detail in order_events
+    ]
+    payloads = [detail["payload"] for detail in order_events]
+    enriched = [orders.enrich_order(payload, "orders/create") for payload in payloads]
+    webhook_bodies = [generator.recharge()["body"] for _ in range(args.events // 2)]
+    webhook_bodies += [generator.stripe()["body"] for _ in range(args.events - len(webhook_bodies))]
+    jsonl = [json.dumps(payload).encode() for payload in payloads]
+
+    def legacy_item(item: Dict[str, Any]) -> Any:
+        return json.loads(json.dumps(item, default=str), parse_float=Decimal)
+
+    def bulk_lines(parse: Callable[[bytes], Any], encode: Callable[[Any], Any]) -> Callable[[bytes], Any]:
+        def run(line: bytes) -> Any:
+            record = parse(line)
+            return {key: encode(value) if isinstance(value, list) else value for key, value in record.items()}
+        return run
+
+    steps: Dict[str, Dict[str, Any]] = {
+        "archive_body": {
+            "inputs": archive_docs,
+            "stdlib": lambda doc: json.dumps(doc, default=str).encode(),
+            "current": lambda doc: serialization.dumps_bytes(doc, default=str),
+        },
+        "enrich_order": {
+            "inputs": payloads,
+            "stdlib": lambda payload: orders.enrich_order(payload, "orders/create"),
+            "current": lambda payload: orders.enrich_order(payload, "orders/create"),
+        },
+        "dynamodb_item": {
+            "inputs": enriched,
+            "stdlib": legacy_item,
+            "current": serialization.to_dynamodb,
+        },
+        "webhook_parse": {
+            "inputs": webhook_bodies,
+            "stdlib": json.loads,
+            "current": serialization.loads,
+        },
+        "bulk_jsonl": {
+            "inputs": jsonl,
+            "stdlib": bulk_lines(json.loads, json.dumps),
+            "current": bulk_lines(serialization.loads, serialization.dumps),
+        },
+    }
+
+    header = f"{'step':16} {'stdlib us/ev':>13} {'current us/ev':>14} {'speedup':>8}"
+    print(header)
+    print("-" * len(header))
+    totals = {"stdlib": 0.0, "current": 0.0}
+    for name, step in steps.items():
+        timings = {}
+        for mode in ("stdlib", "current"):
+            serialization.set_backend("stdlib" if mode == "stdlib" else "orjson")
+            timings[mode] = cpu_us_per_event(step[mode], step["inputs"], args.repeat)
+            totals[mode] += timings[mode]
+        print(f"{name:16} {timings['stdlib']:>13.1f} {timings['current']:>14.1f} {timings['stdlib'] / timings['current']:>7.1f}x")
+    print("-" * len(header))
+    print(f"{'total':16} {totals['stdlib']:>13.1f} {totals['current']:>14.1f} {totals['stdlib'] / totals['current']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
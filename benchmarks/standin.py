@@ -0,0 +1,91 @@
+"""Moto-backed stand-in for the AWS resources the Lambdas expect.
+
+Tables are provisioned from ``infrastructure/shared/dynamodb-tables.yaml`` so the
+benchmarks always run against the same key schemas and indexes as production.
+"""
+from __future__ import annotations
+
+import os
+import socket
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LAMBDAS_ROOT = REPO_ROOT / "lambdas"
+DYNAMODB_TEMPLATE = REPO_ROOT / "infrastructure" / "shared" / "dynamodb-tables.yaml"
+
+BRAND = "bench"
+REGION = "us-east-1"
+S3_BUCKET = f"{BRAND}-data-lake"
+RECHARGE_WEBHOOK_SECRET = "bench-recharge-secret"
+STRIPE_WEBHOOK_SECRET = "whsec_bench"
+
+FAKE_CREDENTIALS = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": REGION,
+}
+
+
+def lambda_environment(alert_topic_arn: Optional[str] = None) -> Dict[str, str]:
+    """Environment variables covering every processor's required configuration."""
+    env = {
+        **FAKE_CREDENTIALS,
+        "BRAND": BRAND,
+        "S3_BUCKET": S3_BUCKET,
+        "DYNAMODB_TABLE": f"{BRAND}-orders-cache",
+        "ORDERS_TABLE": f"{BRAND}-orders-cache",
+        "RECHARGE_WEBHOOK_SECRET": RECHARGE_WEBHOOK_SECRET,
+        "STRIPE_WEBHOOK_SECRET": STRIPE_WEBHOOK_SECRET,
+    }
+    if alert_topic_arn:
+        env["ALERT_TOPIC_ARN"] = alert_topic_arn
+    return env
+
+
+def provision(endpoint_url: Optional[str] = None) -> Dict[str, Any]:
+    """Create the bucket, hot tables and alert topic; return identifiers for the Lambda env."""
+    import boto3
+
+    kwargs = {"region_name": REGION}
+    if endpoint_url:
+        kwargs["endpoint_url"] = endpoint_url
+
+    boto3.client("s3", **kwargs).create_bucket(Bucket=S3_BUCKET)
+    boto3.client("cloudformation", **kwargs).create_stack(
+        StackName=f"{BRAND}-dynamodb-tables",
+        TemplateBody=DYNAMODB_TEMPLATE.read_text(encoding="utf-8"),
+        Parameters=[{"ParameterKey": "Brand", "ParameterValue": BRAND}],
+    )
+    topic_arn = boto3.client("sns", **kwargs).create_topic(Name=f"{BRAND}-data-platform-alerts")["TopicArn"]
+    return {"alert_topic_arn": topic_arn}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def moto_server() -> Iterator[str]:
+    """Run moto in server mode and yield its endpoint URL.
+
+    Server mode keeps moto out of the process under test, so measured import and
+    client-construction costs are the same as they would be against real AWS.
+    """
+    import logging
+
+    from moto.server import ThreadedMotoServer
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    os.environ.update(FAKE_CREDENTIALS)
+    port = _free_port()
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.stop()
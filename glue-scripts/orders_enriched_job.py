@@ -1,7 +1,18 @@
 import argparse
+import gzip
+import json
+
 from pyspark.sql import SparkSession
-from pyspark.sql.functions import col, lit
-from pyspark.sql.types import ArrayType, MapType, StringType
+from pyspark.sql.functions import broadcast, col, collect_set, explode, lit
+from pyspark.sql.types import ArrayType, MapType, StringType, StructField, StructType
+
+CATALOG_SCHEMA = StructType([
+    StructField('variant_id', StringType()),
+    StructField('product_id', StringType()),
+    StructField('product_type', StringType()),
+    StructField('vendor', StringType()),
+    StructField('cost', StringType()),
+])
 
 
 def parse_args():
@@ -10,9 +21,54 @@ def parse_args():
     parser.add_argument('--raw-path', required=True)
     parser.add_argument('--processed-path', required=True)
     parser.add_argument('--job-date', required=False)
+    parser.add_argument('--catalog-manifest', required=False,
+                        help='s3:// URI of the product catalog latest.json written by the product processor')
     return parser.parse_args()
 
 
+def load_catalog(spark, manifest_uri):
+    """Read the current catalog snapshot on the driver; None when no snapshot is published yet."""
+    import boto3
+
+    bucket, key = manifest_uri.replace('s3://', '', 1).split('/', 1)
+    s3 = boto3.client('s3')
+    try:
+        manifest = json.loads(s3.get_object(Bucket=bucket, Key=key)['Body'].read())
+    except s3.exceptions.NoSuchKey:
+        print(f'No catalog manifest at {manifest_uri}; skipping catalog attributes')
+        return None
+
+    snapshot = json.loads(gzip.decompress(s3.get_object(Bucket=bucket, Key=manifest['key'])['Body'].read()))
+    rows = [
+        (
+            variant_id,
+            attrs.get('product_id'),
+            attrs.get('product_type'),
+            attrs.get('vendor'),
+            str(attrs['cost']) if attrs.get('cost') is not None else None,
+        )
+        for variant_id, attrs in snapshot.get('variants', {}).items()
+    ]
+    print(f"Loaded catalog version {manifest['version']} ({len(rows)} variants)")
+    return spark.createDataFrame(rows, CATALOG_SCHEMA)
+
+
+def add_catalog_attributes(orders, catalog_df):
+    """Attach the distinct product types and vendors of each order's line items."""
+    if 'id' not in orders.columns or 'line_items' not in orders.columns:
+        return orders
+
+    # The catalog is small, so broadcast it instead of shuffling the exploded line items.
+    per_order = (
+        orders.select(col('id').alias('_order_id'), explode('line_items').alias('_item'))
+        .select('_order_id', col('_item.variant_id').cast(StringType()).alias('variant_id'))
+        .join(broadcast(catalog_df), 'variant_id')
+        .groupBy('_order_id')
+        .agg(collect_set('product_type').alias('product_types'), collect_set('vendor').alias('vendors'))
+    )
+    return orders.join(per_order, orders['id'] == per_order['_order_id'], 'left').drop('_order_id')
+
+
 def main() -> None:
     args = parse_args()
 
@@ -21,7 +77,11 @@ def main() -> None:
     job_date = args.job_date
     input_path = args.raw_path if not job_date else f"{args.raw_path}/date={job_date}"
 
-    orders_df = spark.read.json(input_path)
+    # Recurse instead of inferring partitions: hours written with RAW_KEY_SHARDS carry an extra
+    # shard=xx/ level, and Spark rejects mixed partition depths. Pruning still happens on the date path.
+    # Gzip archive objects (.json.gz) are decoded by Hadoop's built-in GzipCodec from the extension.
+    # Glue's Hadoop has no native zstd codec by default, so the Shopify stack only offers gzip.
+    orders_df = spark.read.option('recursiveFileLookup', 'true').json(input_path)
 
     detail_col = col('detail')
     if 'data' in orders_df.columns:
@@ -35,6 +95,11 @@ def main() -> None:
 
     orders = flattened.select('event_type', 'event_time', 'order.*')
 
+    if args.catalog_manifest:
+        catalog_df = load_catalog(spark, args.catalog_manifest)
+        if catalog_df is not None:
+            orders = add_catalog_attributes(orders, catalog_df)
+
     def stringify_complex(column_name: str):
         return col(column_name).cast(StringType()).alias(column_name)
 
@@ -0,0 +1,17 @@
+"""Alert Digest Publisher"""
+import logging
+from typing import Any, Dict
+
+from lambda_common.alerts import flush_digests
+from lambda_common.metrics import instrumented
+from lambda_common.serialization import dumps
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+@instrumented("alert-digest")
+def handler(_: Dict[str, Any], __: Any) -> Dict[str, Any]:
+    published = flush_digests()
+    logger.info("Published %d alert digests", published)
+    return {"statusCode": 200, "body": dumps({"published": published})}
@@ -1,36 +1,78 @@
 """Data Quality Monitoring Lambda"""
-import json
 import logging
 import os
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Set, Tuple
 
-import boto3
+from lambda_common import volume_baseline
+from lambda_common.clients import lazy_client, lazy_resource
+from lambda_common.concurrency import run_concurrently
+from lambda_common.metrics import instrumented, stage
+from lambda_common.partition_counts import hour_key, hourly_counts
+from lambda_common.raw_keys import hour_prefix
+from lambda_common.serialization import dumps, loads
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
-sns = boto3.client("sns")
-cloudwatch = boto3.client("cloudwatch")
+s3 = lazy_client("s3")
+dynamodb = lazy_resource("dynamodb")
+sns = lazy_client("sns")
+cloudwatch = lazy_client("cloudwatch")
 
 BRAND = os.environ["BRAND"]
 S3_BUCKET = os.environ["S3_BUCKET"]
 ALERT_TOPIC_ARN = os.environ.get("ALERT_TOPIC_ARN")
 ORDERS_TABLE = os.environ.get("ORDERS_TABLE", f"{BRAND}-orders-cache")
 CHECK_WINDOW_HOURS = int(os.getenv("CHECK_WINDOW_HOURS", "24"))
-
-
+# "counters" reads the ingest-time partition-counts table (one Query per check); "s3" lists the archive.
+VOLUME_SOURCE = os.getenv("VOLUME_SOURCE", "s3")
+
+# Hour prefixes cover the optional shard=xx/ partitions below them, so listings see both layouts.
+ORDER_EVENTS_PREFIX = "raw/shopify/orders/events/"
+ORDER_EVENTS_ENTITY = "shopify/orders"
+
+# Entities (raw/<entity>/events/) scored against their hour-of-week volume baseline.
+VOLUME_ENTITIES = [
+    entity.strip()
+    for entity in os.getenv(
+        "VOLUME_ENTITIES",
+        "shopify/orders,shopify/customers,shopify/checkouts,recharge/subscriptions,recharge/charges,"
+        "stripe/charges,stripe/payment_intents",
+    ).split(",")
+    if entity.strip()
+]
+# Archived under date= only, so hourly volumes for these come from the partition counters alone.
+DATE_PARTITIONED_ENTITIES = {"shopify/checkouts", "shopify/carts"}
+BASELINE_KEY = "metadata/data_quality/volume_baseline.json"
+
+# Hot tables from infrastructure/shared/dynamodb-tables.yaml, as suffixes of "{BRAND}-".
+HEALTH_TABLES = os.getenv(
+    "HEALTH_TABLES",
+    "orders-cache,customers-cache,abandoned-carts,subscriptions,subscription-charges,payment-attempts,"
+    "payment-intents,invoice-payments,disputes,stripe-events,product-catalog,customer-360,order-line-items,"
+    "alert-digests,partition-counts",
+)
+HEALTH_WINDOW_MINUTES = int(os.getenv("HEALTH_WINDOW_MINUTES", "60"))
+HEALTH_THROTTLE_THRESHOLD = int(os.getenv("HEALTH_THROTTLE_THRESHOLD", "0"))
+HEALTH_LATENCY_THRESHOLD_MS = float(os.getenv("HEALTH_LATENCY_THRESHOLD_MS", "100"))
+TABLE_SUM_METRICS = (
+    "ReadThrottleEvents", "WriteThrottleEvents", "ConsumedReadCapacityUnits", "ConsumedWriteCapacityUnits",
+)
+LATENCY_OPERATIONS = ("GetItem", "PutItem", "UpdateItem", "Query", "BatchWriteItem")
+METRIC_QUERIES_PER_CALL = 500
+
+
+@instrumented("data-quality-checker")
 def handler(_: Dict[str, Any], __: Any) -> Dict[str, Any]:
     results: Dict[str, Any] = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "checks": [],
     }
 
-    results["checks"].append(check_hourly_data_gaps())
-    results["checks"].append(check_order_count_anomaly())
-    results["checks"].append(check_dynamodb_health())
+    for check in (check_hourly_data_gaps, check_volume_anomalies, check_dynamodb_health):
+        with stage(check.__name__):
+            results["checks"].append(check())
 
     store_quality_results(results)
     publish_metrics(results)
@@ -42,21 +84,92 @@ def handler(_: Dict[str, Any], __: Any) -> Dict[str, Any]:
     return {"statusCode": 200, "results": results}
 
 
+def partition_hours(base: str, day: date) -> Set[str]:
+    """Hours (``"HH"``) that have objects under ``base`` on ``day``, from one delimiter listing."""
+    prefix = f"{base}date={day.strftime('%Y-%m-%d')}/"
+    hours: Set[str] = set()
+    kwargs: Dict[str, Any] = {"Bucket": S3_BUCKET, "Prefix": prefix, "Delimiter": "/"}
+    while True:
+        with stage("s3_list"):
+            response = s3.list_objects_v2(**kwargs)
+        for common in response.get("CommonPrefixes", []):
+            partition = common["Prefix"][len(prefix):].rstrip("/")
+            if partition.startswith("hour="):
+                hours.add(partition[len("hour="):])
+        if not response.get("IsTruncated"):
+            return hours
+        kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def _list_level(prefix: str) -> Tuple[int, List[str]]:
+    """Count the keys directly under ``prefix`` and return its sub-prefixes (e.g. ``shard=xx/``)."""
+    keys = 0
+    children: List[str] = []
+    kwargs: Dict[str, Any] = {"Bucket": S3_BUCKET, "Prefix": prefix, "Delimiter": "/"}
+    while True:
+        with stage("s3_list"):
+            response = s3.list_objects_v2(**kwargs)
+        keys += len(response.get("Contents", []))
+        children.extend(common["Prefix"] for common in response.get("CommonPrefixes", []))
+        if not response.get("IsTruncated"):
+            return keys, children
+        kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def _count_all(prefix: str) -> int:
+    keys = 0
+    kwargs: Dict[str, Any] = {"Bucket": S3_BUCKET, "Prefix": prefix}
+    while True:
+        with stage("s3_list"):
+            response = s3.list_objects_v2(**kwargs)
+        keys += response.get("KeyCount", 0)
+        if not response.get("IsTruncated"):
+            return keys
+        kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def count_objects(prefixes: List[str]) -> List[int]:
+    """Exact object counts under each prefix, following continuation tokens past 1,000 keys.
+
+    Continuation tokens are sequential, so parallelism comes from the layout instead. A
+    first pass lists each prefix one level deep; a second pass counts every sub-prefix
+    (``shard=xx/`` when ``RAW_KEY_SHARDS`` > 1) concurrently. Both passes are flat so the
+    shared I/O pool is never waited on from inside itself.
+    """
+    levels = run_concurrently(*[lambda prefix=prefix: _list_level(prefix) for prefix in prefixes])
+    children = [(index, child) for index, (_, subprefixes) in enumerate(levels) for child in subprefixes]
+    nested = run_concurrently(*[lambda child=child: _count_all(child) for _, child in children])
+
+    counts = [direct for direct, _ in levels]
+    for (index, _), count in zip(children, nested):
+        counts[index] += count
+    return counts
+
+
+def hourly_volumes(entity: str, raw_prefix: str, checkpoints: List[datetime]) -> List[int]:
+    """Events archived in each checkpoint's hour, from the partition counters or an exact S3 count."""
+    if VOLUME_SOURCE == "counters":
+        counted = hourly_counts(entity, min(checkpoints), max(checkpoints))
+        return [counted.get(hour_key(checkpoint), 0) for checkpoint in checkpoints]
+    return count_objects([hour_prefix(raw_prefix, checkpoint) for checkpoint in checkpoints])
+
+
 def check_hourly_data_gaps() -> Dict[str, Any]:
     now = datetime.now(timezone.utc)
-    missing: List[str] = []
+    checkpoints = [now - timedelta(hours=hours_ago) for hours_ago in range(CHECK_WINDOW_HOURS)]
 
-    for hours_ago in range(CHECK_WINDOW_HOURS):
-        checkpoint = now - timedelta(hours=hours_ago)
-        prefix = (
-            "raw/shopify/orders/events/"
-            f"date={checkpoint.strftime('%Y-%m-%d')}/"
-            f"hour={checkpoint.strftime('%H')}/"
-        )
+    if VOLUME_SOURCE == "counters":
+        counted = hourly_counts(ORDER_EVENTS_ENTITY, checkpoints[-1], now)
+        present = {hour for hour, count in counted.items() if count}
+    else:
+        # One listing per date rather than per hour, issued in parallel, so a wider window barely costs more.
+        days = sorted({checkpoint.date() for checkpoint in checkpoints})
+        listed = run_concurrently(*[lambda day=day: partition_hours(ORDER_EVENTS_PREFIX, day) for day in days])
+        present = {f"{day.strftime('%Y-%m-%d')}T{hour}" for day, hours in zip(days, listed) for hour in hours}
 
-        response = s3.list_objects_v2(Bucket=S3_BUCKET, Prefix=prefix, MaxKeys=1)
-        if response.get("KeyCount", 0) == 0:
-            missing.append(f"{checkpoint.strftime('%Y-%m-%d %H:00')}Z")
+    missing: List[str] = [
+        f"{checkpoint.strftime('%Y-%m-%d %H:00')}Z" for checkpoint in checkpoints if hour_key(checkpoint) not in present
+    ]
 
     return {
         "check": "hourly_data_gaps",
@@ -66,62 +179,158 @@ def check_hourly_data_gaps() -> Dict[str, Any]:
     }
 
 
-def check_order_count_anomaly() -> Dict[str, Any]:
-    now = datetime.now(timezone.utc)
-    last_hour = now - timedelta(hours=1)
-    prefix = (
-        "raw/shopify/orders/events/"
-        f"date={last_hour.strftime('%Y-%m-%d')}/"
-        f"hour={last_hour.strftime('%H')}/"
-    )
+def load_baselines() -> Dict[str, Any]:
+    try:
+        with stage("s3_get"):
+            body = s3.get_object(Bucket=S3_BUCKET, Key=BASELINE_KEY)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return {"entities": {}}
+    return loads(body)
 
-    current = s3.list_objects_v2(Bucket=S3_BUCKET, Prefix=prefix)
-    current_count = current.get("KeyCount", 0)
 
-    total = 0
-    samples = 0
-    for days_back in range(1, 8):
-        checkpoint = now - timedelta(days=days_back)
-        prefix = (
-            "raw/shopify/orders/events/"
-            f"date={checkpoint.strftime('%Y-%m-%d')}/"
-            f"hour={checkpoint.strftime('%H')}/"
-        )
-        response = s3.list_objects_v2(Bucket=S3_BUCKET, Prefix=prefix)
-        total += response.get("KeyCount", 0)
-        samples += 1
+def save_baselines(state: Dict[str, Any]) -> None:
+    with stage("s3_put"):
+        s3.put_object(Bucket=S3_BUCKET, Key=BASELINE_KEY, Body=dumps(state), ContentType="application/json")
 
-    average = total / samples if samples else 0
-    threshold = average * 0.5
 
-    status = "PASS" if average == 0 or current_count >= threshold else "FAIL"
+def check_volume_anomalies() -> Dict[str, Any]:
+    """Score the last complete hour of each entity against its hour-of-week baseline.
 
+    Each run folds only the hours since the previous run into the stored profiles, so the
+    cost stays constant: one S3 GET for the state, plus one volume lookup and one state
+    PUT per entity. A missing or stale profile is rebuilt from up to ``BASELINE_WEEKS`` of
+    history, at most ``BASELINE_MAX_CATCHUP_HOURS`` per run, oldest first. It is reported
+    as catching up, not scored, until it reaches the current hour. State is saved after
+    every entity, so a run that times out keeps the progress it made. Only drops fail the
+    check; spikes are reported with their z-score.
+    """
+    now = datetime.now(timezone.utc)
+    current = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+    state = load_baselines()
+
+    results: List[Dict[str, Any]] = []
+    for entity in VOLUME_ENTITIES:
+        if VOLUME_SOURCE != "counters" and entity in DATE_PARTITIONED_ENTITIES:
+            continue
+        profile = state["entities"].setdefault(entity, volume_baseline.empty_profile())
+        catch_up, remaining = volume_baseline.pending_hours(profile, current)
+
+        if remaining:
+            # Still rebuilding: fold this run's share of history and score nothing yet.
+            for hour, count in zip(catch_up, hourly_volumes(entity, f"raw/{entity}/events/", catch_up)):
+                volume_baseline.fold(profile, hour, count)
+            results.append({"entity": entity, "hour": profile["last_hour"], "catching_up": remaining, "samples": 0, "z": None})
+        else:
+            counts = hourly_volumes(entity, f"raw/{entity}/events/", catch_up + [current])
+            for hour, count in zip(catch_up, counts):
+                volume_baseline.fold(profile, hour, count)
+            results.append({"entity": entity, **volume_baseline.observe(profile, current, counts[-1])})
+        save_baselines(state)
+
+    drops = [result for result in results if volume_baseline.is_drop(result)]
+    catching_up = [result["entity"] for result in results if result.get("catching_up")]
+    message = "; ".join(
+        f"{result['entity']} {result['count']} vs median {result['median']} (z {result['z']})" for result in drops
+    )
     return {
-        "check": "order_count_anomaly",
-        "status": status,
-        "current_count": current_count,
-        "average_count": round(average, 2),
-        "threshold": round(threshold, 2),
-        "message": f"Current {current_count} vs avg {round(average, 2)}",
+        "check": "volume_anomaly",
+        "status": "FAIL" if drops else "PASS",
+        "hour": f"{current.strftime('%Y-%m-%d %H:00')}Z",
+        "entities": results,
+        "message": message
+        or f"{len(results) - len(catching_up)} entities within {volume_baseline.BASELINE_Z_THRESHOLD} robust z of their baseline"
+        + (f"; rebuilding {', '.join(catching_up)}" if catching_up else ""),
     }
 
 
-def check_dynamodb_health() -> Dict[str, Any]:
-    table = dynamodb.Table(ORDERS_TABLE)
+def _health_tables() -> List[str]:
+    suffixes = [suffix.strip() for suffix in HEALTH_TABLES.split(",") if suffix.strip()]
+    return [ORDERS_TABLE if suffix == "orders-cache" else f"{BRAND}-{suffix}" for suffix in suffixes]
+
+
+def _describe(table_name: str) -> Dict[str, Any]:
     try:
-        response = table.scan(Select="COUNT", Limit=1000)
-        count = response.get("Count", 0)
+        with stage("dynamodb_describe"):
+            table = dynamodb.meta.client.describe_table(TableName=table_name)["Table"]
+    except Exception as exc:
+        logger.exception("Failed to describe %s", table_name)
+        return {"table": table_name, "table_status": "UNKNOWN", "problems": [str(exc)]}
+
+    indexes = {
+        index["IndexName"]: index.get("IndexStatus", "ACTIVE") for index in table.get("GlobalSecondaryIndexes", [])
+    }
+    problems = [] if table["TableStatus"] == "ACTIVE" else [f"table {table['TableStatus']}"]
+    problems += [f"index {name} {status}" for name, status in indexes.items() if status != "ACTIVE"]
+    return {
+        "table": table_name,
+        "table_status": table["TableStatus"],
+        "item_count": table.get("ItemCount", 0),
+        "size_bytes": table.get("TableSizeBytes", 0),
+        "indexes": indexes,
+        "problems": problems,
+    }
 
-        description = table.meta.client.describe_table(TableName=ORDERS_TABLE)
-        status = description["Table"]["TableStatus"]
 
-        return {
-            "check": "dynamodb_health",
-            "status": "PASS" if status == "ACTIVE" else "FAIL",
-            "item_count": count,
-            "table_status": status,
-            "message": f"Table {status} ~{count} items",
+def _metric_queries(tables: List[str]) -> List[Dict[str, Any]]:
+    queries = []
+    for position, table_name in enumerate(tables):
+        series = [(name, "Sum", []) for name in TABLE_SUM_METRICS]
+        series += [
+            ("SuccessfulRequestLatency", "Average", [{"Name": "Operation", "Value": operation}])
+            for operation in LATENCY_OPERATIONS
+        ]
+        for index, (metric, statistic, extra) in enumerate(series):
+            queries.append({
+                "Id": f"t{position}_{index}",
+                "Label": f"{table_name}|{metric}",
+                "MetricStat": {
+                    "Metric": {
+                        "Namespace": "AWS/DynamoDB",
+                        "MetricName": metric,
+                        "Dimensions": [{"Name": "TableName", "Value": table_name}] + extra,
+                    },
+                    "Period": HEALTH_WINDOW_MINUTES * 60,
+                    "Stat": statistic,
+                },
+                "ReturnData": True,
+            })
+    return queries
+
+
+def _table_metrics(tables: List[str], now: datetime) -> Dict[str, Dict[str, List[float]]]:
+    """``{table: {metric: [values]}}`` over the last ``HEALTH_WINDOW_MINUTES``, batched into GetMetricData calls."""
+    queries = _metric_queries(tables)
+    metrics: Dict[str, Dict[str, List[float]]] = {table_name: {} for table_name in tables}
+    for offset in range(0, len(queries), METRIC_QUERIES_PER_CALL):
+        kwargs: Dict[str, Any] = {
+            "MetricDataQueries": queries[offset:offset + METRIC_QUERIES_PER_CALL],
+            "StartTime": now - timedelta(minutes=HEALTH_WINDOW_MINUTES),
+            "EndTime": now,
         }
+        while True:
+            with stage("cloudwatch_get_metric_data"):
+                response = cloudwatch.get_metric_data(**kwargs)
+            for result in response.get("MetricDataResults", []):
+                table_name, metric = result["Label"].split("|", 1)
+                metrics[table_name].setdefault(metric, []).extend(result.get("Values", []))
+            if not response.get("NextToken"):
+                break
+            kwargs["NextToken"] = response["NextToken"]
+    return metrics
+
+
+def check_dynamodb_health() -> Dict[str, Any]:
+    """Table and index status, size and throttling/latency for every hot table, without reading any items.
+
+    ``ItemCount`` and ``TableSizeBytes`` come from ``DescribeTable`` and are refreshed by
+    DynamoDB roughly every six hours; throttles, consumed capacity and latency come from
+    the ``AWS/DynamoDB`` CloudWatch metrics over the last ``HEALTH_WINDOW_MINUTES``.
+    """
+    now = datetime.now(timezone.utc)
+    table_names = _health_tables()
+    try:
+        tables = run_concurrently(*[lambda name=name: _describe(name) for name in table_names])
+        metrics = _table_metrics(table_names, now)
     except Exception as exc:
         logger.exception("Failed DynamoDB health check")
         return {
@@ -130,6 +339,31 @@ def check_dynamodb_health() -> Dict[str, Any]:
             "message": str(exc),
         }
 
+    for table in tables:
+        values = metrics[table["table"]]
+        table.update({
+            "read_throttles": int(sum(values.get("ReadThrottleEvents", []))),
+            "write_throttles": int(sum(values.get("WriteThrottleEvents", []))),
+            "consumed_rcu": round(sum(values.get("ConsumedReadCapacityUnits", [])), 2),
+            "consumed_wcu": round(sum(values.get("ConsumedWriteCapacityUnits", [])), 2),
+            # Worst per-operation average, so one slow access pattern is not hidden by fast ones.
+            "latency_ms": round(max(values.get("SuccessfulRequestLatency", []), default=0), 2),
+        })
+        throttles = table["read_throttles"] + table["write_throttles"]
+        if throttles > HEALTH_THROTTLE_THRESHOLD:
+            table["problems"].append(f"{throttles} throttled requests")
+        if table["latency_ms"] > HEALTH_LATENCY_THRESHOLD_MS:
+            table["problems"].append(f"latency {table['latency_ms']} ms")
+
+    unhealthy = [table for table in tables if table["problems"]]
+    return {
+        "check": "dynamodb_health",
+        "status": "FAIL" if unhealthy else "PASS",
+        "tables": tables,
+        "message": "; ".join(f"{table['table']}: {', '.join(table['problems'])}" for table in unhealthy)
+        or f"{len(tables)} tables ACTIVE, ~{sum(table.get('item_count', 0) for table in tables)} items",
+    }
+
 
 def store_quality_results(results: Dict[str, Any]) -> None:
     now = datetime.now(timezone.utc)
@@ -142,7 +376,7 @@ def store_quality_results(results: Dict[str, Any]) -> None:
     s3.put_object(
         Bucket=S3_BUCKET,
         Key=key,
-        Body=json.dumps(results, default=str),
+        Body=dumps(results, default=str),
         ContentType="application/json",
     )
 
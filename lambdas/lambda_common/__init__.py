@@ -0,0 +1 @@
+"""Shared helpers bundled into the Lambda container images."""
@@ -0,0 +1,195 @@
+"""Windowed alert digests for the webhook processors.
+
+Sending one SNS message per failed charge or dispute floods inboxes during a payment
+provider incident and keeps a synchronous SNS call in the webhook path. Instead,
+``publish_alert`` makes one UpdateItem against ``alert-digests``, keyed by alert type and
+window start. The update bumps the window's count and a per-group counter (failure code,
+cancellation reason, ...), and fills one of ``ALERT_DIGEST_EXAMPLES`` example slots.
+The ``alert-digest`` Lambda runs on a schedule and calls ``flush_digests``. That claims
+each closed window once and publishes a single digest. A window with exactly one alert
+is sent as the original message.
+
+Digests are opt-in: ``ALERT_DIGEST_WINDOW_SECONDS`` defaults to 0, which publishes every
+alert immediately as before. Set a window only where the ``alert-digest`` stack is deployed,
+otherwise buffered alerts are never sent.
+"""
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from lambda_common.clients import is_conditional_check_failure, lazy_client, lazy_resource
+from lambda_common.metrics import put_metric, stage
+
+logger = logging.getLogger()
+
+sns = lazy_client("sns")
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+ALERT_TOPIC_ARN = os.environ.get("ALERT_TOPIC_ARN")
+ALERT_DIGEST_TABLE = os.environ.get("ALERT_DIGEST_TABLE", f"{BRAND}-alert-digests")
+ALERT_DIGEST_WINDOW_SECONDS = int(os.getenv("ALERT_DIGEST_WINDOW_SECONDS", "0"))
+# Windows are flushed this long after they close, so enqueues from skewed clocks still land.
+ALERT_DIGEST_GRACE_SECONDS = int(os.getenv("ALERT_DIGEST_GRACE_SECONDS", "30"))
+ALERT_DIGEST_EXAMPLES = int(os.getenv("ALERT_DIGEST_EXAMPLES", "5"))
+ALERT_DIGEST_RETENTION_DAYS = 2
+
+MAX_EXAMPLE_CHARS = 1000
+SNS_SUBJECT_LIMIT = 100
+
+# alert type -> (digest title, what the per-group counts are keyed by)
+ALERT_TYPES: Dict[str, Tuple[str, str]] = {
+    "recharge_subscription_cancelled": ("Subscription Cancelled", "cancellation reason"),
+    "recharge_charge_failed": ("Recharge Payment Failure", "error type"),
+    "stripe_high_value_failure": ("High-Value Payment Failure", "failure code"),
+    "stripe_dispute": ("Stripe Dispute", "reason"),
+}
+
+GROUP_PREFIX = "group#"
+EXAMPLE_PREFIX = "example_"
+
+
+def _iso(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def window_start(moment: datetime, window_seconds: Optional[int] = None) -> datetime:
+    window_seconds = window_seconds or ALERT_DIGEST_WINDOW_SECONDS
+    epoch = int(moment.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % window_seconds, tz=timezone.utc)
+
+
+def publish_alert(
+    alert_type: str,
+    subject: str,
+    message: str,
+    group: Optional[str] = None,
+    example_id: Optional[str] = None,
+    topic_arn: Optional[str] = None,
+) -> None:
+    """Buffer the alert into its digest window, or publish it now when digests are off."""
+    topic_arn = topic_arn or ALERT_TOPIC_ARN
+    if not topic_arn:
+        return
+    if ALERT_DIGEST_WINDOW_SECONDS <= 0:
+        with stage("sns_publish"):
+            sns.publish(TopicArn=topic_arn, Subject=subject[:SNS_SUBJECT_LIMIT], Message=message)
+        return
+    enqueue_alert(alert_type, subject, message, group, example_id)
+
+
+def enqueue_alert(
+    alert_type: str,
+    subject: str,
+    message: str,
+    group: Optional[str] = None,
+    example_id: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> None:
+    now = now or datetime.now(timezone.utc)
+    start = window_start(now)
+    slot = zlib.crc32((example_id or message).encode("utf-8")) % max(ALERT_DIGEST_EXAMPLES, 1)
+    names = {"#slot": f"{EXAMPLE_PREFIX}{slot}", "#count": "alert_count", "#ttl": "ttl"}
+    values: Dict[str, Any] = {
+        ":one": 1,
+        ":example": {"subject": subject, "message": message[:MAX_EXAMPLE_CHARS], "at": _iso(now)},
+        ":ttl": int((start + timedelta(days=ALERT_DIGEST_RETENTION_DAYS)).timestamp()),
+    }
+    add = "ADD #count :one"
+    if group:
+        names["#group"] = f"{GROUP_PREFIX}{group}"
+        add += ", #group :one"
+
+    with stage("alert_enqueue"):
+        dynamodb.Table(ALERT_DIGEST_TABLE).update_item(
+            Key={"alert_type": alert_type, "window_start": _iso(start)},
+            UpdateExpression=f"SET #slot = if_not_exists(#slot, :example), #ttl = if_not_exists(#ttl, :ttl) {add}",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+    put_metric("alerts_enqueued", 1)
+
+
+def format_digest(alert_type: str, item: Dict[str, Any]) -> Dict[str, str]:
+    """Return ``{"Subject", "Message"}`` for a claimed window item."""
+    title, group_label = ALERT_TYPES.get(alert_type, (alert_type, "group"))
+    count = int(item.get("alert_count", 0))
+    examples: List[Dict[str, Any]] = sorted(
+        (value for key, value in item.items() if key.startswith(EXAMPLE_PREFIX)), key=lambda example: example.get("at", "")
+    )
+    if count == 1 and examples:
+        return {"Subject": examples[0]["subject"][:SNS_SUBJECT_LIMIT], "Message": examples[0]["message"]}
+
+    start = datetime.fromisoformat(item["window_start"].replace("Z", "+00:00"))
+    end = start + timedelta(seconds=ALERT_DIGEST_WINDOW_SECONDS)
+    groups = sorted(
+        ((key[len(GROUP_PREFIX):], int(value)) for key, value in item.items() if key.startswith(GROUP_PREFIX)),
+        key=lambda pair: -pair[1],
+    )
+    lines = [f"{count} {title} alerts between {_iso(start)} and {_iso(end)}."]
+    if groups:
+        lines += ["", f"By {group_label}:"] + [f"  {name}: {value}" for name, value in groups]
+    if examples:
+        lines += ["", f"Examples ({len(examples)} of {count}):"]
+        for example in examples:
+            lines += ["----", example["message"].rstrip()]
+    subject = f"{title} digest: {count} in {ALERT_DIGEST_WINDOW_SECONDS // 60 or 1} min"
+    return {"Subject": subject[:SNS_SUBJECT_LIMIT], "Message": "\n".join(lines)}
+
+
+def flush_digests(now: Optional[datetime] = None, topic_arn: Optional[str] = None) -> int:
+    """Publish one digest per closed, unflushed window; return the number published."""
+    topic_arn = topic_arn or ALERT_TOPIC_ARN
+    if not topic_arn or ALERT_DIGEST_WINDOW_SECONDS <= 0:
+        return 0
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=ALERT_DIGEST_WINDOW_SECONDS + ALERT_DIGEST_GRACE_SECONDS)
+    table = dynamodb.Table(ALERT_DIGEST_TABLE)
+
+    published = 0
+    for alert_type in ALERT_TYPES:
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": "alert_type = :type AND window_start <= :cutoff",
+            "FilterExpression": "attribute_not_exists(flushed_at)",
+            "ExpressionAttributeValues": {":type": alert_type, ":cutoff": _iso(cutoff)},
+            "ProjectionExpression": "alert_type, window_start",
+        }
+        while True:
+            with stage("dynamodb_query"):
+                response = table.query(**kwargs)
+            for window in response.get("Items", []):
+                if _flush_window(table, window, now, topic_arn):
+                    published += 1
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    put_metric("alert_digests_published", published)
+    return published
+
+
+def _flush_window(table: Any, window: Dict[str, Any], now: datetime, topic_arn: str) -> bool:
+    key = {"alert_type": window["alert_type"], "window_start": window["window_start"]}
+    try:
+        # Claim first so overlapping flushes cannot send the same digest twice.
+        item = table.update_item(
+            Key=key,
+            UpdateExpression="SET flushed_at = :now",
+            ConditionExpression="attribute_not_exists(flushed_at)",
+            ExpressionAttributeValues={":now": _iso(now)},
+            ReturnValues="ALL_NEW",
+        )["Attributes"]
+    except Exception as exc:
+        if is_conditional_check_failure(exc):
+            return False
+        raise
+
+    try:
+        with stage("sns_publish"):
+            sns.publish(TopicArn=topic_arn, **format_digest(window["alert_type"], item))
+    except Exception:
+        table.update_item(Key=key, UpdateExpression="REMOVE flushed_at")
+        raise
+    return True
@@ -0,0 +1,85 @@
+"""Lazily constructed boto3 clients shared across Lambda modules.
+
+Creating clients at import time costs cold-start latency even on invocations that
+never touch the service. ``lazy_client``/``lazy_resource`` return module-level
+stand-ins that only import boto3 and build the real client on first attribute access.
+"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+_LOCK = threading.Lock()
+_SESSION: Any = None
+_CACHE: Dict[Tuple[str, str], Any] = {}
+
+
+def _session() -> Any:
+    global _SESSION
+    if _SESSION is None:
+        import boto3
+
+        _SESSION = boto3.session.Session()
+    return _SESSION
+
+
+def _get(kind: str, service: str) -> Any:
+    key = (kind, service)
+    instance = _CACHE.get(key)
+    if instance is not None:
+        return instance
+
+    # boto3 sessions are not safe to share while creating clients, so creation is serialized.
+    with _LOCK:
+        instance = _CACHE.get(key)
+        if instance is None:
+            session = _session()
+            instance = session.client(service) if kind == "client" else session.resource(service)
+            _CACHE[key] = instance
+    return instance
+
+
+def get_client(service: str) -> Any:
+    return _get("client", service)
+
+
+def get_resource(service: str) -> Any:
+    return _get("resource", service)
+
+
+def error_code(exc: BaseException) -> Optional[str]:
+    """The AWS error code of a botocore ``ClientError`` (read without importing botocore), else ``None``."""
+    return getattr(exc, "response", {}).get("Error", {}).get("Code")
+
+
+def is_conditional_check_failure(exc: BaseException) -> bool:
+    """True for a DynamoDB ``ConditionalCheckFailedException`` (checked without importing botocore)."""
+    return error_code(exc) == "ConditionalCheckFailedException"
+
+
+def reset_clients() -> None:
+    """Drop cached clients (used by tests and local benchmarks that swap endpoints)."""
+    global _SESSION
+    with _LOCK:
+        _CACHE.clear()
+        _SESSION = None
+
+
+class LazyClient:
+    """Proxy that resolves to a shared boto3 client or resource on first use."""
+
+    def __init__(self, service: str, kind: str = "client") -> None:
+        self._service = service
+        self._kind = kind
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(_get(self._kind, self._service), name)
+
+    def __repr__(self) -> str:
+        return f"LazyClient({self._service!r}, kind={self._kind!r})"
+
+
+def lazy_client(service: str) -> LazyClient:
+    return LazyClient(service, "client")
+
+
+def lazy_resource(service: str) -> LazyClient:
+    return LazyClient(service, "resource")
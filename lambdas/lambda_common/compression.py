@@ -0,0 +1,56 @@
+"""Optional compression for raw webhook archive bodies.
+
+``RAW_ARCHIVE_COMPRESSION`` selects ``none`` (default), ``gzip`` or ``zstd``. Compressed
+objects get a ``.gz``/``.zst`` key suffix, so Spark/Glue and Athena pick the codec from
+the extension, and a matching ``ContentEncoding``. Glue has no native zstd codec by
+default, so archives that Glue reads (the Shopify ones) are limited to gzip.
+``decompress_body`` recognises the codec from the body's magic bytes, so readers handle
+old and new objects alike.
+"""
+import gzip
+import os
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+RAW_ARCHIVE_COMPRESSION = os.getenv("RAW_ARCHIVE_COMPRESSION", "none").lower()
+GZIP_LEVEL = int(os.getenv("RAW_ARCHIVE_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("RAW_ARCHIVE_ZSTD_LEVEL", "3"))
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# zstandard compressor/decompressor objects must not be shared between threads.
+_LOCAL = threading.local()
+
+
+def _zstd():
+    import zstandard
+
+    if not hasattr(_LOCAL, "compressor"):
+        _LOCAL.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        _LOCAL.decompressor = zstandard.ZstdDecompressor()
+    return _LOCAL.compressor, _LOCAL.decompressor
+
+
+def compress_body(body: Union[str, bytes], codec: Optional[str] = None) -> Tuple[bytes, Dict[str, str], str]:
+    """Return ``(data, extra put_object kwargs, key suffix)`` for a JSON body."""
+    codec = RAW_ARCHIVE_COMPRESSION if codec is None else codec
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    if codec in ("", "none"):
+        return data, {}, ""
+    if codec == "gzip":
+        # mtime=0 keeps the output deterministic for identical bodies.
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0), {"ContentEncoding": "gzip"}, ".gz"
+    if codec == "zstd":
+        return _zstd()[0].compress(data), {"ContentEncoding": "zstd"}, ".zst"
+    raise ValueError(f"Unsupported RAW_ARCHIVE_COMPRESSION: {codec!r}")
+
+
+def decompress_body(data: bytes) -> bytes:
+    """Inverse of ``compress_body`` for any codec, including uncompressed bodies."""
+    if data[:2] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == ZSTD_MAGIC:
+        # Frames written by ZstdCompressor.compress carry the content size.
+        return _zstd()[1].decompress(data)
+    return data
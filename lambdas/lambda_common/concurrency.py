@@ -0,0 +1,51 @@
+"""Issue independent I/O calls (S3 archive, DynamoDB upsert, ...) concurrently.
+
+boto3 clients are thread-safe and release the GIL while waiting on the network, so a
+small per-container thread pool lets a handler pay for the slowest write instead of
+the sum of all writes.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Optional
+
+IO_WORKERS = int(os.getenv("IO_WORKERS", "4"))
+
+_LOCK = threading.Lock()
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+    return _EXECUTOR
+
+
+def run_concurrently(*calls: Callable[[], Any]) -> List[Any]:
+    """Run ``calls`` in parallel and return their results in order.
+
+    The first call runs on the invoking thread. Every call is allowed to finish before
+    the first failure (in argument order) is re-raised, so no write is left in flight
+    when the handler returns.
+    """
+    if len(calls) <= 1:
+        return [call() for call in calls]
+
+    futures = [_executor().submit(call) for call in calls[1:]]
+
+    first_error: Optional[BaseException] = None
+    first_result: Any = None
+    try:
+        first_result = calls[0]()
+    except Exception as exc:  # noqa: BLE001 - re-raised below once the other calls settle
+        first_error = exc
+
+    wait(futures)
+
+    if first_error is not None:
+        raise first_error
+
+    return [first_result] + [future.result() for future in futures]
@@ -0,0 +1,213 @@
+"""Customer 360: one item per customer with running aggregates from every event stream.
+
+The Shopify, Recharge and Stripe processors call the ``record_*`` functions next to
+their own writes. Each call is a single UpdateItem, so every change is atomic, and
+each is guarded so redelivered events do not double count. An order adds to
+``order_count``/``lifetime_value`` once per order id. Subscriptions and disputes live
+in string sets keyed by id, and ``last_failed_charge`` only moves forward in time.
+Support and marketing tools read a customer's status with one GetItem.
+
+Items are keyed by Shopify customer id. Recharge (``shopify_customer_id``) and Stripe
+(``metadata.customer_id``) usually carry it. Events without one fall back to a
+source-scoped key such as ``recharge#123`` or ``stripe#cus_...``.
+"""
+import logging
+import os
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from lambda_common.clients import is_conditional_check_failure, lazy_resource
+from lambda_common.metrics import put_metric, stage
+
+logger = logging.getLogger()
+
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+CUSTOMER_360_TABLE = os.environ.get("CUSTOMER_360_TABLE", f"{BRAND}-customer-360")
+CUSTOMER_360_ENABLED = os.getenv("CUSTOMER_360_ENABLED", "true").lower() == "true"
+
+ACTIVE_SUBSCRIPTION_STATUSES = {"active"}
+OPEN_DISPUTE_STATUSES = {"warning_needs_response", "warning_under_review", "needs_response", "under_review"}
+
+
+def customer_key(
+    shopify_customer_id: Any = None, source: Optional[str] = None, source_customer_id: Any = None
+) -> Optional[str]:
+    if shopify_customer_id:
+        return str(shopify_customer_id)
+    if source and source_customer_id:
+        return f"{source}#{source_customer_id}"
+    return None
+
+
+def _update(
+    key: Optional[str],
+    sets: Optional[Dict[str, Any]] = None,
+    adds: Optional[Dict[str, Any]] = None,
+    deletes: Optional[Dict[str, Any]] = None,
+    condition: Optional[str] = None,
+    condition_values: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Apply one atomic UpdateItem; return False if disabled or the guard rejected it.
+
+    Attribute names and values use ``#field``/``:field`` placeholders, which ``condition``
+    may reference along with its own ``condition_values``.
+    """
+    if not CUSTOMER_360_ENABLED or not key:
+        return False
+
+    names: Dict[str, str] = {"#first_seen_at": "first_seen_at"}
+    values: Dict[str, Any] = dict(condition_values or {})
+
+    def clause(fields: Optional[Dict[str, Any]], template: str) -> str:
+        parts = []
+        for field, value in (fields or {}).items():
+            names[f"#{field}"] = field
+            values[f":{field}"] = value
+            parts.append(template.format(name=f"#{field}", value=f":{field}"))
+        return ", ".join(parts)
+
+    now = datetime.now(timezone.utc).isoformat()
+    expression = "SET " + clause({**(sets or {}), "_updated_at": now}, "{name} = {value}")
+    expression += ", #first_seen_at = if_not_exists(#first_seen_at, :_updated_at)"
+    if adds:
+        expression += " ADD " + clause(adds, "{name} {value}")
+    if deletes:
+        expression += " DELETE " + clause(deletes, "{name} {value}")
+
+    kwargs: Dict[str, Any] = {
+        "Key": {"customer_key": key},
+        "UpdateExpression": expression,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+    if condition:
+        kwargs["ConditionExpression"] = condition
+        # Conditions may name attributes that are not being written.
+        for token in condition.replace("(", " ").replace(")", " ").replace(",", " ").replace(".", " ").split():
+            if token.startswith("#"):
+                names.setdefault(token, token[1:])
+
+    try:
+        with stage("dynamodb_customer360"):
+            dynamodb.Table(CUSTOMER_360_TABLE).update_item(**kwargs)
+    except Exception as exc:
+        if is_conditional_check_failure(exc):
+            put_metric("customer360_duplicates", 1)
+            return False
+        raise
+    return True
+
+
+def _profile(**fields: Any) -> Dict[str, Any]:
+    return {field: value for field, value in fields.items() if value not in (None, "")}
+
+
+def record_order(enriched_order: Dict[str, Any]) -> None:
+    """Count a Shopify order towards the customer's totals once; reverse it once if cancelled."""
+    key = customer_key(enriched_order.get("customer_id"))
+    order_id = enriched_order.get("order_id")
+    if not key or not order_id or enriched_order.get("test"):
+        return
+
+    total = Decimal(str(enriched_order.get("total_price") or 0))
+    order_ids = {order_id}
+    _update(
+        key,
+        sets=_profile(
+            email=enriched_order.get("customer_email"),
+            last_order_id=order_id,
+            last_order_at=enriched_order.get("created_at"),
+        ),
+        adds={"order_count": 1, "lifetime_value": total, "counted_orders": order_ids},
+        condition="NOT contains(#counted_orders, :order_id)",
+        condition_values={":order_id": order_id},
+    )
+    if enriched_order.get("cancelled_at"):
+        _update(
+            key,
+            adds={"cancelled_order_count": 1, "lifetime_value": -total, "cancelled_orders": order_ids},
+            condition="contains(#counted_orders, :order_id) AND NOT contains(#cancelled_orders, :order_id)",
+            condition_values={":order_id": order_id},
+        )
+
+
+def record_customer(customer_data: Dict[str, Any]) -> None:
+    """Copy the Shopify profile fields support tools show next to the aggregates."""
+    _update(
+        customer_key(customer_data.get("id")),
+        sets=_profile(
+            email=customer_data.get("email"),
+            first_name=customer_data.get("first_name"),
+            last_name=customer_data.get("last_name"),
+            phone=customer_data.get("phone"),
+            customer_created_at=customer_data.get("created_at"),
+        ),
+    )
+
+
+def forget_customer(shopify_customer_id: Any) -> None:
+    key = customer_key(shopify_customer_id)
+    if not CUSTOMER_360_ENABLED or not key:
+        return
+    with stage("dynamodb_customer360"):
+        dynamodb.Table(CUSTOMER_360_TABLE).delete_item(Key={"customer_key": key})
+
+
+def record_subscription(subscription: Dict[str, Any]) -> None:
+    """Keep ``active_subscriptions`` in line with a Recharge subscription's status."""
+    subscription_id = subscription.get("id")
+    if not subscription_id:
+        return
+    key = customer_key(subscription.get("shopify_customer_id"), "recharge", subscription.get("customer_id"))
+    members = {str(subscription_id)}
+    active = str(subscription.get("status") or "").lower() in ACTIVE_SUBSCRIPTION_STATUSES
+    _update(
+        key,
+        sets=_profile(recharge_customer_id=str(subscription.get("customer_id") or "")),
+        adds={"active_subscriptions": members} if active else None,
+        deletes=None if active else {"active_subscriptions": members},
+    )
+
+
+def record_failed_charge(
+    key: Optional[str],
+    source: str,
+    charge_id: Any,
+    failed_at: Optional[str],
+    amount: Any = None,
+    failure_code: Optional[str] = None,
+    failure_message: Optional[str] = None,
+) -> None:
+    """Replace ``last_failed_charge`` unless a later failure is already recorded."""
+    failed_at = failed_at or datetime.now(timezone.utc).isoformat()
+    charge = _profile(
+        source=source,
+        charge_id=str(charge_id) if charge_id else None,
+        failed_at=failed_at,
+        amount=Decimal(str(amount)) if amount is not None else None,
+        failure_code=failure_code,
+        failure_message=failure_message,
+    )
+    _update(
+        key,
+        sets={"last_failed_charge": charge},
+        condition="attribute_not_exists(#last_failed_charge) OR #last_failed_charge.#failed_at < :failed_at",
+        condition_values={":failed_at": failed_at},
+    )
+
+
+def record_dispute(key: Optional[str], dispute: Dict[str, Any]) -> None:
+    """Track a Stripe dispute in ``open_disputes`` until it is won, lost or closed."""
+    dispute_id = dispute.get("id")
+    if not dispute_id:
+        return
+    members = {str(dispute_id)}
+    is_open = dispute.get("status") in OPEN_DISPUTE_STATUSES
+    _update(
+        key,
+        adds={"open_disputes": members} if is_open else None,
+        deletes=None if is_open else {"open_disputes": members},
+    )
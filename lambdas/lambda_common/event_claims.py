@@ -0,0 +1,85 @@
+"""Leased claims for deduplicating redelivered webhook events.
+
+A processor calls ``claim`` before any side effect and ``complete`` once every write
+has succeeded. A claim is a lease: the item holds ``status=processing`` and a
+``lease_until`` a little beyond the function timeout. If the invocation dies without
+raising (timeout, out of memory, a lost sandbox), the lease expires and the provider's
+next retry takes the event over. It is never acknowledged as a duplicate of work that
+did not finish. A delivery that finds a live lease gets ``IN_PROGRESS`` and should
+answer with a retryable status. ``release`` drops the claim at once when the handler
+fails with an exception.
+
+Claim items written before leases existed have no ``status`` and count as done.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from lambda_common.clients import is_conditional_check_failure, lazy_resource
+from lambda_common.metrics import stage
+
+dynamodb = lazy_resource("dynamodb")
+
+CLAIMED = "claimed"
+DUPLICATE = "duplicate"
+IN_PROGRESS = "in_progress"
+
+PROCESSING = "processing"
+DONE = "done"
+
+
+def claim(
+    table_name: str,
+    event_id: str,
+    lease_seconds: int,
+    ttl_days: int,
+    now: Optional[datetime] = None,
+    **attributes: Any,
+) -> str:
+    """Take the lease on ``event_id``; ``CLAIMED``, ``DUPLICATE`` (finished) or ``IN_PROGRESS``."""
+    now = now or datetime.now(timezone.utc)
+    names = {"#status": "status", "#ttl": "ttl"}
+    values = {
+        ":processing": PROCESSING,
+        ":now": int(now.timestamp()),
+        ":lease_until": int((now + timedelta(seconds=lease_seconds)).timestamp()),
+        ":ttl": int((now + timedelta(days=ttl_days)).timestamp()),
+    }
+    sets = ["#status = :processing", "lease_until = :lease_until", "#ttl = :ttl"]
+    for index, (field, value) in enumerate(attributes.items()):
+        names[f"#a{index}"] = field
+        values[f":a{index}"] = value
+        sets.append(f"#a{index} = :a{index}")
+
+    table = dynamodb.Table(table_name)
+    try:
+        with stage("dynamodb_claim"):
+            table.update_item(
+                Key={"event_id": event_id},
+                UpdateExpression="SET " + ", ".join(sets),
+                ConditionExpression="attribute_not_exists(event_id) OR (#status = :processing AND lease_until < :now)",
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+            )
+    except Exception as exc:
+        if not is_conditional_check_failure(exc):
+            raise
+        with stage("dynamodb_get"):
+            existing = table.get_item(Key={"event_id": event_id}, ConsistentRead=True).get("Item") or {}
+        return IN_PROGRESS if existing.get("status") == PROCESSING else DUPLICATE
+    return CLAIMED
+
+
+def complete(table_name: str, event_id: str) -> None:
+    """Mark the event finished; later deliveries are duplicates until the item expires."""
+    with stage("dynamodb_complete"):
+        dynamodb.Table(table_name).update_item(
+            Key={"event_id": event_id},
+            UpdateExpression="SET #status = :done REMOVE lease_until",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={":done": DONE},
+        )
+
+
+def release(table_name: str, event_id: str) -> None:
+    with stage("dynamodb_release"):
+        dynamodb.Table(table_name).delete_item(Key={"event_id": event_id})
@@ -0,0 +1,138 @@
+"""CloudWatch Embedded Metric Format (EMF) instrumentation for Lambda hot paths.
+
+Handlers decorated with ``instrumented`` collect per-stage timings and byte counts
+during an invocation and print a single EMF JSON document to stdout when it ends.
+CloudWatch Logs turns that document into metrics (dimensioned by function and topic)
+without any ``PutMetricData`` calls on the request path.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
+
+from lambda_common.serialization import dumps
+
+METRICS_ENABLED = os.getenv("EMF_METRICS_ENABLED", "true").lower() == "true"
+NAMESPACE = os.getenv("METRICS_NAMESPACE") or f"{os.getenv('BRAND', 'data-platform')}/Ingestion"
+
+# EMF allows at most 100 values per metric in one document.
+MAX_VALUES_PER_METRIC = 100
+
+
+class MetricsRecorder:
+    """Collects metric samples for one invocation; safe to use from worker threads."""
+
+    def __init__(self, function_name: str, topic: Optional[str] = None) -> None:
+        self.function_name = function_name
+        self.topic = topic
+        self._values: Dict[str, List[float]] = {}
+        self._units: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def put(self, name: str, value: float, unit: str = "Count") -> None:
+        with self._lock:
+            values = self._values.setdefault(name, [])
+            if len(values) < MAX_VALUES_PER_METRIC:
+                values.append(value)
+            self._units[name] = unit
+
+    def to_emf(self) -> Dict[str, Any]:
+        with self._lock:
+            values = {name: list(samples) for name, samples in self._values.items()}
+            units = dict(self._units)
+
+        document: Dict[str, Any] = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": NAMESPACE,
+                        "Dimensions": [["Function", "Topic"], ["Function"]],
+                        "Metrics": [{"Name": name, "Unit": units[name]} for name in values],
+                    }
+                ],
+            },
+            "Function": self.function_name,
+            "Topic": self.topic or "unknown",
+        }
+        for name, samples in values.items():
+            document[name] = samples[0] if len(samples) == 1 else samples
+        return document
+
+    def flush(self, stream: Optional[TextIO] = None) -> Optional[Dict[str, Any]]:
+        if not self._values:
+            return None
+        document = self.to_emf()
+        out = stream or sys.stdout
+        out.write(dumps(document, default=str) + "\n")
+        out.flush()
+        with self._lock:
+            self._values.clear()
+            self._units.clear()
+        return document
+
+
+# Lambda runs one invocation per execution environment at a time, so a module-level
+# recorder is visible to the handler thread and to the I/O pool threads it fans out to.
+_CURRENT: Optional[MetricsRecorder] = None
+
+
+def current() -> Optional[MetricsRecorder]:
+    return _CURRENT
+
+
+def set_topic(topic: Optional[str]) -> None:
+    if _CURRENT is not None and topic:
+        _CURRENT.topic = topic
+
+
+def put_metric(name: str, value: float, unit: str = "Count") -> None:
+    if _CURRENT is not None:
+        _CURRENT.put(name, value, unit)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block and record it as ``<name>_ms``; a no-op outside an instrumented handler."""
+    if _CURRENT is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _CURRENT.put(f"{name}_ms", (time.perf_counter() - started) * 1000, "Milliseconds")
+
+
+def instrumented(function_name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorate a Lambda handler so each invocation emits one EMF document.
+
+    Nested instrumented handlers (e.g. the router calling an entity handler) share the
+    outer invocation's recorder.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        name = function_name or func.__module__
+
+        @functools.wraps(func)
+        def wrapper(event: Any, context: Any) -> Any:
+            global _CURRENT
+            if not METRICS_ENABLED or _CURRENT is not None:
+                return func(event, context)
+
+            _CURRENT = recorder = MetricsRecorder(os.getenv("AWS_LAMBDA_FUNCTION_NAME", name))
+            started = time.perf_counter()
+            try:
+                return func(event, context)
+            finally:
+                recorder.put("handler_ms", (time.perf_counter() - started) * 1000, "Milliseconds")
+                _CURRENT = None
+                recorder.flush()
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,84 @@
+"""Per-entity, per-hour counts of archived raw events.
+
+The data-quality checks used to count events by listing S3. That meant one or more LIST
+calls per hour checked, and each check got slower as the window grew. Every raw-event
+writer now calls ``count_raw_event`` after the archive PUT succeeds. It makes one
+UpdateItem that ``ADD``s 1 to ``event_count`` on a ``partition-counts`` item.
+``entity`` names the archive stream (``shopify/orders``, ``recharge/charges``,
+``stripe/disputes``, ...). The sort key is ``YYYY-MM-DDTHH#NN``: the UTC partition hour
+the object was written under (see ``lambda_common.raw_keys``) plus a random shard out of
+``PARTITION_COUNT_SHARDS``. One item per hour would take every increment for the current
+hour and cap a stream at roughly 1,000 writes/s. ``hourly_counts`` reads a week of hours
+for one entity with a single Query and sums the shards of each hour.
+
+The counter is bookkeeping, not ingestion. If the increment fails, it is logged and
+counted in the ``partition_count_errors`` metric, and the event is still acknowledged.
+"""
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from lambda_common.clients import lazy_resource
+from lambda_common.metrics import put_metric, stage
+from lambda_common.raw_keys import as_utc
+
+logger = logging.getLogger()
+
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+PARTITION_COUNTS_TABLE = os.environ.get("PARTITION_COUNTS_TABLE", f"{BRAND}-partition-counts")
+PARTITION_COUNTS_ENABLED = os.getenv("PARTITION_COUNTS_ENABLED", "true").lower() == "true"
+PARTITION_COUNTS_TTL_DAYS = int(os.getenv("PARTITION_COUNTS_TTL_DAYS", "90"))
+PARTITION_COUNT_SHARDS = max(1, int(os.getenv("PARTITION_COUNT_SHARDS", "10")))
+
+
+def hour_key(moment: datetime) -> str:
+    return as_utc(moment).strftime("%Y-%m-%dT%H")
+
+
+def entity_for(raw_prefix: str) -> str:
+    """``raw/shopify/orders/events/`` -> ``shopify/orders``."""
+    parts = [part for part in raw_prefix.split("/") if part]
+    return "/".join(parts[1:3])
+
+
+def count_raw_event(entity: str, event_dt: datetime) -> None:
+    if not PARTITION_COUNTS_ENABLED:
+        return
+    ttl = int((event_dt + timedelta(days=PARTITION_COUNTS_TTL_DAYS)).timestamp())
+    try:
+        with stage("dynamodb_count"):
+            dynamodb.Table(PARTITION_COUNTS_TABLE).update_item(
+                Key={"entity": entity, "hour": f"{hour_key(event_dt)}#{random.randrange(PARTITION_COUNT_SHARDS):02d}"},
+                UpdateExpression="ADD event_count :one SET #ttl = if_not_exists(#ttl, :ttl)",
+                ExpressionAttributeNames={"#ttl": "ttl"},
+                ExpressionAttributeValues={":one": 1, ":ttl": ttl},
+            )
+    except Exception:  # noqa: BLE001 - counters must never fail ingestion
+        logger.warning("Failed to count raw %s event", entity, exc_info=True)
+        put_metric("partition_count_errors", 1)
+
+
+def hourly_counts(entity: str, since: datetime, until: datetime) -> Dict[str, int]:
+    """``{"YYYY-MM-DDTHH": count}`` for hours in ``[since, until]`` that saw events, from one Query."""
+    table = dynamodb.Table(PARTITION_COUNTS_TABLE)
+    kwargs: Dict[str, Any] = {
+        # "~" sorts after "#NN", so the upper bound takes in every shard of ``until``'s hour.
+        "KeyConditionExpression": "entity = :entity AND #hour BETWEEN :since AND :until",
+        "ExpressionAttributeNames": {"#hour": "hour"},
+        "ExpressionAttributeValues": {":entity": entity, ":since": hour_key(since), ":until": f"{hour_key(until)}~"},
+        "ProjectionExpression": "#hour, event_count",
+    }
+    counts: Dict[str, int] = {}
+    while True:
+        with stage("dynamodb_query"):
+            response = table.query(**kwargs)
+        for item in response.get("Items", []):
+            hour = item["hour"].split("#", 1)[0]
+            counts[hour] = counts.get(hour, 0) + int(item.get("event_count", 0))
+        if "LastEvaluatedKey" not in response:
+            return counts
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
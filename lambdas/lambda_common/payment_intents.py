@@ -0,0 +1,168 @@
+"""Stripe payment intents with their charge attempts, for failed-payment analytics.
+
+A charge names its ``payment_intent`` and ``invoice``, but charges and invoices land
+in separate tables. Retry analytics therefore meant scanning both and joining them by
+hand. The Stripe processor now keeps one ``payment-intents`` item per intent.
+``record_charge_attempt`` appends each finished charge (succeeded or failed) to
+``attempts`` with ``list_append``. It is guarded by the ``attempt_charge_ids`` set, so a
+charge is appended once however often Stripe redelivers it. ``record_payment_intent``
+sets the intent's own status and only moves forward by event ``created``.
+
+"All attempts for this intent" is then one GetItem (``attempts_for``). Failed charges
+also carry ``failed_day`` in ``payment-attempts``, a sparse index key, so "failure code
+distribution today" is one small Query (``failure_code_distribution``).
+"""
+import os
+from collections import Counter
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from lambda_common.clients import is_conditional_check_failure, lazy_resource
+from lambda_common.metrics import put_metric, stage
+
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+PAYMENT_INTENTS_TABLE = os.environ.get("PAYMENT_INTENTS_TABLE", f"{BRAND}-payment-intents")
+PAYMENT_ATTEMPTS_TABLE = os.environ.get("PAYMENT_ATTEMPTS_TABLE", f"{BRAND}-payment-attempts")
+FAILED_DAY_INDEX = "failed-day-index"
+
+FINAL_CHARGE_EVENTS = {"charge.succeeded", "charge.failed"}
+
+
+def failed_day(created: int) -> str:
+    return datetime.fromtimestamp(created, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def record_charge_attempt(charge: Dict[str, Any], event_type: str) -> bool:
+    """Append a finished charge to its payment intent; False if there is none or it is already there."""
+    intent_id = charge.get("payment_intent")
+    if not intent_id or event_type not in FINAL_CHARGE_EVENTS:
+        return False
+
+    failed = event_type == "charge.failed"
+    attempt = {
+        "charge_id": charge["id"],
+        "status": charge.get("status"),
+        "amount": Decimal(charge.get("amount") or 0) / 100,
+        "failure_code": charge.get("failure_code"),
+        "failure_message": charge.get("failure_message"),
+        "created": datetime.fromtimestamp(charge["created"], tz=timezone.utc).isoformat(),
+    }
+    attempt = {key: value for key, value in attempt.items() if value is not None}
+
+    sets = [
+        "attempts = list_append(if_not_exists(attempts, :empty), :attempt)",
+        "last_attempt_at = :created",
+        "#updated_at = :now",
+    ]
+    values: Dict[str, Any] = {
+        ":empty": [],
+        ":attempt": [attempt],
+        ":created": attempt["created"],
+        ":now": datetime.now(timezone.utc).isoformat(),
+        ":charge_id": charge["id"],
+        ":charge_ids": {charge["id"]},
+        ":one": 1,
+        ":failed": 1 if failed else 0,
+    }
+    for field, source in (("customer_id", "customer"), ("invoice_id", "invoice")):
+        if charge.get(source):
+            sets.append(f"{field} = if_not_exists({field}, :{field})")
+            values[f":{field}"] = charge[source]
+    if failed and charge.get("failure_code"):
+        sets.append("last_failure_code = :failure_code")
+        values[":failure_code"] = charge["failure_code"]
+
+    try:
+        with stage("dynamodb_update"):
+            dynamodb.Table(PAYMENT_INTENTS_TABLE).update_item(
+                Key={"payment_intent_id": intent_id},
+                UpdateExpression="SET " + ", ".join(sets)
+                + " ADD attempt_charge_ids :charge_ids, attempt_count :one, failure_count :failed",
+                ConditionExpression="NOT contains(attempt_charge_ids, :charge_id)",
+                ExpressionAttributeNames={"#updated_at": "_updated_at"},
+                ExpressionAttributeValues=values,
+            )
+    except Exception as exc:
+        if is_conditional_check_failure(exc):
+            return False
+        raise
+    put_metric("payment_intent_attempts", 1)
+    return True
+
+
+def record_payment_intent(payment_intent: Dict[str, Any], event_type: str, event_created: int) -> bool:
+    """Set the intent's status fields unless a newer event already did."""
+    values: Dict[str, Any] = {
+        ":status": payment_intent.get("status"),
+        ":amount": Decimal(payment_intent.get("amount") or 0) / 100,
+        ":currency": (payment_intent.get("currency") or "").upper(),
+        ":created": datetime.fromtimestamp(payment_intent["created"], tz=timezone.utc).isoformat(),
+        ":event_type": event_type,
+        ":event_created": event_created,
+        ":now": datetime.now(timezone.utc).isoformat(),
+    }
+    sets = [
+        "#status = :status",
+        "amount = :amount",
+        "currency = :currency",
+        "created = :created",
+        "event_type = :event_type",
+        "event_created = :event_created",
+        "#updated_at = :now",
+    ]
+    for field, source in (("customer_id", "customer"), ("invoice_id", "invoice")):
+        if payment_intent.get(source):
+            sets.append(f"{field} = :{field}")
+            values[f":{field}"] = payment_intent[source]
+    last_error = payment_intent.get("last_payment_error") or {}
+    if last_error.get("code"):
+        sets.append("last_failure_code = :failure_code")
+        values[":failure_code"] = last_error["code"]
+
+    try:
+        with stage("dynamodb_update"):
+            dynamodb.Table(PAYMENT_INTENTS_TABLE).update_item(
+                Key={"payment_intent_id": payment_intent["id"]},
+                UpdateExpression="SET " + ", ".join(sets),
+                ConditionExpression="attribute_not_exists(event_created) OR event_created <= :event_created",
+                ExpressionAttributeNames={"#status": "status", "#updated_at": "_updated_at"},
+                ExpressionAttributeValues=values,
+            )
+    except Exception as exc:
+        if is_conditional_check_failure(exc):
+            put_metric("stale_events", 1)
+            return False
+        raise
+    return True
+
+
+def attempts_for(payment_intent_id: str) -> List[Dict[str, Any]]:
+    """Every recorded charge attempt for the intent, in arrival order."""
+    with stage("dynamodb_get"):
+        item = dynamodb.Table(PAYMENT_INTENTS_TABLE).get_item(
+            Key={"payment_intent_id": payment_intent_id}, ProjectionExpression="attempts"
+        ).get("Item") or {}
+    return item.get("attempts", [])
+
+
+def failure_code_distribution(day: Optional[date] = None) -> Dict[str, int]:
+    """Failed charges per failure code for one UTC day (default today)."""
+    day = day or datetime.now(timezone.utc).date()
+    table = dynamodb.Table(PAYMENT_ATTEMPTS_TABLE)
+    kwargs: Dict[str, Any] = {
+        "IndexName": FAILED_DAY_INDEX,
+        "KeyConditionExpression": "failed_day = :day",
+        "ExpressionAttributeValues": {":day": day.isoformat()},
+        "ProjectionExpression": "failure_code",
+    }
+    counts: Counter = Counter()
+    while True:
+        with stage("dynamodb_query"):
+            response = table.query(**kwargs)
+        counts.update(item.get("failure_code", "unknown") for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return dict(counts)
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
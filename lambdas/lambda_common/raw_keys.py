@@ -0,0 +1,44 @@
+"""Partition layout for raw webhook archive keys.
+
+Raw events land under ``date=YYYY-MM-DD/hour=HH/`` in UTC, whatever offset the event
+timestamp carried, so partitions line up with the ``partition-counts`` hours. S3 serves
+roughly 3,500 PUTs/s per prefix, so at peak rates every write for the current hour
+competes for one prefix.
+Setting ``RAW_KEY_SHARDS`` to N > 1 appends a ``shard=xx/`` partition derived from the
+record id, which spreads writes over N prefixes. Hour-prefix listings, and readers that
+prune on ``date``/``hour``, still see every object because the shards sit below the hour.
+"""
+import os
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+RAW_KEY_SHARDS = int(os.getenv("RAW_KEY_SHARDS", "0"))
+
+
+def as_utc(moment: datetime) -> datetime:
+    """``moment`` in UTC; naive datetimes are taken to be UTC already."""
+    return moment.astimezone(timezone.utc) if moment.tzinfo else moment
+
+
+def shard_for(record_id: Any, shards: int) -> str:
+    """Stable two-hex-digit shard for ``record_id``; every event for one record shares a shard."""
+    return f"{zlib.crc32(str(record_id).encode()) % shards:02x}"
+
+
+def raw_partition(event_dt: datetime, record_id: Any = None, hourly: bool = True, shards: Optional[int] = None) -> str:
+    """Return ``date=…/[hour=…/][shard=…/]`` for a raw event key."""
+    shards = RAW_KEY_SHARDS if shards is None else shards
+    event_dt = as_utc(event_dt)
+    partition = f"date={event_dt.strftime('%Y-%m-%d')}/"
+    if hourly:
+        partition += f"hour={event_dt.strftime('%H')}/"
+    if shards > 1:
+        partition += f"shard={shard_for(record_id, shards)}/"
+    return partition
+
+
+def hour_prefix(base: str, event_dt: datetime) -> str:
+    """Prefix that covers one hour of ``base`` (e.g. ``raw/shopify/orders/events/``) in every layout."""
+    event_dt = as_utc(event_dt)
+    return f"{base}date={event_dt.strftime('%Y-%m-%d')}/hour={event_dt.strftime('%H')}/"
@@ -0,0 +1,120 @@
+"""JSON encoding shared by the Lambdas, backed by orjson when it is installed.
+
+Output keeps the value semantics of the stdlib ``json.dumps(..., default=str)`` calls
+it replaces. ``Decimal``, ``datetime``/``date``/``time``, sets and anything else JSON
+cannot represent become ``str(value)``, non-string dict keys become strings, and
+integers beyond 64 bits fall back to the stdlib encoder. ``NaN`` and infinities become
+``null`` with either backend, as orjson writes them; the stdlib's bare ``NaN`` is not JSON
+and orjson cannot read it back. Formatting differs: orjson writes compact separators and
+raw UTF-8 instead of ``\\u`` escapes. Every consumer parses the JSON, so the documents are
+interchangeable.
+"""
+import json
+import math
+from decimal import Decimal
+from typing import Any, Callable, Optional, Union
+
+try:  # pragma: no cover - exercised implicitly depending on the image
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError  # orjson.JSONDecodeError subclasses it
+
+_ORJSON = orjson
+if orjson is not None:
+    # Route datetimes and dataclasses through ``default`` so they serialize as str(), as before.
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def set_backend(name: str) -> None:
+    """Force ``"orjson"`` or ``"stdlib"`` (used by tests and local benchmarks)."""
+    global _ORJSON
+    if name == "stdlib":
+        _ORJSON = None
+    elif name == "orjson":
+        if orjson is None:
+            raise RuntimeError("orjson is not installed")
+        _ORJSON = orjson
+    else:
+        raise ValueError(f"Unknown JSON backend: {name!r}")
+
+
+def backend() -> str:
+    return "orjson" if _ORJSON is not None else "stdlib"
+
+
+def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Encode ``obj`` as UTF-8 JSON bytes; pass ``default=str`` for lenient encoding."""
+    if _ORJSON is not None:
+        try:
+            return _ORJSON.dumps(obj, default=default, option=_OPTIONS)
+        except TypeError:
+            # Integers over 64 bits and other stdlib-only cases; strict failures re-raise below.
+            pass
+    return _stdlib_dumps(obj, default).encode("utf-8")
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Like ``dumps_bytes`` but returns ``str``."""
+    if _ORJSON is not None:
+        return dumps_bytes(obj, default).decode("utf-8")
+    return _stdlib_dumps(obj, default)
+
+
+def _stdlib_dumps(obj: Any, default: Optional[Callable[[Any], Any]]) -> str:
+    try:
+        return json.dumps(obj, default=default, allow_nan=False)
+    except ValueError as exc:
+        if "Out of range float" not in str(exc):
+            raise
+        # Only documents holding NaN or an infinity pay for the extra walk.
+        return json.dumps(_finite(obj), default=default, allow_nan=False)
+
+
+def _finite(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    if _ORJSON is not None:
+        return _ORJSON.loads(data)
+    return json.loads(data)
+
+
+def _dynamodb_key(key: Any) -> str:
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, float):
+        return repr(key)
+    return str(key)
+
+
+def to_dynamodb(value: Any) -> Any:
+    """Coerce a document the way ``json.loads(json.dumps(v, default=str), parse_float=Decimal)`` does.
+
+    Walking the structure directly avoids encoding and re-parsing every item on the write path.
+    """
+    if value is None or isinstance(value, (str, bool)):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    if isinstance(value, dict):
+        return {_dynamodb_key(key): to_dynamodb(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_dynamodb(item) for item in value]
+    return str(value)
@@ -0,0 +1,53 @@
+"""Subscription order classification shared by the order processor and batch jobs."""
+import os
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+DEFAULT_SUBSCRIPTION_SKUS = "marstestsupport,marsupgrade90_02,mars_monthly,mars_quarterly_3x,quarterly_mars_03"
+
+SUBSCRIPTION_TAGS = ("subscription", "recurring")
+
+
+class SubscriptionClassifier:
+    """Classify Shopify orders as subscription orders in a single pass over line items.
+
+    The configured SKU fragments are compiled into one alternation so each line item
+    is searched once instead of once per fragment. The classifier holds no AWS state
+    and can be shipped to Glue (``--extra-py-files``) or backfill jobs as-is.
+    """
+
+    def __init__(self, skus: Iterable[str]) -> None:
+        self.skus = [sku.lower() for sku in skus]
+        # Longest fragments first so overlapping SKUs resolve to the most specific match.
+        ordered = sorted(set(self.skus), key=len, reverse=True)
+        self._sku_pattern = re.compile("|".join(re.escape(sku) for sku in ordered)) if ordered else None
+
+    @classmethod
+    def from_env(cls) -> "SubscriptionClassifier":
+        return cls(os.getenv("SUBSCRIPTION_SKUS", DEFAULT_SUBSCRIPTION_SKUS).split(","))
+
+    def classify(self, order_data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """Return ``(is_subscription, subscription_type)`` for a Shopify order payload."""
+        tags = (order_data.get("tags", "") or "").lower()
+        is_subscription = any(tag in tags for tag in SUBSCRIPTION_TAGS)
+        subscription_type: Optional[str] = None
+
+        for item in order_data.get("line_items", []):
+            sku = (item.get("sku") or "").lower()
+
+            if not is_subscription and self._sku_pattern is not None and self._sku_pattern.search(sku):
+                is_subscription = True
+
+            if subscription_type is None:
+                if "monthly" in sku:
+                    subscription_type = "monthly"
+                elif "quarterly" in sku or "3x" in sku:
+                    subscription_type = "quarterly"
+
+            if is_subscription and subscription_type is not None:
+                break
+
+        if not is_subscription:
+            return False, None
+
+        return True, subscription_type or "monthly"
@@ -0,0 +1,109 @@
+"""Hour-of-week volume baselines for the data-quality anomaly check.
+
+Comparing an hour with the plain average of the same hour on the last seven days
+breaks in two ways. It fires whenever one of those days was a holiday, and a fixed
+"below 50%" threshold misses gradual drops. A profile instead keeps, for each of the
+168 hours of the week, the counts seen in that slot over the last ``BASELINE_WEEKS``
+weeks. An hour is scored against the slot's median with a robust z-score,
+``(count - median) / (1.4826 * MAD)``. One unusual week barely moves the median or the
+MAD (median absolute deviation).
+
+The profile is a plain dict, small enough to store as one JSON object:
+``{"last_hour": "YYYY-MM-DDTHH", "slots": {"0": [...], ..., "167": [...]}}``. Slot
+``weekday * 24 + hour`` (UTC, Monday = 0) lists counts oldest first. ``fold`` adds one
+completed hour, and ``observe`` scores an hour and then folds it. Both cost the same
+however long the profile has been running.
+"""
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+
+from lambda_common.partition_counts import hour_key
+
+BASELINE_WEEKS = int(os.getenv("BASELINE_WEEKS", "6"))
+# Slots with fewer samples than this are reported but never fail the check.
+BASELINE_MIN_WEEKS = int(os.getenv("BASELINE_MIN_WEEKS", "3"))
+BASELINE_Z_THRESHOLD = float(os.getenv("BASELINE_Z_THRESHOLD", "3.5"))
+# Hours of missing history folded per profile per run. A new or stale profile is rebuilt
+# over several runs instead of in one pass that may not finish within the timeout.
+BASELINE_MAX_CATCHUP_HOURS = max(1, int(os.getenv("BASELINE_MAX_CATCHUP_HOURS", "168")))
+
+HOURS_PER_WEEK = 168
+# Scales the MAD to a standard deviation for normally distributed counts.
+MAD_SCALE = 1.4826
+
+
+def hour_of_week(moment: datetime) -> int:
+    moment = moment.astimezone(timezone.utc)
+    return moment.weekday() * 24 + moment.hour
+
+
+def empty_profile() -> Dict[str, Any]:
+    return {"last_hour": None, "slots": {}}
+
+
+def last_hour(profile: Dict[str, Any]) -> Optional[datetime]:
+    if not profile.get("last_hour"):
+        return None
+    return datetime.strptime(profile["last_hour"], "%Y-%m-%dT%H").replace(tzinfo=timezone.utc)
+
+
+def pending_hours(profile: Dict[str, Any], current: datetime) -> Tuple[List[datetime], int]:
+    """Hours to fold before ``current`` can be scored, oldest first, and how many are left for later runs.
+
+    History older than ``BASELINE_WEEKS`` is never needed; at most ``BASELINE_MAX_CATCHUP_HOURS``
+    hours are returned per call.
+    """
+    oldest = current - timedelta(hours=BASELINE_WEEKS * HOURS_PER_WEEK)
+    previous = last_hour(profile)
+    start = max(previous + timedelta(hours=1), oldest) if previous else oldest
+    missing = max(0, int((current - start).total_seconds() // 3600))
+    hours = [start + timedelta(hours=offset) for offset in range(min(missing, BASELINE_MAX_CATCHUP_HOURS))]
+    return hours, missing - len(hours)
+
+
+def fold(profile: Dict[str, Any], hour: datetime, count: int) -> None:
+    """Add ``hour``'s count to its slot, keeping ``BASELINE_WEEKS`` earlier weeks behind it.
+
+    Folding the profile's latest hour again replaces its sample. A re-run within the same
+    hour then picks up late events instead of counting the hour twice.
+    """
+    samples: List[int] = profile["slots"].setdefault(str(hour_of_week(hour)), [])
+    key = hour_key(hour)
+    if key == profile.get("last_hour") and samples:
+        samples[-1] = count
+    else:
+        samples.append(count)
+    del samples[:-(BASELINE_WEEKS + 1)]
+    profile["last_hour"] = max(key, profile.get("last_hour") or key)
+
+
+def observe(profile: Dict[str, Any], hour: datetime, count: int) -> Dict[str, Any]:
+    """Score ``count`` against the earlier weeks of ``hour``'s slot, then fold it in."""
+    samples = list(profile["slots"].get(str(hour_of_week(hour)), []))
+    if hour_key(hour) == profile.get("last_hour"):
+        samples = samples[:-1]
+    samples = samples[-BASELINE_WEEKS:]
+
+    result: Dict[str, Any] = {"hour": hour_key(hour), "count": count, "samples": len(samples), "z": None}
+    if samples:
+        center = median(samples)
+        mad = median(abs(sample - center) for sample in samples)
+        # Floor the spread at a Poisson-like sqrt(median) so a perfectly flat slot does
+        # not turn every small wobble into an infinite z-score.
+        scale = max(MAD_SCALE * mad, math.sqrt(max(center, 1)))
+        result.update({"median": center, "mad": mad, "z": round((count - center) / scale, 2)})
+
+    fold(profile, hour, count)
+    return result
+
+
+def is_drop(result: Dict[str, Any]) -> bool:
+    """True when an ``observe`` result is a drop of more than ``BASELINE_Z_THRESHOLD`` on a warmed-up slot."""
+    return (
+        result["z"] is not None
+        and result["samples"] >= BASELINE_MIN_WEEKS
+        and result["z"] < -BASELINE_Z_THRESHOLD
+    )
@@ -1,20 +1,35 @@
-"""Recharge Subscription Event Processor"""
-import json
+"""Recharge Subscription Event Processor
+
+``handler`` serves the HTTP API. With ``RECHARGE_QUEUE_URL`` set it only verifies the
+signature and enqueues the body, so Recharge gets its 200 in milliseconds.
+``batch_handler`` then consumes the queue: it archives each event to S3 and writes the
+subscriptions and charges tables with ``batch_writer``. Failed messages are reported in
+``batchItemFailures`` so only they are retried. Without a queue, ``handler`` does all
+the work inline as before.
+"""
 import logging
 import os
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Set, Tuple
 import hashlib
 import hmac
 
-import boto3
+from lambda_common.alerts import publish_alert
+from lambda_common.clients import lazy_client, lazy_resource
+from lambda_common.compression import compress_body
+from lambda_common.concurrency import run_concurrently
+from lambda_common.customer360 import customer_key, record_failed_charge, record_subscription
+from lambda_common.metrics import instrumented, put_metric, set_topic, stage
+from lambda_common.partition_counts import count_raw_event, entity_for
+from lambda_common.raw_keys import raw_partition
+from lambda_common.serialization import dumps_bytes, loads
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
-sns = boto3.client("sns")
+s3 = lazy_client("s3")
+sqs = lazy_client("sqs")
+dynamodb = lazy_resource("dynamodb")
 
 BRAND = os.environ["BRAND"]
 S3_BUCKET = os.environ["S3_BUCKET"]
@@ -22,8 +37,12 @@ SUBSCRIPTION_TABLE = os.environ.get("SUBSCRIPTION_TABLE", f"{BRAND}-subscription
 CHARGES_TABLE = os.environ.get("CHARGES_TABLE", f"{BRAND}-subscription-charges")
 ALERT_TOPIC_ARN = os.environ.get("ALERT_TOPIC_ARN")
 WEBHOOK_SECRET = os.environ["RECHARGE_WEBHOOK_SECRET"]
+RECHARGE_QUEUE_URL = os.environ.get("RECHARGE_QUEUE_URL")
 
+SQS_MAX_MESSAGE_BYTES = 256 * 1024
 
+
+@instrumented("recharge-event-processor")
 def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
     logger.debug("Received event: %s", event)
 
@@ -31,27 +50,125 @@ def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
         logger.warning("Invalid Recharge webhook signature")
         return {"statusCode": 401, "body": "Invalid signature"}
 
-    body = json.loads(event.get("body", "{}"))
+    if RECHARGE_QUEUE_URL:
+        if enqueue_event(event.get("body", "")):
+            return {"statusCode": 200}
+        logger.warning("Recharge webhook body exceeds the SQS message limit; processing inline")
+
+    with stage("extract"):
+        body = loads(event.get("body", "{}"))
     event_type = body.get("type")
     payload = body.get("data", {})
+    set_topic(event_type)
 
     logger.info("Processing Recharge event %s", event_type)
 
-    s3_key = store_raw_event(payload, event_type)
+    writes = [lambda: store_raw_event(payload, event_type)]
+    if event_type and event_type.startswith("subscription/"):
+        writes.append(lambda: handle_subscription(payload, event_type))
+    elif event_type and event_type.startswith("charge/"):
+        writes.append(lambda: handle_charge(payload, event_type))
+    writes.extend(side_effects(payload, event_type))
+
+    s3_key = run_concurrently(*writes)[0]
     logger.info("Stored Recharge event to s3://%s/%s", S3_BUCKET, s3_key)
 
+    publish_alerts(payload, event_type)
+
+    return {"statusCode": 200}
+
+
+def enqueue_event(body: str) -> bool:
+    """Send the verified body to the ingest queue; False if it is too large for SQS."""
+    if len(body.encode("utf-8")) > SQS_MAX_MESSAGE_BYTES:
+        return False
+    with stage("sqs_send"):
+        sqs.send_message(QueueUrl=RECHARGE_QUEUE_URL, MessageBody=body)
+    put_metric("events_enqueued", 1)
+    return True
+
+
+@instrumented("recharge-batch-processor")
+def batch_handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
+    """Process a batch of queued webhook bodies; report failed messages for redelivery."""
+    records = event.get("Records", [])
+    set_topic("batch")
+
+    failures: Set[str] = set()
+    events: List[Tuple[str, str, Dict[str, Any]]] = []
+    with stage("extract"):
+        for record in records:
+            try:
+                body = loads(record["body"])
+            except ValueError:
+                logger.error("Unparseable Recharge message %s", record["messageId"])
+                failures.add(record["messageId"])
+                continue
+            events.append((record["messageId"], body.get("type") or "", body.get("data", {})))
+
+    results = run_concurrently(*[
+        lambda message_id=message_id, event_type=event_type, payload=payload: process_record(message_id, event_type, payload)
+        for message_id, event_type, payload in events
+    ])
+    failures.update(message_id for message_id in results if message_id)
+
+    subscriptions = [(message_id, subscription_item(payload, event_type))
+                     for message_id, event_type, payload in events if event_type.startswith("subscription/")]
+    charges = [(message_id, charge_item(payload, event_type))
+               for message_id, event_type, payload in events if event_type.startswith("charge/")]
+    failures.update(batch_put(SUBSCRIPTION_TABLE, "subscription_id", subscriptions))
+    failures.update(batch_put(CHARGES_TABLE, "charge_id", charges))
+
+    put_metric("batch_size", len(records))
+    put_metric("batch_failures", len(failures))
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in sorted(failures)]}
+
+
+def process_record(message_id: str, event_type: str, payload: Dict[str, Any]) -> Optional[str]:
+    """Archive one queued event and run its per-event writes; return its id if anything failed."""
+    try:
+        # Records already run in parallel on the shared pool; nesting run_concurrently here could starve it.
+        store_raw_event(payload, event_type)
+        for call in side_effects(payload, event_type):
+            call()
+        publish_alerts(payload, event_type)
+    except Exception:  # noqa: BLE001 - reported back to SQS as a partial batch failure
+        logger.exception("Failed to process Recharge message %s (%s)", message_id, event_type)
+        return message_id
+    return None
+
+
+def batch_put(table_name: str, key: str, items: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+    """Write ``items`` with one batch writer; on failure every contributing message is retried."""
+    if not items:
+        return []
+    try:
+        # Later events for the same key replace earlier ones within the batch.
+        with stage("dynamodb_batch_write"), dynamodb.Table(table_name).batch_writer(overwrite_by_pkeys=[key]) as batch:
+            for _, item in items:
+                batch.put_item(Item=item)
+    except Exception:  # noqa: BLE001 - reported back to SQS as a partial batch failure
+        logger.exception("Batch write to %s failed", table_name)
+        return [message_id for message_id, _ in items]
+    return []
+
+
+def side_effects(payload: Dict[str, Any], event_type: str) -> List[Any]:
+    """Customer-360 writes that go alongside the archive and table writes."""
+    calls = []
     if event_type and event_type.startswith("subscription/"):
-        handle_subscription(payload, event_type)
-    elif event_type and event_type.startswith("charge/"):
-        handle_charge(payload, event_type)
+        calls.append(lambda: record_subscription(payload))
+    if event_type == "charge/failed":
+        calls.append(lambda: record_recharge_failure(payload))
+    return calls
 
+
+def publish_alerts(payload: Dict[str, Any], event_type: str) -> None:
     if event_type == "subscription/cancelled":
         publish_cancellation_alert(payload)
     if event_type == "charge/failed":
         publish_charge_failure_alert(payload)
 
-    return {"statusCode": 200}
-
 
 def verify_signature(event: Dict[str, Any]) -> bool:
     signature = event.get("headers", {}).get("x-recharge-hmac-sha256")
@@ -73,28 +190,40 @@ def store_raw_event(payload: Dict[str, Any], event_type: str) -> str:
         prefix = "raw/recharge/charges/events/"
 
     record_id = payload.get("id", "unknown")
-    s3_key = f"{prefix}date={now.strftime('%Y-%m-%d')}/" \
-             f"hour={now.strftime('%H')}/{event_type.replace('/', '-')}-{record_id}-{now.strftime('%Y%m%d%H%M%S')}.json"
+    s3_key = f"{prefix}{raw_partition(now, record_id)}" \
+             f"{event_type.replace('/', '-')}-{record_id}-{now.strftime('%Y%m%d%H%M%S')}.json"
 
-    body = {
+    body = dumps_bytes({
         "event_type": event_type,
         "ingested_at": now.isoformat(),
         "data": payload,
-    }
-
-    s3.put_object(
-        Bucket=S3_BUCKET,
-        Key=s3_key,
-        Body=json.dumps(body, default=str),
-        ContentType="application/json",
-    )
+    }, default=str)
+
+    with stage("compress"):
+        payload, encoding, suffix = compress_body(body)
+    s3_key += suffix
+
+    with stage("s3_put"):
+        s3.put_object(
+            Bucket=S3_BUCKET,
+            Key=s3_key,
+            Body=payload,
+            ContentType="application/json",
+            **encoding,
+        )
+    put_metric("s3_put_bytes", len(payload), "Bytes")
+    count_raw_event(entity_for(prefix), now)
 
     return s3_key
 
 
 def handle_subscription(subscription: Dict[str, Any], event_type: str) -> None:
     table = dynamodb.Table(SUBSCRIPTION_TABLE)
+    with stage("dynamodb_put"):
+        table.put_item(Item=subscription_item(subscription, event_type))
 
+
+def subscription_item(subscription: Dict[str, Any], event_type: str) -> Dict[str, Any]:
     item = {
         "subscription_id": str(subscription.get("id")),
         "customer_id": str(subscription.get("customer_id")),
@@ -118,13 +247,16 @@ def handle_subscription(subscription: Dict[str, Any], event_type: str) -> None:
         "_updated_at": datetime.now(timezone.utc).isoformat(),
     }
 
-    item = {k: v for k, v in item.items() if v is not None}
-    table.put_item(Item=item)
+    return {k: v for k, v in item.items() if v is not None}
 
 
 def handle_charge(charge: Dict[str, Any], event_type: str) -> None:
     table = dynamodb.Table(CHARGES_TABLE)
+    with stage("dynamodb_put"):
+        table.put_item(Item=charge_item(charge, event_type))
+
 
+def charge_item(charge: Dict[str, Any], event_type: str) -> Dict[str, Any]:
     item = {
         "charge_id": str(charge.get("id")),
         "subscription_id": str(charge.get("subscription_id")),
@@ -144,8 +276,21 @@ def handle_charge(charge: Dict[str, Any], event_type: str) -> None:
         "_updated_at": datetime.now(timezone.utc).isoformat(),
     }
 
-    item = {k: v for k, v in item.items() if v is not None}
-    table.put_item(Item=item)
+    return {k: v for k, v in item.items() if v is not None}
+
+
+def record_recharge_failure(charge: Dict[str, Any]) -> None:
+    customer = charge.get("customer") or {}
+    shopify_customer_id = charge.get("shopify_customer_id") or (customer.get("external_customer_id") or {}).get("ecommerce")
+    record_failed_charge(
+        customer_key(shopify_customer_id, "recharge", charge.get("customer_id") or customer.get("id")),
+        "recharge",
+        charge.get("id"),
+        charge.get("processed_at") or charge.get("scheduled_at"),
+        amount=charge.get("total_price"),
+        failure_code=charge.get("error_type"),
+        failure_message=charge.get("error"),
+    )
 
 
 def publish_cancellation_alert(subscription: Dict[str, Any]) -> None:
@@ -162,10 +307,13 @@ def publish_cancellation_alert(subscription: Dict[str, Any]) -> None:
         f"Cancelled At: {subscription.get('cancelled_at')}\n"
     )
 
-    sns.publish(
-        TopicArn=ALERT_TOPIC_ARN,
-        Subject="Subscription Cancelled",
-        Message=message,
+    publish_alert(
+        "recharge_subscription_cancelled",
+        "Subscription Cancelled",
+        message,
+        group=subscription.get("cancellation_reason"),
+        example_id=str(subscription.get("id")),
+        topic_arn=ALERT_TOPIC_ARN,
     )
 
 
@@ -188,9 +336,12 @@ def publish_charge_failure_alert(charge: Dict[str, Any]) -> None:
         f"Total Price: {charge.get('total_price')}\n"
     )
 
-    sns.publish(
-        TopicArn=ALERT_TOPIC_ARN,
-        Subject=f"Recharge Payment Failure - Attempt {attempt_count}",
-        Message=message,
+    publish_alert(
+        "recharge_charge_failed",
+        f"Recharge Payment Failure - Attempt {attempt_count}",
+        message,
+        group=charge.get("error_type"),
+        example_id=str(charge.get("id")),
+        topic_arn=ALERT_TOPIC_ARN,
     )
 
@@ -1,38 +1,50 @@
 """Shopify Bulk Operation Downloader"""
 import gzip
-import json
 import logging
 import os
 from datetime import datetime, timezone
 from io import BytesIO
 from typing import Any, Dict, List
 
-import boto3
 import pyarrow as pa
 import pyarrow.parquet as pq
 import requests
 
+from lambda_common.clients import lazy_client
+from lambda_common.metrics import instrumented, put_metric, stage
+from lambda_common.serialization import JSONDecodeError, dumps, loads
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3 = boto3.client("s3")
+s3 = lazy_client("s3")
 
 S3_BUCKET = os.environ["S3_BUCKET"]
 BRAND = os.environ["BRAND"]
 
 
+@instrumented("shopify-bulk-download")
 def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
     download_url = event["url"]
     export_type = event.get("export_type", "orders")
 
     logger.info("Downloading bulk %s data", export_type)
 
-    raw_data = download_file(download_url)
-    records = parse_jsonl(raw_data)
+    with stage("download"):
+        raw_data = download_file(download_url)
+    put_metric("download_bytes", len(raw_data), "Bytes")
+
+    with stage("parse"):
+        records = parse_jsonl(raw_data)
     logger.info("Parsed %d records", len(records))
+    put_metric("records", len(records))
+
+    with stage("parquet"):
+        parquet_buffer = convert_to_parquet(records)
 
-    parquet_buffer = convert_to_parquet(records)
-    s3_key = upload_to_s3(parquet_buffer, export_type)
+    with stage("s3_put"):
+        s3_key = upload_to_s3(parquet_buffer, export_type)
+    put_metric("s3_put_bytes", parquet_buffer.getbuffer().nbytes, "Bytes")
 
     return {
         "statusCode": 200,
@@ -55,12 +67,12 @@ def download_file(url: str) -> bytes:
 
 def parse_jsonl(data: bytes) -> List[Dict[str, Any]]:
     records: List[Dict[str, Any]] = []
-    for line in data.decode("utf-8").splitlines():
+    for line in data.splitlines():
         if not line.strip():
             continue
         try:
-            records.append(json.loads(line))
-        except json.JSONDecodeError as exc:
+            records.append(loads(line))
+        except JSONDecodeError as exc:
             logger.warning("Failed to parse line: %s", exc)
     return records
 
@@ -83,7 +95,7 @@ def flatten_record(record: Dict[str, Any]) -> Dict[str, Any]:
             for sub_key, sub_value in value.items():
                 flat[f"{key}_{sub_key}"] = sub_value
         elif isinstance(value, list):
-            flat[key] = json.dumps(value)
+            flat[key] = dumps(value)
         else:
             flat[key] = value
     return flat
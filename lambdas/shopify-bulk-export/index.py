@@ -4,13 +4,15 @@ import logging
 import os
 from typing import Any, Dict, Optional
 
-import boto3
 import requests
 
+from lambda_common.clients import lazy_client
+from lambda_common.metrics import instrumented, stage
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-stepfunctions = boto3.client("stepfunctions")
+stepfunctions = lazy_client("stepfunctions")
 
 SHOPIFY_SHOP = os.environ["SHOPIFY_SHOP"]
 SHOPIFY_ACCESS_TOKEN = os.environ["SHOPIFY_ACCESS_TOKEN"]
@@ -20,13 +22,15 @@ ENVIRONMENT = os.environ["ENVIRONMENT"]
 GRAPHQL_URL = f"https://{SHOPIFY_SHOP}/admin/api/2024-01/graphql.json"
 
 
+@instrumented("shopify-bulk-export")
 def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
     export_type = event.get("export_type", "orders")
     start_date = event.get("start_date")
     end_date = event.get("end_date")
 
     query = build_bulk_query(export_type, start_date, end_date)
-    operation_id = submit_bulk_operation(query)
+    with stage("shopify_graphql"):
+        operation_id = submit_bulk_operation(query)
 
     logger.info("Submitted Shopify bulk operation %s", operation_id)
 
@@ -5,6 +5,8 @@ from typing import Any, Dict
 
 import requests
 
+from lambda_common.metrics import instrumented, stage
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -14,8 +16,10 @@ SHOPIFY_ACCESS_TOKEN = os.environ["SHOPIFY_ACCESS_TOKEN"]
 GRAPHQL_URL = f"https://{SHOPIFY_SHOP}/admin/api/2024-01/graphql.json"
 
 
+@instrumented("shopify-bulk-poll")
 def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
-    status_info = get_bulk_operation_status()
+    with stage("shopify_graphql"):
+        status_info = get_bulk_operation_status()
     logger.info("Bulk operation status %s", status_info.get("status"))
 
     return {
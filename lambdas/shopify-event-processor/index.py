@@ -0,0 +1,2 @@
+"""Shopify Event Processor (all topics, routed by X-Shopify-Topic)"""
+from shopify_events.router import handler  # noqa: F401  (Lambda entry point: index.handler)
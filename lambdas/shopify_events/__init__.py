@@ -0,0 +1 @@
+"""Shopify EventBridge processors shared by the per-entity and routed Lambda images."""
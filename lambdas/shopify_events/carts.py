@@ -0,0 +1,186 @@
+"""Shopify cart and checkout event processing.
+
+Open checkouts are tracked in ``abandoned-carts`` with an hourly ``abandoned_bucket``.
+That attribute backs the sparse ``abandoned-bucket-index`` GSI, so "abandoned in the last
+hour" queries at most two buckets (``recently_abandoned``). A completed checkout, or an
+``orders/create`` carrying the same ``checkout_token``, marks the item recovered and drops
+the bucket, which takes it out of the index. TTL removes it later.
+"""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from lambda_common.clients import is_conditional_check_failure, lazy_resource
+from lambda_common.concurrency import run_concurrently
+from lambda_common.metrics import instrumented, put_metric, set_topic, stage
+from lambda_common.serialization import dumps
+from shopify_events.common import S3_BUCKET, extract_shopify_payload, store_raw_shopify_event
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+ABANDONED_CART_TABLE = os.environ.get("ABANDONED_CART_TABLE", f"{BRAND}-abandoned-carts")
+ABANDONED_BUCKET_INDEX = "abandoned-bucket-index"
+
+
+@instrumented()
+def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
+    with stage("extract"):
+        data, metadata, event_type, event_time = extract_shopify_payload(event)
+    set_topic(event_type)
+    logger.info("Processing cart/checkout event %s", event_type)
+
+    if not data:
+        logger.warning("No checkout/cart data in event detail")
+        return {"statusCode": 400, "body": "No event data"}
+
+    event_type = event_type or "unknown"
+
+    if "checkout" in event_type:
+        writes = [lambda: store_checkout_event(data, metadata, event_type, event_time)]
+        if not data.get("completed_at"):
+            writes.append(lambda: track_abandoned_checkout(data))
+        elif data.get("token"):
+            writes.append(lambda: mark_checkout_recovered(data["token"], data.get("completed_at"), data.get("order_id")))
+        s3_key = run_concurrently(*writes)[0]
+    elif "cart" in event_type:
+        s3_key = store_cart_event(data, metadata, event_type, event_time)
+    else:
+        logger.debug("Unhandled cart/checkout topic %s", event_type)
+        s3_key = store_cart_event(data, metadata, event_type, event_time)
+
+    logger.info("Stored %s event to s3://%s/%s", event_type, S3_BUCKET, s3_key)
+
+    identifier = data.get("token") or data.get("id")
+    return {"statusCode": 200, "body": dumps({"record_id": str(identifier)})}
+
+
+def store_checkout_event(
+    checkout_data: Dict[str, Any],
+    metadata: Dict[str, Any],
+    event_type: str,
+    event_time: Optional[str],
+) -> str:
+    # Checkout and cart archives are partitioned by date only.
+    return store_raw_shopify_event(
+        "checkouts", "checkout", checkout_data.get("token"), checkout_data, metadata, event_type, event_time, hourly=False
+    )
+
+
+def store_cart_event(
+    cart_data: Dict[str, Any],
+    metadata: Dict[str, Any],
+    event_type: str,
+    event_time: Optional[str],
+) -> str:
+    return store_raw_shopify_event(
+        "carts", "cart", cart_data.get("id"), cart_data, metadata, event_type, event_time, hourly=False
+    )
+
+
+def _utc(timestamp: Optional[str]) -> datetime:
+    if timestamp:
+        try:
+            return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).astimezone(timezone.utc)
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc)
+
+
+def abandoned_bucket(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H")
+
+
+def track_abandoned_checkout(checkout_data: Dict[str, Any]) -> None:
+    table = dynamodb.Table(ABANDONED_CART_TABLE)
+    abandoned_at = _utc(checkout_data.get("updated_at") or checkout_data.get("created_at"))
+
+    item = {
+        "checkout_token": checkout_data.get("token"),
+        "customer_email": checkout_data.get("email"),
+        "customer_id": str(checkout_data.get("customer", {}).get("id")) if checkout_data.get("customer") else None,
+        "created_at": checkout_data.get("created_at"),
+        "updated_at": checkout_data.get("updated_at"),
+        "abandoned_checkout_url": checkout_data.get("abandoned_checkout_url"),
+        "total_price": checkout_data.get("total_price"),
+        "currency": checkout_data.get("currency"),
+        "line_items": dumps(checkout_data.get("line_items", [])),
+        "status": "abandoned",
+        "abandoned_at": abandoned_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "abandoned_bucket": abandoned_bucket(abandoned_at),
+        "_tracked_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    item = {k: v for k, v in item.items() if v is not None}
+
+    ttl_days = int(os.getenv("ABANDONED_CART_TTL_DAYS", "14"))
+    item["ttl"] = int((datetime.now(timezone.utc) + timedelta(days=ttl_days)).timestamp())
+
+    try:
+        with stage("dynamodb_put"):
+            # A late checkouts/update must not reopen a checkout that was already recovered.
+            table.put_item(Item=item, ConditionExpression="attribute_not_exists(recovered_at)")
+    except Exception as exc:
+        if not is_conditional_check_failure(exc):
+            raise
+        logger.info("Checkout %s already recovered; ignoring stale update", item.get("checkout_token"))
+
+
+def mark_checkout_recovered(checkout_token: str, recovered_at: Optional[str] = None, order_id: Any = None) -> bool:
+    """Mark a tracked checkout recovered and drop it from the bucket index.
+
+    Returns False when the token was never tracked as abandoned or is already recovered.
+    """
+    values: Dict[str, Any] = {
+        ":recovered": "recovered",
+        ":recovered_at": recovered_at or datetime.now(timezone.utc).isoformat(),
+    }
+    expression = "SET #status = :recovered, recovered_at = :recovered_at"
+    if order_id:
+        values[":order_id"] = str(order_id)
+        expression += ", recovered_order_id = :order_id"
+    try:
+        with stage("dynamodb_update"):
+            dynamodb.Table(ABANDONED_CART_TABLE).update_item(
+                Key={"checkout_token": checkout_token},
+                UpdateExpression=expression + " REMOVE abandoned_bucket",
+                ConditionExpression="attribute_exists(checkout_token) AND attribute_not_exists(recovered_at)",
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues=values,
+            )
+    except Exception as exc:
+        if is_conditional_check_failure(exc):
+            return False
+        raise
+    put_metric("checkouts_recovered", 1)
+    return True
+
+
+def recently_abandoned(since: datetime, until: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """Yield open checkouts abandoned between ``since`` and ``until``, querying one GSI bucket per hour."""
+    until = (until or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    since = since.astimezone(timezone.utc)
+    table = dynamodb.Table(ABANDONED_CART_TABLE)
+    bucket_start = since.replace(minute=0, second=0, microsecond=0)
+    while bucket_start < until:
+        kwargs: Dict[str, Any] = {
+            "IndexName": ABANDONED_BUCKET_INDEX,
+            "KeyConditionExpression": "abandoned_bucket = :bucket AND abandoned_at BETWEEN :since AND :until",
+            "ExpressionAttributeValues": {
+                ":bucket": abandoned_bucket(bucket_start),
+                ":since": since.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                ":until": until.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            },
+        }
+        while True:
+            with stage("dynamodb_query"):
+                response = table.query(**kwargs)
+            yield from response.get("Items", [])
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        bucket_start += timedelta(hours=1)
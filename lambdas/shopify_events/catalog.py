@@ -0,0 +1,275 @@
+"""Product/variant catalog: DynamoDB table, versioned S3 snapshot and in-memory lookups.
+
+The product processor keeps one ``product-catalog`` item per variant, covering product
+type, vendor, cost and so on. On a schedule it publishes the whole table as a versioned
+gzip JSON snapshot and repoints ``latest.json`` at it. Consumers such as the order
+processor and the Glue job load the snapshot once per container and resolve line items
+by variant id (or SKU) with a dict lookup. No per-event DynamoDB or Shopify calls are
+needed.
+"""
+import gzip
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from lambda_common.clients import error_code, lazy_client, lazy_resource
+from lambda_common.metrics import put_metric, stage
+from lambda_common.serialization import dumps_bytes, loads
+from shopify_events.common import S3_BUCKET
+
+logger = logging.getLogger()
+
+s3 = lazy_client("s3")
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+CATALOG_TABLE = os.environ.get("CATALOG_TABLE", f"{BRAND}-product-catalog")
+CATALOG_PREFIX = os.getenv("CATALOG_PREFIX", "catalog/shopify/products/")
+CATALOG_MANIFEST_KEY = f"{CATALOG_PREFIX}latest.json"
+CATALOG_REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", "900"))
+# GetObject error codes for a manifest that does not exist yet (403 when the caller lacks s3:ListBucket).
+MISSING_MANIFEST_CODES = {"NoSuchKey", "404", "AccessDenied", "403"}
+
+# Attributes copied into snapshots and onto order line items.
+SNAPSHOT_FIELDS = (
+    "product_id",
+    "sku",
+    "product_title",
+    "variant_title",
+    "vendor",
+    "product_type",
+    "product_status",
+    "tags",
+    "price",
+    "cost",
+)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else str(value)
+    return value
+
+
+def variant_items(product: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Catalog attributes for each variant of a ``products/*`` payload (cost is set separately)."""
+    items = []
+    for variant in product.get("variants") or []:
+        if not variant.get("id"):
+            continue
+        title = variant.get("title")
+        item = {
+            "variant_id": str(variant["id"]),
+            "product_id": str(product.get("id")),
+            "sku": variant.get("sku") or None,
+            "inventory_item_id": str(variant["inventory_item_id"]) if variant.get("inventory_item_id") else None,
+            "product_title": product.get("title"),
+            "variant_title": title if title and title != "Default Title" else None,
+            "vendor": product.get("vendor"),
+            "product_type": product.get("product_type") or None,
+            "product_status": product.get("status"),
+            "tags": product.get("tags") or None,
+            "price": str(variant["price"]) if variant.get("price") is not None else None,
+            "updated_at": variant.get("updated_at") or product.get("updated_at"),
+        }
+        items.append({key: value for key, value in item.items() if value is not None})
+    return items
+
+
+def upsert_product(product: Dict[str, Any], prune: bool = True) -> int:
+    """Write the product's variants and, if ``prune``, drop variants that no longer exist."""
+    table = dynamodb.Table(CATALOG_TABLE)
+    items = variant_items(product)
+    now = datetime.now(timezone.utc).isoformat()
+
+    # UpdateItem rather than PutItem so a cost set from inventory_items/* survives product updates.
+    with stage("dynamodb_put"):
+        for item in items:
+            attributes = {key: value for key, value in item.items() if key != "variant_id"}
+            attributes["_updated_at"] = now
+            table.update_item(
+                Key={"variant_id": item["variant_id"]},
+                UpdateExpression="SET " + ", ".join(f"#{key} = :{key}" for key in attributes),
+                ExpressionAttributeNames={f"#{key}": key for key in attributes},
+                ExpressionAttributeValues={f":{key}": value for key, value in attributes.items()},
+            )
+
+    if not prune:
+        return len(items)
+    current = {item["variant_id"] for item in items}
+    stale = [variant_id for variant_id in product_variant_ids(str(product.get("id"))) if variant_id not in current]
+    delete_variants(stale)
+    return len(items)
+
+
+def product_variant_ids(product_id: str) -> List[str]:
+    table = dynamodb.Table(CATALOG_TABLE)
+    variant_ids: List[str] = []
+    kwargs: Dict[str, Any] = {
+        "IndexName": "product-id-index",
+        "KeyConditionExpression": "product_id = :product_id",
+        "ExpressionAttributeValues": {":product_id": product_id},
+        "ProjectionExpression": "variant_id",
+    }
+    with stage("dynamodb_query"):
+        while True:
+            response = table.query(**kwargs)
+            variant_ids.extend(item["variant_id"] for item in response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return variant_ids
+
+
+def delete_variants(variant_ids: List[str]) -> None:
+    if not variant_ids:
+        return
+    table = dynamodb.Table(CATALOG_TABLE)
+    with stage("dynamodb_delete"), table.batch_writer() as batch:
+        for variant_id in variant_ids:
+            batch.delete_item(Key={"variant_id": variant_id})
+
+
+def update_inventory_item_cost(inventory_item: Dict[str, Any]) -> int:
+    """Apply an ``inventory_items/*`` cost to the variants that reference it."""
+    if inventory_item.get("cost") is None or not inventory_item.get("id"):
+        return 0
+
+    table = dynamodb.Table(CATALOG_TABLE)
+    with stage("dynamodb_query"):
+        response = table.query(
+            IndexName="inventory-item-index",
+            KeyConditionExpression="inventory_item_id = :inventory_item_id",
+            ExpressionAttributeValues={":inventory_item_id": str(inventory_item["id"])},
+            ProjectionExpression="variant_id",
+        )
+    variant_ids = [item["variant_id"] for item in response.get("Items", [])]
+
+    with stage("dynamodb_put"):
+        for variant_id in variant_ids:
+            table.update_item(
+                Key={"variant_id": variant_id},
+                UpdateExpression="SET cost = :cost, #updated = :now",
+                ExpressionAttributeNames={"#updated": "_updated_at"},
+                ExpressionAttributeValues={
+                    ":cost": str(inventory_item["cost"]),
+                    ":now": datetime.now(timezone.utc).isoformat(),
+                },
+            )
+    return len(variant_ids)
+
+
+def publish_snapshot() -> Optional[Dict[str, Any]]:
+    """Scan the catalog into a new versioned snapshot; skip if nothing changed since the last one."""
+    table = dynamodb.Table(CATALOG_TABLE)
+    variants: Dict[str, Dict[str, Any]] = {}
+    source_updated_at = ""
+    kwargs: Dict[str, Any] = {}
+    with stage("dynamodb_scan"):
+        while True:
+            response = table.scan(**kwargs)
+            for item in response.get("Items", []):
+                variants[item["variant_id"]] = {
+                    field: _plain(item[field]) for field in SNAPSHOT_FIELDS if item.get(field) is not None
+                }
+                source_updated_at = max(source_updated_at, item.get("_updated_at", ""))
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    previous = _read_manifest()
+    if previous and previous.get("source_updated_at") == source_updated_at and previous.get("variant_count") == len(variants):
+        logger.info("Catalog unchanged since version %s; not publishing", previous.get("version"))
+        return None
+
+    now = datetime.now(timezone.utc)
+    version = now.strftime("%Y%m%dT%H%M%SZ")
+    snapshot_key = f"{CATALOG_PREFIX}snapshots/version={version}/catalog.json.gz"
+    body = gzip.compress(dumps_bytes({"version": version, "generated_at": now.isoformat(), "variants": variants}, default=str))
+    manifest = {
+        "version": version,
+        "key": snapshot_key,
+        "variant_count": len(variants),
+        "source_updated_at": source_updated_at,
+        "generated_at": now.isoformat(),
+    }
+
+    with stage("s3_put"):
+        s3.put_object(Bucket=S3_BUCKET, Key=snapshot_key, Body=body, ContentType="application/json", ContentEncoding="gzip")
+        # The manifest is written last so readers never see a pointer to a partial snapshot.
+        s3.put_object(Bucket=S3_BUCKET, Key=CATALOG_MANIFEST_KEY, Body=dumps_bytes(manifest), ContentType="application/json")
+    put_metric("catalog_variants", len(variants))
+    put_metric("s3_put_bytes", len(body), "Bytes")
+    return manifest
+
+
+def _read_manifest() -> Optional[Dict[str, Any]]:
+    """The current manifest, or ``None`` before the first snapshot is published.
+
+    Without ``s3:ListBucket`` S3 answers a missing key with 403 instead of ``NoSuchKey``,
+    so both mean "no manifest" here rather than failing the first publish.
+    """
+    try:
+        response = s3.get_object(Bucket=S3_BUCKET, Key=CATALOG_MANIFEST_KEY)
+    except Exception as exc:
+        code = error_code(exc)
+        if code not in MISSING_MANIFEST_CODES:
+            raise
+        if code in ("AccessDenied", "403"):
+            logger.warning("Access denied reading %s; treating the manifest as missing", CATALOG_MANIFEST_KEY)
+        return None
+    return loads(response["Body"].read())
+
+
+class CatalogSnapshot:
+    """Snapshot loaded into memory, re-checked against the manifest every ``refresh_seconds``."""
+
+    def __init__(self, refresh_seconds: int = 900) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.version: Optional[str] = None
+        self._variants: Dict[str, Dict[str, Any]] = {}
+        self._skus: Dict[str, str] = {}
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def load(self, snapshot: Dict[str, Any]) -> None:
+        variants = snapshot.get("variants") or {}
+        skus = {attrs["sku"].lower(): variant_id for variant_id, attrs in variants.items() if attrs.get("sku")}
+        self._variants, self._skus, self.version = variants, skus, snapshot.get("version")
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if not force and now - self._checked_at < self.refresh_seconds:
+                return
+            self._checked_at = now
+            try:
+                with stage("catalog_load"):
+                    manifest = _read_manifest()
+                    if not manifest or manifest.get("version") == self.version:
+                        return
+                    body = s3.get_object(Bucket=S3_BUCKET, Key=manifest["key"])["Body"].read()
+                    self.load(loads(gzip.decompress(body)))
+                logger.info("Loaded catalog version %s (%d variants)", self.version, len(self._variants))
+            except Exception:  # noqa: BLE001 - keep serving the previous snapshot
+                logger.warning("Catalog snapshot refresh failed", exc_info=True)
+
+    def lookup(self, variant_id: Any = None, sku: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if variant_id is not None:
+            attrs = self._variants.get(str(variant_id))
+            if attrs is not None:
+                return attrs
+        if sku:
+            variant = self._skus.get(sku.lower())
+            if variant is not None:
+                return self._variants.get(variant)
+        return None
+
+
+CATALOG = CatalogSnapshot(CATALOG_REFRESH_SECONDS)
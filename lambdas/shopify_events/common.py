@@ -0,0 +1,104 @@
+"""Payload extraction and raw-archive helpers shared by the Shopify processors."""
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from lambda_common.clients import lazy_client
+from lambda_common.compression import compress_body
+from lambda_common.metrics import put_metric, stage
+from lambda_common.partition_counts import count_raw_event
+from lambda_common.raw_keys import raw_partition
+from lambda_common.serialization import dumps_bytes
+
+s3 = lazy_client("s3")
+
+S3_BUCKET = os.environ["S3_BUCKET"]
+
+
+def extract_shopify_payload(event: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Optional[str], Optional[str]]:
+    detail = event.get("detail", {}) or {}
+    if isinstance(detail, dict) and "payload" in detail:
+        payload = detail.get("payload") or {}
+        metadata = detail.get("metadata") or {}
+    else:
+        payload = detail
+        metadata = {}
+
+    topic = metadata.get("X-Shopify-Topic") or event.get("detail-type")
+    event_time = metadata.get("X-Shopify-Triggered-At") or event.get("time")
+
+    return payload, metadata, topic, event_time
+
+
+def parse_event_time(event_time: Optional[str]) -> datetime:
+    return datetime.fromisoformat(event_time.replace("Z", "+00:00")) if event_time else datetime.now(timezone.utc)
+
+
+def build_raw_event_key(
+    dataset: str,
+    file_prefix: str,
+    record_id: Any,
+    event_dt: datetime,
+    hourly: bool = True,
+) -> str:
+    """Return the archive key, e.g. ``raw/shopify/orders/events/date=…/hour=…/event-<id>-<ts>.json``.
+
+    A ``shard=xx/`` partition follows when ``RAW_KEY_SHARDS`` is set (see ``lambda_common.raw_keys``).
+    """
+    return (
+        f"raw/shopify/{dataset}/events/"
+        f"{raw_partition(event_dt, record_id, hourly=hourly)}"
+        f"{file_prefix}-{record_id}-{event_dt.strftime('%Y%m%d%H%M%S')}.json"
+    )
+
+
+def build_raw_event_body(
+    data: Dict[str, Any],
+    metadata: Dict[str, Any],
+    event_type: Optional[str],
+    event_time: Optional[str],
+) -> Dict[str, Any]:
+    return {
+        "event_type": event_type,
+        "event_time": event_time,
+        "ingested_at": datetime.now(timezone.utc).isoformat(),
+        "data": data,
+        "metadata": metadata,
+    }
+
+
+def store_raw_shopify_event(
+    dataset: str,
+    file_prefix: str,
+    record_id: Any,
+    data: Dict[str, Any],
+    metadata: Dict[str, Any],
+    event_type: Optional[str],
+    event_time: Optional[str],
+    hourly: bool = True,
+    object_metadata: Optional[Dict[str, str]] = None,
+) -> str:
+    """Persist a raw webhook to the immutable S3 archive and return its key."""
+    event_dt = parse_event_time(event_time)
+    s3_key = build_raw_event_key(dataset, file_prefix, record_id, event_dt, hourly=hourly)
+
+    body = dumps_bytes(build_raw_event_body(data, metadata, event_type, event_time), default=str)
+    with stage("compress"):
+        payload, encoding, suffix = compress_body(body)
+    s3_key += suffix
+    put_kwargs: Dict[str, Any] = {
+        "Bucket": S3_BUCKET,
+        "Key": s3_key,
+        "Body": payload,
+        "ContentType": "application/json",
+        **encoding,
+    }
+    if object_metadata:
+        put_kwargs["Metadata"] = object_metadata
+
+    with stage("s3_put"):
+        s3.put_object(**put_kwargs)
+    put_metric("s3_put_bytes", len(payload), "Bytes")
+    count_raw_event(f"shopify/{dataset}", event_dt)
+
+    return s3_key
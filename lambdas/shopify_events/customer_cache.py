@@ -0,0 +1,151 @@
+"""Per-container customer profile cache in front of the customers-cache table.
+
+Order webhooks often carry a sparse ``customer`` object (notably on ``orders/updated``).
+The order processor fills the gaps from the profile the customer processor upserts into
+``customers-cache``. Lookups go through an LRU with a TTL. Misses are fetched with one
+``BatchGetItem`` per 100 ids, and unknown customers are cached too, so warm containers
+rarely reach DynamoDB. When customers and orders share a container (the routed
+processor), upserts also refresh the LRU directly.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from lambda_common.clients import lazy_resource
+from lambda_common.metrics import put_metric, stage
+
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+CUSTOMER_TABLE = os.environ.get("CUSTOMER_TABLE", f"{BRAND}-customers-cache")
+CUSTOMER_CACHE_SIZE = int(os.getenv("CUSTOMER_CACHE_SIZE", "5000"))
+CUSTOMER_CACHE_TTL_SECONDS = int(os.getenv("CUSTOMER_CACHE_TTL_SECONDS", "300"))
+
+BATCH_GET_LIMIT = 100  # BatchGetItem keys per request
+
+# Enriched order field -> customers-cache attribute.
+PROFILE_FIELDS = {
+    "customer_email": "email",
+    "customer_first_name": "first_name",
+    "customer_last_name": "last_name",
+    "customer_phone": "phone",
+    "customer_created_at": "created_at",
+    "customer_orders_count": "orders_count",
+    "customer_total_spent": "total_spent",
+    "customer_tags": "tags",
+    "customer_accepts_marketing": "accepts_marketing",
+    "customer_marketing_opt_in_level": "marketing_opt_in_level",
+    "customer_state": "state",
+}
+
+
+class CustomerProfileCache:
+    """Thread-safe LRU of customer profiles (``None`` records a known miss)."""
+
+    def __init__(self, table_name: str, max_size: int = 5000, ttl_seconds: int = 300) -> None:
+        self.table_name = table_name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, customer_id: str, now: float) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        entry = self._entries.get(customer_id)
+        if entry is None or entry[0] < now:
+            return False, None
+        self._entries.move_to_end(customer_id)
+        return True, entry[1]
+
+    def _store(self, customer_id: str, profile: Optional[Dict[str, Any]], now: float) -> None:
+        self._entries[customer_id] = (now + self.ttl_seconds, profile)
+        self._entries.move_to_end(customer_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def put(self, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._store(str(profile["customer_id"]), profile, time.monotonic())
+
+    def invalidate(self, customer_id: str) -> None:
+        with self._lock:
+            self._entries.pop(str(customer_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_many(self, customer_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Return ``{customer_id: profile or None}``, fetching cache misses in batches."""
+        now = time.monotonic()
+        found: Dict[str, Optional[Dict[str, Any]]] = {}
+        missing: List[str] = []
+        with self._lock:
+            for customer_id in dict.fromkeys(str(cid) for cid in customer_ids if cid):
+                hit, profile = self._lookup(customer_id, now)
+                if hit:
+                    found[customer_id] = profile
+                else:
+                    missing.append(customer_id)
+
+        put_metric("customer_cache_hits", len(found))
+        if not missing:
+            return found
+
+        put_metric("customer_cache_misses", len(missing))
+        fetched, unresolved = self._batch_get(missing)
+        with self._lock:
+            for customer_id in missing:
+                profile = fetched.get(customer_id)
+                if customer_id not in unresolved:
+                    self._store(customer_id, profile, now)
+                found[customer_id] = profile
+        return found
+
+    def get(self, customer_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not customer_id:
+            return None
+        return self.get_many([customer_id]).get(str(customer_id))
+
+    def _batch_get(self, customer_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+        profiles: Dict[str, Dict[str, Any]] = {}
+        unresolved: Set[str] = set()
+        for start in range(0, len(customer_ids), BATCH_GET_LIMIT):
+            request = {self.table_name: {"Keys": [{"customer_id": cid} for cid in customer_ids[start:start + BATCH_GET_LIMIT]]}}
+            attempt = 0
+            while request:
+                with stage("dynamodb_batch_get"):
+                    response = dynamodb.batch_get_item(RequestItems=request)
+                for item in response.get("Responses", {}).get(self.table_name, []):
+                    profiles[item["customer_id"]] = item
+                request = response.get("UnprocessedKeys") or {}
+                attempt += 1
+                if request and attempt >= 4:
+                    # Enrichment is best-effort: give up on these ids for now without caching them.
+                    unresolved.update(key["customer_id"] for key in request[self.table_name]["Keys"])
+                    break
+                if request:
+                    time.sleep(0.05 * 2 ** attempt)
+        return profiles, unresolved
+
+
+CUSTOMER_CACHE = CustomerProfileCache(CUSTOMER_TABLE, CUSTOMER_CACHE_SIZE, CUSTOMER_CACHE_TTL_SECONDS)
+
+
+def apply_customer_profile(enriched_order: Dict[str, Any], profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fill customer fields missing from the webhook with the cached profile's values."""
+    if not profile:
+        return enriched_order
+    for order_field, profile_field in PROFILE_FIELDS.items():
+        value = profile.get(profile_field)
+        if enriched_order.get(order_field) is None and value is not None:
+            # DynamoDB numbers come back as Decimal; keep counts as the ints the webhook sends.
+            if isinstance(value, Decimal) and value == value.to_integral_value():
+                value = int(value)
+            enriched_order[order_field] = value
+    profile_updated_at = profile.get("updated_at") or profile.get("_updated_at")
+    if profile_updated_at:
+        enriched_order["customer_profile_updated_at"] = profile_updated_at
+    return enriched_order
@@ -0,0 +1,94 @@
+"""Shopify customer event processing."""
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from lambda_common.clients import lazy_resource
+from lambda_common.concurrency import run_concurrently
+from lambda_common.customer360 import forget_customer, record_customer
+from lambda_common.metrics import instrumented, set_topic, stage
+from lambda_common.serialization import dumps
+from shopify_events.common import S3_BUCKET, extract_shopify_payload, store_raw_shopify_event
+from shopify_events.customer_cache import CUSTOMER_CACHE, CUSTOMER_TABLE
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+
+
+@instrumented()
+def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
+    with stage("extract"):
+        customer_data, metadata, event_type, event_time = extract_shopify_payload(event)
+    set_topic(event_type)
+    logger.info("Processing customer event %s", event_type)
+
+    if not customer_data:
+        logger.warning("No customer data in event detail")
+        return {"statusCode": 400, "body": "No customer data"}
+
+    customer_id = str(customer_data.get("id"))
+
+    writes = [lambda: store_raw_customer_event(customer_data, metadata, event_type, event_time)]
+    if event_type in {"customers/create", "customers/update"}:
+        writes.append(lambda: upsert_customer(customer_data))
+        writes.append(lambda: record_customer(customer_data))
+    elif event_type == "customers/delete":
+        writes.append(lambda: delete_customer(customer_id))
+        writes.append(lambda: forget_customer(customer_id))
+    else:
+        logger.debug("No mutation performed for event type %s", event_type)
+
+    s3_key = run_concurrently(*writes)[0]
+    logger.info("Stored customer event to s3://%s/%s", S3_BUCKET, s3_key)
+
+    return {"statusCode": 200, "body": dumps({"customer_id": customer_id})}
+
+
+def store_raw_customer_event(
+    customer_data: Dict[str, Any],
+    metadata: Dict[str, Any],
+    event_type: Optional[str],
+    event_time: Optional[str],
+) -> str:
+    return store_raw_shopify_event(
+        "customers", "customer", customer_data.get("id"), customer_data, metadata, event_type, event_time
+    )
+
+
+def upsert_customer(customer_data: Dict[str, Any]) -> None:
+    table = dynamodb.Table(CUSTOMER_TABLE)
+
+    item = {
+        "customer_id": str(customer_data.get("id")),
+        "email": customer_data.get("email"),
+        "first_name": customer_data.get("first_name"),
+        "last_name": customer_data.get("last_name"),
+        "phone": customer_data.get("phone"),
+        "created_at": customer_data.get("created_at"),
+        "updated_at": customer_data.get("updated_at"),
+        "orders_count": customer_data.get("orders_count", 0),
+        "total_spent": customer_data.get("total_spent", "0"),
+        "tags": customer_data.get("tags", ""),
+        "accepts_marketing": customer_data.get("accepts_marketing", False),
+        "marketing_opt_in_level": customer_data.get("marketing_opt_in_level"),
+        "state": customer_data.get("state"),
+        "_updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    item = {k: v for k, v in item.items() if v is not None}
+    with stage("dynamodb_put"):
+        table.put_item(Item=item)
+    # Orders handled by this container (routed processor) see the new profile immediately.
+    CUSTOMER_CACHE.put(item)
+
+
+def delete_customer(customer_id: str) -> None:
+    table = dynamodb.Table(CUSTOMER_TABLE)
+    with stage("dynamodb_delete"):
+        table.delete_item(Key={"customer_id": customer_id})
+    CUSTOMER_CACHE.invalidate(customer_id)
@@ -0,0 +1,61 @@
+"""Shopify fulfillment event processing.
+
+Fulfillment payloads are not orders: they are archived under their own raw prefix
+(``raw/shopify/fulfillments/events/`` and ``raw/shopify/fulfillment_orders/events/``) and
+never reach orders-cache, customer 360 or the line-item facts.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from lambda_common.metrics import instrumented, set_topic, stage
+from lambda_common.serialization import dumps
+from shopify_events.common import S3_BUCKET, extract_shopify_payload, store_raw_shopify_event
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DATASETS = {"fulfillments": "fulfillment", "fulfillment_orders": "fulfillment-order"}
+
+
+@instrumented()
+def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
+    with stage("extract"):
+        fulfillment_data, metadata, event_type, event_time = extract_shopify_payload(event)
+    set_topic(event_type)
+    logger.info("Processing fulfillment event %s", event_type)
+
+    if not fulfillment_data:
+        logger.warning("No fulfillment data in event detail")
+        return {"statusCode": 400, "body": "No fulfillment data"}
+
+    s3_key = store_raw_fulfillment_event(fulfillment_data, metadata, event_type, event_time)
+    logger.info("Stored fulfillment event to s3://%s/%s", S3_BUCKET, s3_key)
+
+    return {
+        "statusCode": 200,
+        "body": dumps({"fulfillment_id": str(fulfillment_data.get("id")), "s3_key": s3_key}),
+    }
+
+
+def store_raw_fulfillment_event(
+    fulfillment_data: Dict[str, Any],
+    metadata: Dict[str, Any],
+    event_type: Optional[str],
+    event_time: Optional[str],
+) -> str:
+    dataset = (event_type or "").split("/", 1)[0]
+    if dataset not in DATASETS:
+        dataset = "fulfillments"
+    return store_raw_shopify_event(
+        dataset,
+        DATASETS[dataset],
+        fulfillment_data.get("id"),
+        fulfillment_data,
+        metadata,
+        event_type,
+        event_time,
+        object_metadata={
+            "event-type": (event_type or "unknown"),
+            "order-id": str(fulfillment_data.get("order_id") or "unknown"),
+        },
+    )
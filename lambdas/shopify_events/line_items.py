@@ -0,0 +1,109 @@
+"""Line-item fact items for SKU-level queries against the hot store.
+
+``enrich_order`` keeps line items as one JSON string on the order, so SKU questions
+otherwise need a scan. When ``LINE_ITEM_FACTS_ENABLED`` is set, the order processor also
+writes one compact item per line item to ``order-line-items``. Items are keyed by
+``sku`` and ``sold_at`` (UTC ``created_at`` plus ``#<line_item_id>``, so keys stay unique
+and sort by time). Writes go through ``batch_writer``. "Units sold of SKU X in the last
+24h" becomes a single Query (see ``units_sold``).
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from lambda_common.clients import lazy_resource
+from lambda_common.metrics import put_metric, stage
+
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+LINE_ITEMS_TABLE = os.environ.get("LINE_ITEMS_TABLE", f"{BRAND}-order-line-items")
+LINE_ITEM_FACTS_ENABLED = os.getenv("LINE_ITEM_FACTS_ENABLED", "false").lower() == "true"
+LINE_ITEM_TTL_DAYS = int(os.getenv("LINE_ITEM_TTL_DAYS", os.getenv("ORDERS_TTL_DAYS", "30")))
+
+
+def _utc(timestamp: Optional[str]) -> datetime:
+    if timestamp:
+        try:
+            return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).astimezone(timezone.utc)
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc)
+
+
+def sold_at_key(moment: datetime, line_item_id: Any = "") -> str:
+    # Fixed-width UTC keeps lexical order equal to time order whatever offset Shopify sent.
+    return f"{moment.strftime('%Y-%m-%dT%H:%M:%SZ')}#{line_item_id}"
+
+
+def line_item_facts(order_data: Dict[str, Any], enriched_order: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One fact per line item that has a SKU."""
+    sold_at = _utc(enriched_order.get("created_at"))
+    ttl = int((sold_at + timedelta(days=LINE_ITEM_TTL_DAYS)).timestamp())
+    facts = []
+    for item in order_data.get("line_items") or []:
+        if not item.get("sku"):
+            continue
+        fact = {
+            "sku": item["sku"],
+            "sold_at": sold_at_key(sold_at, item.get("id")),
+            "order_id": enriched_order["order_id"],
+            "line_item_id": str(item["id"]) if item.get("id") else None,
+            "variant_id": str(item["variant_id"]) if item.get("variant_id") else None,
+            "product_id": str(item["product_id"]) if item.get("product_id") else None,
+            "quantity": int(item.get("quantity") or 0),
+            "price": Decimal(str(item["price"])) if item.get("price") is not None else None,
+            "currency": enriched_order.get("currency"),
+            "is_subscription": enriched_order.get("is_subscription"),
+            "ttl": ttl,
+        }
+        facts.append({key: value for key, value in fact.items() if value is not None})
+    return facts
+
+
+def write_line_item_facts(order_data: Dict[str, Any], enriched_order: Dict[str, Any]) -> int:
+    """Put the order's facts, or delete them once the order is cancelled; return the count."""
+    if not LINE_ITEM_FACTS_ENABLED or enriched_order.get("test"):
+        return 0
+    facts = line_item_facts(order_data, enriched_order)
+    if not facts:
+        return 0
+
+    cancelled = bool(enriched_order.get("cancelled_at"))
+    table = dynamodb.Table(LINE_ITEMS_TABLE)
+    # batch_writer groups requests 25 at a time and resends unprocessed items.
+    with stage("dynamodb_batch_write"), table.batch_writer(overwrite_by_pkeys=["sku", "sold_at"]) as batch:
+        for fact in facts:
+            if cancelled:
+                batch.delete_item(Key={"sku": fact["sku"], "sold_at": fact["sold_at"]})
+            else:
+                batch.put_item(Item=fact)
+    put_metric("line_item_facts", len(facts))
+    return len(facts)
+
+
+def units_sold(sku: str, since: datetime, until: Optional[datetime] = None) -> int:
+    """Units of ``sku`` sold in ``[since, until)`` with one paginated Query."""
+    until = until or datetime.now(timezone.utc)
+    kwargs: Dict[str, Any] = {
+        "KeyConditionExpression": "sku = :sku AND sold_at BETWEEN :since AND :until",
+        "ExpressionAttributeValues": {
+            ":sku": sku,
+            ":since": sold_at_key(since.astimezone(timezone.utc)),
+            ":until": sold_at_key(until.astimezone(timezone.utc)),
+        },
+        "ProjectionExpression": "quantity",
+    }
+    return sum(int(item.get("quantity", 0)) for item in _query(kwargs))
+
+
+def _query(kwargs: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    table = dynamodb.Table(LINE_ITEMS_TABLE)
+    while True:
+        with stage("dynamodb_query"):
+            response = table.query(**kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
@@ -0,0 +1,304 @@
+"""Shopify order event processing."""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from lambda_common.clients import lazy_resource
+from lambda_common.concurrency import run_concurrently
+from lambda_common.customer360 import record_order
+from lambda_common.metrics import instrumented, set_topic, stage
+from lambda_common.serialization import dumps, to_dynamodb
+from lambda_common.subscriptions import SubscriptionClassifier
+from shopify_events.carts import mark_checkout_recovered
+from shopify_events.catalog import CATALOG
+from shopify_events.common import S3_BUCKET, extract_shopify_payload, store_raw_shopify_event
+from shopify_events.customer_cache import CUSTOMER_CACHE, apply_customer_profile
+from shopify_events.line_items import LINE_ITEM_FACTS_ENABLED, write_line_item_facts
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = lazy_resource("dynamodb")
+
+BRAND = os.environ["BRAND"]
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+
+TTL_DAYS = int(os.getenv("ORDERS_TTL_DAYS", "30"))
+SUBSCRIPTION_CLASSIFIER = SubscriptionClassifier.from_env()
+CUSTOMER_ENRICHMENT_ENABLED = os.getenv("CUSTOMER_ENRICHMENT_ENABLED", "true").lower() == "true"
+CATALOG_ENRICHMENT_ENABLED = os.getenv("CATALOG_ENRICHMENT_ENABLED", "true").lower() == "true"
+
+
+@instrumented()
+def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
+    """Process Shopify order events delivered by EventBridge."""
+    with stage("extract"):
+        order_data, metadata, event_type, event_time = extract_shopify_payload(event)
+    set_topic(event_type)
+    logger.info("Processing event %s", event_type)
+
+    if not order_data:
+        logger.warning("No order data in event detail")
+        return {"statusCode": 400, "body": "No order data"}
+
+    order_id = str(order_data.get("id"))
+
+    with stage("enrich"):
+        enriched_order = enrich_order(order_data, event_type)
+
+    if not enriched_order.get("created_at") and event_time:
+        enriched_order["created_at"] = event_time
+
+    def upsert_order() -> None:
+        attach_catalog_attributes(enriched_order, order_data.get("line_items") or [])
+        attach_customer_profiles([enriched_order])
+        store_in_dynamodb(enriched_order)
+
+    # The S3 archive and the DynamoDB upsert are independent, so issue them together. The
+    # catalog and customer lookups (usually in-memory hits) overlap with the archive write.
+    writes = [lambda: store_raw_event(order_data, metadata, event_type, event_time)]
+    if is_order_topic(event_type):
+        # Draft orders and the other topics routed here are not placed orders, so they
+        # stay out of the customer-360 totals and the line-item facts.
+        writes.append(lambda: record_order(enriched_order))
+    if event_type == "orders/create" and enriched_order.get("checkout_token"):
+        # The order closes out its checkout in abandoned-carts, if that checkout was tracked.
+        writes.append(lambda: mark_checkout_recovered(
+            enriched_order["checkout_token"], enriched_order.get("created_at"), enriched_order.get("order_id")
+        ))
+    upsert = bool(enriched_order.get("order_id")) and is_recent_order(enriched_order)
+    if upsert:
+        writes.append(upsert_order)
+        if LINE_ITEM_FACTS_ENABLED and is_order_topic(event_type):
+            writes.append(lambda: write_line_item_facts(order_data, enriched_order))
+
+    s3_key = run_concurrently(*writes)[0]
+    logger.info("Stored raw order event to s3://%s/%s", S3_BUCKET, s3_key)
+
+    if upsert:
+        logger.info("Stored order %s in DynamoDB", order_id)
+    else:
+        logger.debug("Skipping DynamoDB upsert for order payload lacking core identifiers")
+
+    return {
+        "statusCode": 200,
+        "body": dumps({
+            "order_id": order_id,
+            "s3_key": s3_key,
+            "event_type": event_type,
+        }),
+    }
+
+
+def store_raw_event(
+    order_data: Dict[str, Any],
+    metadata: Dict[str, Any],
+    event_type: Optional[str],
+    event_time: Optional[str],
+) -> str:
+    """Persist raw event to the immutable S3 bucket."""
+    order_id = order_data.get("id")
+    return store_raw_shopify_event(
+        "orders",
+        "event",
+        order_id,
+        order_data,
+        metadata,
+        event_type,
+        event_time,
+        object_metadata={
+            "event-type": (event_type or "unknown"),
+            "order-id": str(order_id or "unknown"),
+        },
+    )
+
+
+def enrich_order(order_data: Dict[str, Any], event_type: Optional[str]) -> Dict[str, Any]:
+    customer = order_data.get("customer", {})
+    shipping = order_data.get("shipping_address", {})
+    billing = order_data.get("billing_address", {})
+
+    def _decimal(value: Any) -> Decimal:
+        if value is None:
+            return Decimal("0")
+        if isinstance(value, (int, float, Decimal)):
+            return Decimal(str(value))
+        return Decimal(str(value or "0"))
+
+    is_subscription, subscription_type = SUBSCRIPTION_CLASSIFIER.classify(order_data)
+
+    enriched: Dict[str, Any] = {
+        "order_id": str(order_data.get("id")),
+        "order_number": str(order_data.get("order_number")) if order_data.get("order_number") is not None else None,
+        "created_at": order_data.get("created_at"),
+        "updated_at": order_data.get("updated_at"),
+        "processed_at": order_data.get("processed_at"),
+        "closed_at": order_data.get("closed_at"),
+        "customer_id": str(customer.get("id")) if customer.get("id") else None,
+        "customer_email": customer.get("email"),
+        "customer_first_name": customer.get("first_name"),
+        "customer_last_name": customer.get("last_name"),
+        "customer_phone": customer.get("phone") or shipping.get("phone"),
+        "customer_created_at": customer.get("created_at"),
+        "customer_orders_count": customer.get("orders_count"),
+        "customer_total_spent": customer.get("total_spent"),
+        "customer_tags": customer.get("tags"),
+        "customer_accepts_marketing": customer.get("accepts_marketing"),
+        "customer_marketing_opt_in_level": customer.get("marketing_opt_in_level"),
+        "total_price": _decimal(order_data.get("total_price")),
+        "subtotal_price": _decimal(order_data.get("subtotal_price")),
+        "total_discounts": _decimal(order_data.get("total_discounts")),
+        "total_tax": _decimal(order_data.get("total_tax")),
+        "total_shipping": _decimal(order_data.get("total_shipping_price_set", {}).get("shop_money", {}).get("amount")),
+        "total_line_items_price": _decimal(order_data.get("total_line_items_price")),
+        "currency": order_data.get("currency", "USD"),
+        "financial_status": order_data.get("financial_status"),
+        "fulfillment_status": order_data.get("fulfillment_status"),
+        "cancelled_at": order_data.get("cancelled_at"),
+        "cancel_reason": order_data.get("cancel_reason"),
+        "confirmed": order_data.get("confirmed"),
+        "test": order_data.get("test", False),
+        "shipping_city": shipping.get("city"),
+        "shipping_state": shipping.get("province"),
+        "shipping_zip": shipping.get("zip"),
+        "shipping_country": shipping.get("country"),
+        "shipping_address_1": shipping.get("address1"),
+        "shipping_address_2": shipping.get("address2"),
+        "shipping_company": shipping.get("company"),
+        "shipping_name": shipping.get("name"),
+        "billing_city": billing.get("city"),
+        "billing_state": billing.get("province"),
+        "billing_zip": billing.get("zip"),
+        "billing_country": billing.get("country"),
+        "billing_address_1": billing.get("address1"),
+        "billing_address_2": billing.get("address2"),
+        "billing_company": billing.get("company"),
+        "billing_name": billing.get("name"),
+        "source_name": order_data.get("source_name"),
+        "source_identifier": order_data.get("source_identifier"),
+        "source_url": order_data.get("source_url"),
+        "referring_site": order_data.get("referring_site"),
+        "landing_site": order_data.get("landing_site"),
+        "landing_site_ref": order_data.get("landing_site_ref"),
+        "checkout_token": order_data.get("checkout_token"),
+        "cart_token": order_data.get("cart_token"),
+        "discount_codes": dumps(order_data.get("discount_codes", [])),
+        "discount_applications": dumps(order_data.get("discount_applications", [])),
+        "tags": order_data.get("tags", ""),
+        "note": order_data.get("note"),
+        "note_attributes": dumps(order_data.get("note_attributes", [])),
+        "gateway": order_data.get("gateway"),
+        "payment_gateway_names": dumps(order_data.get("payment_gateway_names", [])),
+        "processing_method": order_data.get("processing_method"),
+        "is_subscription": is_subscription,
+        "subscription_type": subscription_type,
+        "fulfillments": dumps(order_data.get("fulfillments", [])),
+        "refunds": dumps(order_data.get("refunds", [])),
+        "line_items": dumps(order_data.get("line_items", []), default=str),
+        "line_item_count": len(order_data.get("line_items", [])),
+        "total_quantity": sum(item.get("quantity", 0) for item in order_data.get("line_items", [])),
+        "event_type": event_type,
+        "_ingested_at": datetime.now(timezone.utc).isoformat(),
+        "_brand": BRAND,
+    }
+
+    return {k: v for k, v in enriched.items() if v is not None}
+
+
+def attach_catalog_attributes(enriched_order: Dict[str, Any], line_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add product type, vendor and cost for line items found in the catalog snapshot."""
+    if not CATALOG_ENRICHMENT_ENABLED or not line_items:
+        return enriched_order
+
+    CATALOG.refresh()
+    matched = []
+    total_cost = Decimal("0")
+    costed = 0
+    for item in line_items:
+        attrs = CATALOG.lookup(item.get("variant_id"), item.get("sku"))
+        if attrs is None:
+            continue
+        quantity = item.get("quantity", 0)
+        matched.append({
+            "variant_id": str(item.get("variant_id")),
+            "sku": item.get("sku"),
+            "quantity": quantity,
+            **{field: attrs[field] for field in ("product_id", "product_type", "vendor", "cost") if field in attrs},
+        })
+        if attrs.get("cost") is not None:
+            total_cost += Decimal(str(attrs["cost"])) * quantity
+            costed += 1
+
+    if matched:
+        enriched_order["line_item_catalog"] = dumps(matched)
+        enriched_order["product_types"] = sorted({entry["product_type"] for entry in matched if entry.get("product_type")})
+        enriched_order["catalog_version"] = CATALOG.version
+    if costed and costed == len(line_items):
+        enriched_order["total_cost"] = total_cost
+    return enriched_order
+
+
+def attach_customer_profiles(enriched_orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill sparse customer fields from the customers-cache profile (best effort)."""
+    if not CUSTOMER_ENRICHMENT_ENABLED:
+        return enriched_orders
+
+    customer_ids = [order["customer_id"] for order in enriched_orders if order.get("customer_id")]
+    if not customer_ids:
+        return enriched_orders
+
+    try:
+        with stage("customer_lookup"):
+            profiles = CUSTOMER_CACHE.get_many(customer_ids)
+    except Exception:  # noqa: BLE001 - enrichment must never fail the event
+        logger.warning("Customer profile lookup failed; storing orders without it", exc_info=True)
+        return enriched_orders
+
+    for order in enriched_orders:
+        apply_customer_profile(order, profiles.get(order.get("customer_id")))
+    return enriched_orders
+
+
+def is_order_topic(event_type: Optional[str]) -> bool:
+    return (event_type or "").startswith("orders/")
+
+
+def is_subscription_order(order_data: Dict[str, Any]) -> bool:
+    return SUBSCRIPTION_CLASSIFIER.classify(order_data)[0]
+
+
+def get_subscription_type(order_data: Dict[str, Any]) -> Optional[str]:
+    return SUBSCRIPTION_CLASSIFIER.classify(order_data)[1]
+
+
+def is_recent_order(order_data: Dict[str, Any]) -> bool:
+    created_at = order_data.get("created_at")
+    if not created_at:
+        return True
+
+    try:
+        created_dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    except ValueError:
+        logger.warning("Invalid created_at timestamp %s", created_at)
+        return True
+
+    return created_dt >= datetime.now(timezone.utc) - timedelta(days=TTL_DAYS)
+
+
+def build_dynamodb_item(order_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the orders-cache item for an enriched order (TTL set, floats as Decimal)."""
+    ttl = int((datetime.now(timezone.utc) + timedelta(days=TTL_DAYS)).timestamp())
+    item = {
+        **order_data,
+        "ttl": ttl,
+    }
+    return to_dynamodb(item)
+
+
+def store_in_dynamodb(order_data: Dict[str, Any]) -> None:
+    table = dynamodb.Table(DYNAMODB_TABLE)
+
+    with stage("dynamodb_put"):
+        table.put_item(Item=build_dynamodb_item(order_data))
@@ -0,0 +1,65 @@
+"""Shopify product event processing."""
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from lambda_common.concurrency import run_concurrently
+from lambda_common.metrics import instrumented, set_topic, stage
+from lambda_common.serialization import dumps
+from shopify_events.catalog import delete_variants, product_variant_ids, publish_snapshot, update_inventory_item_cost, upsert_product
+from shopify_events.common import S3_BUCKET, extract_shopify_payload, store_raw_shopify_event
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+@instrumented()
+def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
+    if event.get("detail-type") == "Scheduled Event":
+        # EventBridge schedule: publish a fresh catalog snapshot for consumers.
+        set_topic("catalog/snapshot")
+        manifest = publish_snapshot()
+        return {"statusCode": 200, "body": dumps({"published": manifest})}
+
+    with stage("extract"):
+        product_data, metadata, event_type, event_time = extract_shopify_payload(event)
+    set_topic(event_type)
+    logger.info("Processing product event %s", event_type)
+
+    if not product_data:
+        logger.warning("No product data in event detail")
+        return {"statusCode": 400, "body": "No product data"}
+
+    product_id = str(product_data.get("id"))
+
+    writes: List[Callable[[], Any]] = [lambda: store_raw_product_event(product_data, metadata, event_type, event_time)]
+    catalog_update = catalog_update_for(event_type, product_data)
+    if catalog_update:
+        writes.append(catalog_update)
+
+    s3_key = run_concurrently(*writes)[0]
+    logger.info("Stored product event to s3://%s/%s", S3_BUCKET, s3_key)
+
+    return {"statusCode": 200, "body": dumps({"product_id": product_id})}
+
+
+def store_raw_product_event(
+    product_data: Dict[str, Any],
+    metadata: Dict[str, Any],
+    event_type: Optional[str],
+    event_time: Optional[str],
+) -> str:
+    return store_raw_shopify_event(
+        "products", "product", product_data.get("id"), product_data, metadata, event_type, event_time
+    )
+
+
+def catalog_update_for(event_type: Optional[str], product_data: Dict[str, Any]) -> Optional[Callable[[], Any]]:
+    """Return the catalog write for topics that change variant attributes, if any."""
+    if event_type in {"products/create", "products/update"}:
+        # A new product has no previously stored variants to prune.
+        return lambda: upsert_product(product_data, prune=event_type == "products/update")
+    if event_type == "products/delete":
+        return lambda: delete_variants(product_variant_ids(str(product_data.get("id"))))
+    if event_type in {"inventory_items/create", "inventory_items/update"}:
+        return lambda: update_inventory_item_cost(product_data)
+    return None
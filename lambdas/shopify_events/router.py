@@ -0,0 +1,60 @@
+"""Topic-routed entry point that serves every Shopify webhook from one Lambda.
+
+Routing one function keeps a single warm pool for all topics instead of one per
+entity. The table mirrors the topic prefixes of the per-entity EventBridge rules in
+``infrastructure/shopify/eventbridge-rules.yaml``.
+"""
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from lambda_common.metrics import instrumented, set_topic
+from shopify_events import carts, customers, fulfillments, orders, products
+from shopify_events.common import extract_shopify_payload
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+Handler = Callable[[Dict[str, Any], Any], Dict[str, Any]]
+
+ROUTES: Dict[str, Handler] = {
+    "orders/*": orders.handler,
+    "draft_orders/*": orders.handler,
+    "refunds/*": orders.handler,
+    "returns/*": orders.handler,
+    "disputes/*": orders.handler,
+    "subscription_contracts/*": orders.handler,
+    "subscription_billing_attempts/*": orders.handler,
+    "subscription_billing_cycle_edits/*": orders.handler,
+    "subscription_billing_cycles/*": orders.handler,
+    "bulk_operations/*": orders.handler,
+    "fulfillments/*": fulfillments.handler,
+    "fulfillment_orders/*": fulfillments.handler,
+    "customers/*": customers.handler,
+    "customer_payment_methods/*": customers.handler,
+    "checkouts/*": carts.handler,
+    "carts/*": carts.handler,
+    "products/*": products.handler,
+    "inventory_items/*": products.handler,
+    "inventory_levels/*": products.handler,
+    "locations/*": products.handler,
+    "markets/*": products.handler,
+}
+
+
+def resolve_route(topic: Optional[str]) -> Optional[Handler]:
+    if not topic:
+        return None
+    return ROUTES.get(f"{topic.split('/', 1)[0]}/*")
+
+
+@instrumented()
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    _, _, topic, _ = extract_shopify_payload(event)
+    set_topic(topic)
+    route = resolve_route(topic)
+
+    if route is None:
+        logger.warning("No route for Shopify topic %s", topic)
+        return {"statusCode": 400, "body": f"Unsupported topic {topic}"}
+
+    return route(event, context)
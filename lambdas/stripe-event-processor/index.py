@@ -1,19 +1,28 @@
 """Stripe Payment Event Processor"""
-import json
 import logging
 import os
 from datetime import datetime, timezone
-from typing import Any, Dict
-
-import boto3
-import stripe
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from lambda_common import event_claims
+from lambda_common.alerts import publish_alert
+from lambda_common.clients import is_conditional_check_failure, lazy_client, lazy_resource
+from lambda_common.compression import compress_body
+from lambda_common.concurrency import run_concurrently
+from lambda_common.customer360 import customer_key, record_dispute, record_failed_charge
+from lambda_common.metrics import instrumented, put_metric, set_topic, stage
+from lambda_common.partition_counts import count_raw_event, entity_for
+from lambda_common.payment_intents import failed_day, record_charge_attempt, record_payment_intent
+from lambda_common.raw_keys import raw_partition
+from lambda_common.serialization import dumps_bytes
+from lambda_common.stripe_webhook import SignatureVerificationError, construct_event
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
-sns = boto3.client("sns")
+s3 = lazy_client("s3")
+dynamodb = lazy_resource("dynamodb")
 
 BRAND = os.environ["BRAND"]
 S3_BUCKET = os.environ["S3_BUCKET"]
@@ -22,43 +31,115 @@ ALERT_TOPIC_ARN = os.environ.get("ALERT_TOPIC_ARN")
 PAYMENT_ATTEMPTS_TABLE = os.environ.get("PAYMENT_ATTEMPTS_TABLE", f"{BRAND}-payment-attempts")
 INVOICE_PAYMENTS_TABLE = os.environ.get("INVOICE_PAYMENTS_TABLE", f"{BRAND}-invoice-payments")
 DISPUTES_TABLE = os.environ.get("DISPUTES_TABLE", f"{BRAND}-disputes")
+STRIPE_WEBHOOK_TOLERANCE = int(os.getenv("STRIPE_WEBHOOK_TOLERANCE", "300"))
+STRIPE_EVENTS_TABLE = os.environ.get("STRIPE_EVENTS_TABLE", f"{BRAND}-stripe-events")
+# Stripe retries failed deliveries for up to three days; keep claims comfortably longer.
+STRIPE_EVENT_DEDUPE_TTL_DAYS = int(os.getenv("STRIPE_EVENT_DEDUPE_TTL_DAYS", "7"))
+# How long a claim blocks other deliveries; keep it above the function timeout.
+STRIPE_EVENT_LEASE_SECONDS = int(os.getenv("STRIPE_EVENT_LEASE_SECONDS", "120"))
 
-stripe.api_key = os.environ["STRIPE_API_KEY"]
+# Only overwrite a stored item with an event at least as new as the one that wrote it.
+NEWER_EVENT_CONDITION = "attribute_not_exists(event_created) OR event_created <= :event_created"
 
 
+@instrumented("stripe-event-processor")
 def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
     signature = event.get("headers", {}).get("stripe-signature")
     body = event.get("body", "")
 
     try:
-        stripe_event = stripe.Webhook.construct_event(body, signature, STRIPE_WEBHOOK_SECRET)
+        with stage("extract"):
+            stripe_event = construct_event(body, signature, STRIPE_WEBHOOK_SECRET, STRIPE_WEBHOOK_TOLERANCE)
+    except SignatureVerificationError:
+        logger.warning("Invalid Stripe webhook signature")
+        return {"statusCode": 401}
     except ValueError:
         logger.warning("Invalid Stripe webhook payload")
         return {"statusCode": 400}
-    except stripe.error.SignatureVerificationError:
-        logger.warning("Invalid Stripe webhook signature")
-        return {"statusCode": 401}
 
     event_type = stripe_event["type"]
     payload = stripe_event["data"]["object"]
+    event_created = int(stripe_event.get("created") or 0)
+    set_topic(event_type)
+
+    claim = claim_event(stripe_event)
+    if claim == event_claims.DUPLICATE:
+        logger.info("Skipping duplicate Stripe event %s", stripe_event.get("id"))
+        put_metric("duplicate_events", 1)
+        return {"statusCode": 200}
+    if claim == event_claims.IN_PROGRESS:
+        # Another delivery holds the lease; a non-2xx makes Stripe retry after it finishes or expires.
+        logger.info("Stripe event %s is already being processed", stripe_event.get("id"))
+        put_metric("in_flight_events", 1)
+        return {"statusCode": 409}
 
     logger.info("Processing Stripe event %s", event_type)
 
-    s3_key = store_raw_event(stripe_event, event_type)
-    logger.debug("Stored Stripe event in %s", s3_key)
-
+    writes = [lambda: store_raw_event(stripe_event, event_type)]
     if "charge" in event_type and "dispute" not in event_type:
-        handle_charge(payload, event_type)
+        writes.append(lambda: handle_charge(payload, event_type, event_created))
+        writes.append(lambda: record_charge_attempt(payload, event_type))
     elif "payment_intent" in event_type:
-        handle_payment_intent(payload, event_type)
+        writes.append(lambda: handle_payment_intent(payload, event_type, event_created))
     elif "invoice" in event_type:
-        handle_invoice(payload, event_type)
+        writes.append(lambda: handle_invoice(payload, event_type, event_created))
     elif "dispute" in event_type:
-        handle_dispute(payload, event_type)
+        writes.append(lambda: handle_dispute(payload, event_type, event_created))
+
+    try:
+        s3_key = run_concurrently(*writes)[0]
+    except Exception:
+        # Let Stripe's retry of this event through instead of acknowledging it as a duplicate.
+        release_event(stripe_event)
+        raise
+    complete_event(stripe_event)
+    logger.debug("Stored Stripe event in %s", s3_key)
 
     return {"statusCode": 200}
 
 
+def claim_event(stripe_event: Dict[str, Any]) -> str:
+    """Lease the event id; see ``lambda_common.event_claims`` for the possible outcomes."""
+    if not stripe_event.get("id"):
+        return event_claims.CLAIMED
+    return event_claims.claim(
+        STRIPE_EVENTS_TABLE,
+        stripe_event["id"],
+        STRIPE_EVENT_LEASE_SECONDS,
+        STRIPE_EVENT_DEDUPE_TTL_DAYS,
+        event_type=stripe_event.get("type"),
+        created=int(stripe_event.get("created") or 0),
+    )
+
+
+def complete_event(stripe_event: Dict[str, Any]) -> None:
+    if stripe_event.get("id"):
+        event_claims.complete(STRIPE_EVENTS_TABLE, stripe_event["id"])
+
+
+def release_event(stripe_event: Dict[str, Any]) -> None:
+    if stripe_event.get("id"):
+        event_claims.release(STRIPE_EVENTS_TABLE, stripe_event["id"])
+
+
+def put_if_newer(table: Any, item: Dict[str, Any]) -> bool:
+    """Put ``item`` unless the stored one was written by a newer event; return whether it was applied."""
+    try:
+        with stage("dynamodb_put"):
+            table.put_item(
+                Item=item,
+                ConditionExpression=NEWER_EVENT_CONDITION,
+                ExpressionAttributeValues={":event_created": item["event_created"]},
+            )
+    except Exception as exc:
+        if is_conditional_check_failure(exc):
+            logger.info("Ignoring out-of-order %s (created %s) for %s", item["event_type"], item["event_created"], table.name)
+            put_metric("stale_events", 1)
+            return False
+        raise
+    return True
+
+
 def store_raw_event(stripe_event: Dict[str, Any], event_type: str) -> str:
     now = datetime.now(timezone.utc)
 
@@ -74,34 +155,48 @@ def store_raw_event(stripe_event: Dict[str, Any], event_type: str) -> str:
         prefix = "raw/stripe/other/events/"
 
     event_id = stripe_event.get("id", "unknown")
-    s3_key = f"{prefix}date={now.strftime('%Y-%m-%d')}/hour={now.strftime('%H')}/" \
+    s3_key = f"{prefix}{raw_partition(now, event_id)}" \
              f"{event_type.replace('.', '-')}-{event_id}-{now.strftime('%Y%m%d%H%M%S')}.json"
 
-    s3.put_object(
-        Bucket=S3_BUCKET,
-        Key=s3_key,
-        Body=json.dumps(stripe_event, default=str),
-        ContentType="application/json",
-    )
+    body = dumps_bytes(stripe_event, default=str)
+    with stage("compress"):
+        payload, encoding, suffix = compress_body(body)
+    s3_key += suffix
+
+    with stage("s3_put"):
+        s3.put_object(
+            Bucket=S3_BUCKET,
+            Key=s3_key,
+            Body=payload,
+            ContentType="application/json",
+            **encoding,
+        )
+    put_metric("s3_put_bytes", len(payload), "Bytes")
+    count_raw_event(entity_for(prefix), now)
 
     return s3_key
 
 
-def handle_charge(charge: Dict[str, Any], event_type: str) -> None:
+def handle_charge(charge: Dict[str, Any], event_type: str, event_created: int = 0) -> None:
     table = dynamodb.Table(PAYMENT_ATTEMPTS_TABLE)
 
     item = {
         "charge_id": charge["id"],
         "customer_id": charge.get("customer"),
-        "amount": charge["amount"] / 100,
+        "amount": Decimal(charge["amount"]) / 100,
         "currency": charge["currency"].upper(),
         "status": charge["status"],
         "paid": charge.get("paid"),
         "failure_code": charge.get("failure_code"),
         "failure_message": charge.get("failure_message"),
         "payment_method": charge.get("payment_method"),
+        "payment_intent_id": charge.get("payment_intent"),
+        "invoice_id": charge.get("invoice"),
+        # Sparse key of failed-day-index: only failed charges are in it.
+        "failed_day": failed_day(charge["created"]) if charge["status"] == "failed" else None,
         "created": datetime.fromtimestamp(charge["created"], tz=timezone.utc).isoformat(),
         "event_type": event_type,
+        "event_created": event_created,
         "_updated_at": datetime.now(timezone.utc).isoformat(),
     }
 
@@ -111,60 +206,87 @@ def handle_charge(charge: Dict[str, Any], event_type: str) -> None:
         item["shopify_customer_id"] = metadata.get("customer_id")
 
     item = {k: v for k, v in item.items() if v is not None}
-    table.put_item(Item=item)
-
-    if event_type == "charge.failed" and charge["amount"] > 10000:
-        publish_high_value_failure(charge)
-
-
-def handle_payment_intent(payment_intent: Dict[str, Any], event_type: str) -> None:
+    put_if_newer(table, item)
+
+    # Failures are still recorded when stale: record_failed_charge keeps its own ordering guard.
+    if event_type == "charge.failed":
+        record_failed_charge(
+            customer_key(item.get("shopify_customer_id"), "stripe", charge.get("customer")),
+            "stripe",
+            charge["id"],
+            item["created"],
+            amount=item["amount"],
+            failure_code=charge.get("failure_code"),
+            failure_message=charge.get("failure_message"),
+        )
+        if charge["amount"] > 10000:
+            publish_high_value_failure(charge)
+
+
+def handle_payment_intent(payment_intent: Dict[str, Any], event_type: str, event_created: int = 0) -> None:
     logger.debug("Payment intent %s status %s", payment_intent["id"], payment_intent["status"])
+    record_payment_intent(payment_intent, event_type, event_created)
 
 
-def handle_invoice(invoice: Dict[str, Any], event_type: str) -> None:
+def handle_invoice(invoice: Dict[str, Any], event_type: str, event_created: int = 0) -> None:
     table = dynamodb.Table(INVOICE_PAYMENTS_TABLE)
 
     item = {
         "invoice_id": invoice["id"],
         "subscription_id": invoice.get("subscription"),
         "customer_id": invoice.get("customer"),
-        "amount_due": invoice["amount_due"] / 100,
-        "amount_paid": invoice.get("amount_paid", 0) / 100,
-        "amount_remaining": invoice.get("amount_remaining", 0) / 100,
+        "amount_due": Decimal(invoice["amount_due"]) / 100,
+        "amount_paid": Decimal(invoice.get("amount_paid", 0)) / 100,
+        "amount_remaining": Decimal(invoice.get("amount_remaining", 0)) / 100,
         "currency": invoice["currency"].upper(),
         "status": invoice.get("status"),
         "attempt_count": invoice.get("attempt_count", 0),
         "next_payment_attempt": datetime.fromtimestamp(invoice["next_payment_attempt"], tz=timezone.utc).isoformat() if invoice.get("next_payment_attempt") else None,
         "created": datetime.fromtimestamp(invoice["created"], tz=timezone.utc).isoformat(),
         "event_type": event_type,
+        "event_created": event_created,
         "_updated_at": datetime.now(timezone.utc).isoformat(),
     }
 
     item = {k: v for k, v in item.items() if v is not None}
-    table.put_item(Item=item)
+    put_if_newer(table, item)
 
 
-def handle_dispute(dispute: Dict[str, Any], event_type: str) -> None:
+def handle_dispute(dispute: Dict[str, Any], event_type: str, event_created: int = 0) -> None:
     table = dynamodb.Table(DISPUTES_TABLE)
 
     item = {
         "dispute_id": dispute["id"],
         "charge_id": dispute.get("charge"),
-        "amount": dispute["amount"] / 100,
+        "amount": Decimal(dispute["amount"]) / 100,
         "currency": dispute["currency"].upper(),
         "reason": dispute.get("reason"),
         "status": dispute.get("status"),
         "created": datetime.fromtimestamp(dispute["created"], tz=timezone.utc).isoformat(),
         "event_type": event_type,
+        "event_created": event_created,
         "_updated_at": datetime.now(timezone.utc).isoformat(),
     }
 
     item = {k: v for k, v in item.items() if v is not None}
-    table.put_item(Item=item)
-
+    if put_if_newer(table, item):
+        # A stale status would reopen or close the dispute on the customer-360 item.
+        record_dispute(dispute_customer_key(dispute), dispute)
     publish_dispute_alert(dispute, event_type)
 
 
+def dispute_customer_key(dispute: Dict[str, Any]) -> Optional[str]:
+    """Disputes only reference the charge, so resolve the customer from its payment attempt."""
+    if not dispute.get("charge"):
+        return None
+    with stage("dynamodb_get"):
+        attempt = dynamodb.Table(PAYMENT_ATTEMPTS_TABLE).get_item(
+            Key={"charge_id": dispute["charge"]},
+            ProjectionExpression="customer_id, shopify_customer_id",
+        ).get("Item") or {}
+    return customer_key(attempt.get("shopify_customer_id"), "stripe", attempt.get("customer_id"))
+
+
 def publish_high_value_failure(charge: Dict[str, Any]) -> None:
     if not ALERT_TOPIC_ARN:
         return
@@ -177,10 +299,13 @@ def publish_high_value_failure(charge: Dict[str, Any]) -> None:
         f"Failure: {charge.get('failure_code')} - {charge.get('failure_message')}\n"
     )
 
-    sns.publish(
-        TopicArn=ALERT_TOPIC_ARN,
-        Subject=f"High-Value Payment Failure ${charge['amount'] / 100:.2f}",
-        Message=message,
+    publish_alert(
+        "stripe_high_value_failure",
+        f"High-Value Payment Failure ${charge['amount'] / 100:.2f}",
+        message,
+        group=charge.get("failure_code"),
+        example_id=charge["id"],
+        topic_arn=ALERT_TOPIC_ARN,
     )
 
 
@@ -198,9 +323,12 @@ def publish_dispute_alert(dispute: Dict[str, Any], event_type: str) -> None:
         f"Event: {event_type}\n"
     )
 
-    sns.publish(
-        TopicArn=ALERT_TOPIC_ARN,
-        Subject=f"Stripe Dispute ${dispute['amount'] / 100:.2f}",
-        Message=message,
+    publish_alert(
+        "stripe_dispute",
+        f"Stripe Dispute ${dispute['amount'] / 100:.2f}",
+        message,
+        group=dispute.get("reason"),
+        example_id=f"{dispute['id']}:{event_type}",
+        topic_arn=ALERT_TOPIC_ARN,
     )
 
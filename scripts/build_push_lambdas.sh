@@ -17,11 +17,13 @@ DEFAULT_LAMBDAS=(
   shopify-customer-processor
   shopify-product-processor
   shopify-cart-processor
+  shopify-event-processor
   recharge-event-processor
   shopify-bulk-export
   shopify-bulk-poll
   shopify-bulk-download
   data-quality-checker
+  alert-digest
 )
 
 if [[ -n "${LAMBDA_DIRS:-}" ]]; then
@@ -64,7 +66,7 @@ for dir in "${LAMBDA_DIRS_ARRAY[@]}"; do
   IMAGE_URI="$ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com/$REPO_NAME:$IMAGE_TAG"
 
   echo "Building $dir"
-  docker build --platform linux/amd64 -t "$IMAGE_URI" "lambdas/$dir"
+  docker build --platform linux/amd64 -f "lambdas/$dir/Dockerfile" -t "$IMAGE_URI" lambdas
   docker push "$IMAGE_URI"
   echo "$dir -> $IMAGE_URI"
 
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Replay archived Shopify order webhooks from S3 into the orders-cache table.
+
+Raw events under ``raw/shopify/orders/events/date=…/hour=…/`` (plain or compressed) are listed hour by hour
+(prefixes listed concurrently, each one paginated) and fetched with a thread pool. They
+are then run through the order processor's own ``enrich_order`` and written with
+rate-limited ``BatchWriteItem`` calls. Hours are applied in chronological order. Within
+an hour only the newest event per order is kept, so the replayed item matches what the
+live processor would have left behind.
+
+Progress is checkpointed after every hour, so an interrupted run picks up where it
+stopped when it is started again with the same ``--checkpoint`` file. An hour with objects
+that could not be read is not checkpointed, and the run stops there so later hours are
+never applied ahead of it; re-running retries that hour. ``--dry-run``
+writes each hour's items to local Parquet instead of DynamoDB.
+
+    python scripts/replay_raw_events.py --bucket marsmen-data-lake-631046354185 --start 2024-06-01 --end 2024-06-07
+    python scripts/replay_raw_events.py --bucket ... --start 2024-06-01T05 --end 2024-06-01T09 --dry-run --output replay-out
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+LAMBDAS_ROOT = Path(__file__).resolve().parents[1] / "lambdas"
+sys.path.insert(0, str(LAMBDAS_ROOT))
+
+from lambda_common.compression import decompress_body  # noqa: E402
+from lambda_common.raw_keys import hour_prefix  # noqa: E402
+
+DEFAULT_PROFILE = os.environ.get("AWS_PROFILE", "marsmen-direct")
+RAW_PREFIX = "raw/shopify/orders/events/"
+BATCH_SIZE = 25  # BatchWriteItem limit
+
+
+class RateLimiter:
+    """Token bucket shared by the writer threads (``rate`` items per second)."""
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Checkpoint:
+    """Completed hours and running totals persisted to a local JSON file."""
+
+    def __init__(self, path: Optional[Path]) -> None:
+        self.path = path
+        self.completed: set = set()
+        self.totals: Dict[str, int] = {"objects": 0, "written": 0, "skipped": 0}
+        if path and path.exists():
+            state = json.loads(path.read_text(encoding="utf-8"))
+            self.completed = set(state.get("completed_hours", []))
+            self.totals.update((key, value) for key, value in state.get("totals", {}).items() if key in self.totals)
+
+    def mark(self, hour: str, stats: Dict[str, int]) -> None:
+        self.completed.add(hour)
+        for key, value in stats.items():
+            self.totals[key] = self.totals.get(key, 0) + value
+        if not self.path:
+            return
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps({"completed_hours": sorted(self.completed), "totals": self.totals}, indent=2),
+            encoding="utf-8",
+        )
+        tmp.replace(self.path)
+
+
+def parse_bound(value: str, end: bool) -> dt.datetime:
+    """Accept ``YYYY-MM-DD`` (whole day) or ``YYYY-MM-DDTHH`` (single hour), inclusive."""
+    if "T" in value:
+        return dt.datetime.strptime(value, "%Y-%m-%dT%H")
+    day = dt.datetime.strptime(value, "%Y-%m-%d")
+    return day.replace(hour=23) if end else day
+
+
+def iter_hours(start: dt.datetime, end: dt.datetime) -> Iterator[dt.datetime]:
+    current = start
+    while current <= end:
+        yield current
+        current += dt.timedelta(hours=1)
+
+
+def list_keys(s3: Any, bucket: str, prefix: str) -> List[str]:
+    keys: List[str] = []
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        keys.extend(obj["Key"] for obj in page.get("Contents", []))
+    return keys
+
+
+def fetch_event(s3: Any, bucket: str, key: str) -> Dict[str, Any]:
+    body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    return json.loads(decompress_body(body))
+
+
+def enrich_events(orders: Any, raw_events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Enrich raw events as the order processor does, keeping the newest event per order."""
+    latest: Dict[Any, Dict[str, Any]] = {}
+    skipped = 0
+    for raw in raw_events:
+        order_data = raw.get("data") or {}
+        event_time = raw.get("event_time")
+        enriched = orders.enrich_order(order_data, raw.get("event_type"))
+        if not enriched.get("created_at") and event_time:
+            enriched["created_at"] = event_time
+        if not order_data or not enriched.get("order_id") or not orders.is_recent_order(enriched):
+            skipped += 1
+            continue
+        orders.attach_catalog_attributes(enriched, order_data.get("line_items") or [])
+
+        key = (enriched["order_id"], enriched["created_at"])
+        rank = (enriched.get("updated_at") or "", event_time or "")
+        current = latest.get(key)
+        if current is None or rank >= current["rank"]:
+            latest[key] = {"rank": rank, "item": enriched}
+    items = orders.attach_customer_profiles([entry["item"] for entry in latest.values()])
+    return {"items": items, "skipped": skipped}
+
+
+def write_batches(dynamodb: Any, table_name: str, items: List[Dict[str, Any]], limiter: RateLimiter, workers: int) -> int:
+    def write(batch: List[Dict[str, Any]]) -> int:
+        limiter.acquire(len(batch))
+        request = {table_name: [{"PutRequest": {"Item": item}} for item in batch]}
+        attempt = 0
+        while request:
+            response = dynamodb.batch_write_item(RequestItems=request)
+            request = response.get("UnprocessedItems") or {}
+            if request:
+                attempt += 1
+                if attempt > 8:
+                    raise RuntimeError(f"{len(request[table_name])} items still unprocessed after retries")
+                time.sleep(min(0.05 * 2 ** attempt, 5))
+        return len(batch)
+
+    batches = [items[i:i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(write, batches))
+
+
+def write_parquet(items: List[Dict[str, Any]], output: Path, hour: dt.datetime) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = [json.loads(json.dumps(item, default=lambda v: float(v) if isinstance(v, Decimal) else str(v))) for item in items]
+    path = output / f"date={hour.strftime('%Y-%m-%d')}" / f"hour={hour.strftime('%H')}.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows), path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", required=True, help="First hour: YYYY-MM-DD or YYYY-MM-DDTHH (UTC)")
+    parser.add_argument("--end", required=True, help="Last hour, inclusive: YYYY-MM-DD or YYYY-MM-DDTHH (UTC)")
+    parser.add_argument("--brand", default=os.environ.get("BRAND", "marsmen"))
+    parser.add_argument("--bucket", required=True, help="Data lake bucket, e.g. marsmen-data-lake-631046354185")
+    parser.add_argument("--table", help="Orders cache table (default: <brand>-orders-cache)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="AWS profile")
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent S3 GETs")
+    parser.add_argument("--list-workers", type=int, default=8, help="Hour prefixes listed concurrently")
+    parser.add_argument("--write-workers", type=int, default=4, help="Concurrent BatchWriteItem calls")
+    parser.add_argument("--write-rate", type=float, default=200, help="Max items written per second (0 = unlimited)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: replay-<start>-<end>.checkpoint.json)")
+    parser.add_argument("--dry-run", action="store_true", help="Write Parquet under --output instead of DynamoDB")
+    parser.add_argument("--output", default="replay-output", help="Dry-run output directory")
+    args = parser.parse_args(argv)
+
+    bucket = args.bucket
+    table_name = args.table or f"{args.brand}-orders-cache"
+    start, end = parse_bound(args.start, end=False), parse_bound(args.end, end=True)
+    checkpoint_path = Path(args.checkpoint or f"replay-{args.start}-{args.end}{'-dry-run' if args.dry_run else ''}.checkpoint.json")
+
+    # The processor modules read their configuration at import time.
+    os.environ.update({"BRAND": args.brand, "S3_BUCKET": bucket, "DYNAMODB_TABLE": table_name, "EMF_METRICS_ENABLED": "false"})
+    if args.profile:
+        os.environ["AWS_PROFILE"] = args.profile  # shared Lambda clients (customer profile lookups)
+    import boto3
+    from botocore.config import Config
+
+    from shopify_events import orders
+
+    session = boto3.session.Session(profile_name=args.profile) if args.profile else boto3.session.Session()
+    pool_size = max(args.workers, args.list_workers, args.write_workers) + 4
+    s3 = session.client("s3", config=Config(max_pool_connections=pool_size, retries={"mode": "adaptive"}))
+    dynamodb = session.resource("dynamodb", config=Config(max_pool_connections=pool_size, retries={"mode": "adaptive"}))
+
+    checkpoint = Checkpoint(checkpoint_path)
+    hours = [hour for hour in iter_hours(start, end) if hour.strftime("%Y-%m-%dT%H") not in checkpoint.completed]
+    limiter = RateLimiter(args.write_rate)
+    print(f"Replaying {len(hours)} hour(s) from s3://{bucket}/{RAW_PREFIX} into "
+          f"{'Parquet under ' + args.output if args.dry_run else table_name} ({len(checkpoint.completed)} already done)")
+
+    started = time.monotonic()
+    replayed = 0
+    failed_hour = None
+    with ThreadPoolExecutor(max_workers=args.list_workers) as list_pool, ThreadPoolExecutor(max_workers=args.workers) as fetch_pool:
+        # Listings run ahead of processing; hours are still applied strictly in order.
+        listings = [(hour, list_pool.submit(list_keys, s3, bucket, hour_prefix(RAW_PREFIX, hour))) for hour in hours]
+        for hour, listing in listings:
+            label = hour.strftime("%Y-%m-%dT%H")
+            keys = listing.result()
+            raw_events: List[Dict[str, Any]] = []
+            errors = 0
+            for future in [fetch_pool.submit(fetch_event, s3, bucket, key) for key in keys]:
+                try:
+                    raw_events.append(future.result())
+                except Exception as exc:  # noqa: BLE001 - keep replaying; the count is reported
+                    errors += 1
+                    print(f"  {label}: failed to read object: {exc}", file=sys.stderr)
+
+            enriched = enrich_events(orders, raw_events)
+            items = [orders.build_dynamodb_item(item) for item in enriched["items"]]
+            if args.dry_run:
+                if items:
+                    write_parquet(items, Path(args.output), hour)
+                written = len(items)
+            else:
+                written = write_batches(dynamodb, table_name, items, limiter, args.write_workers)
+
+            replayed += len(keys)
+            elapsed = time.monotonic() - started
+            print(f"  {label}: {len(keys)} objects, {written} items, {enriched['skipped']} skipped, {errors} errors "
+                  f"({replayed / max(elapsed, 1e-6):.0f} obj/s)")
+            if errors:
+                failed_hour = label
+                for _, pending in listings:
+                    pending.cancel()
+                break
+            checkpoint.mark(label, {"objects": len(keys), "written": written, "skipped": enriched["skipped"]})
+
+    totals = checkpoint.totals
+    print(f"Done: {totals['objects']} objects, {totals['written']} items written, {totals['skipped']} skipped")
+    if failed_hour:
+        print(f"Stopped at {failed_hour}: some objects could not be read. Re-run with the same "
+              f"--checkpoint to retry from that hour.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
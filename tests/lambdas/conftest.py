@@ -0,0 +1,74 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+LAMBDAS_ROOT = REPO_ROOT / 'lambdas'
+if LAMBDAS_ROOT.exists():
+    sys.path.insert(0, str(LAMBDAS_ROOT))
+
+DYNAMODB_TEMPLATE = REPO_ROOT / 'infrastructure' / 'shared' / 'dynamodb-tables.yaml'
+
+# Lambda modules read their configuration from the environment at import time.
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BRAND', 'test')
+os.environ.setdefault('S3_BUCKET', 'test-data-lake')
+os.environ.setdefault('DYNAMODB_TABLE', 'test-orders-cache')
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """Moto-backed AWS with the shared lazy clients rebuilt inside the mock."""
+    moto = pytest.importorskip('moto')
+    from lambda_common import clients
+
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN'):
+        monkeypatch.setenv(name, 'testing')
+    with moto.mock_aws():
+        clients.reset_clients()
+        yield
+    clients.reset_clients()
+
+
+@pytest.fixture
+def dynamodb_tables(aws):
+    """The hot tables from dynamodb-tables.yaml (Brand=test); returns the DynamoDB resource."""
+    from lambda_common import clients
+
+    clients.get_client('cloudformation').create_stack(
+        StackName='test-dynamodb-tables',
+        TemplateBody=DYNAMODB_TEMPLATE.read_text(encoding='utf-8'),
+        Parameters=[{'ParameterKey': 'Brand', 'ParameterValue': 'test'}],
+    )
+    return clients.get_resource('dynamodb')
+
+
+class _PagedTable:
+    def __init__(self, table, page_size, counter):
+        self._table = table
+        self._page_size = page_size
+        self._counter = counter
+
+    def query(self, **kwargs):
+        self._counter.queries += 1
+        return self._table.query(Limit=self._page_size, **kwargs)
+
+
+class _PagedDynamoDB:
+    """The moto tables, but every Query returns at most ``page_size`` items."""
+
+    def __init__(self, dynamodb, page_size):
+        self._dynamodb = dynamodb
+        self._page_size = page_size
+        self.queries = 0
+
+    def Table(self, name):
+        return _PagedTable(self._dynamodb.Table(name), self._page_size, self)
+
+
+@pytest.fixture
+def paged_dynamodb(dynamodb_tables):
+    """Factory for a DynamoDB stand-in that forces small Query pages, to exercise pagination."""
+    return lambda page_size: _PagedDynamoDB(dynamodb_tables, page_size)
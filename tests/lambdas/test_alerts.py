@@ -0,0 +1,108 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from lambda_common import alerts
+
+NOW = datetime(2024, 3, 1, 12, 7, 30, tzinfo=timezone.utc)
+
+
+class _FakeSNS:
+    def __init__(self):
+        self.published = []
+        self.fail = False
+
+    def publish(self, **kwargs):
+        if self.fail:
+            raise RuntimeError("sns down")
+        self.published.append(kwargs)
+
+
+@pytest.fixture
+def sns(monkeypatch):
+    fake = _FakeSNS()
+    monkeypatch.setattr(alerts, "sns", fake)
+    monkeypatch.setattr(alerts, "ALERT_DIGEST_WINDOW_SECONDS", 300)
+    return fake
+
+
+def _window(dynamodb, alert_type, start):
+    return dynamodb.Table(alerts.ALERT_DIGEST_TABLE).get_item(
+        Key={"alert_type": alert_type, "window_start": start}
+    ).get("Item")
+
+
+def test_enqueue_counts_alerts_and_groups_in_one_window(dynamodb_tables, sns):
+    for dispute_id, reason in (("dp_1", "fraudulent"), ("dp_2", "fraudulent"), ("dp_3", "duplicate")):
+        alerts.enqueue_alert("stripe_dispute", "Dispute", f"body {dispute_id}", group=reason, example_id=dispute_id, now=NOW)
+
+    window = _window(dynamodb_tables, "stripe_dispute", "2024-03-01T12:05:00Z")
+    assert window["alert_count"] == 3
+    assert window["group#fraudulent"] == 2 and window["group#duplicate"] == 1
+
+
+def test_alerts_are_buffered_rather_than_published(dynamodb_tables, sns):
+    alerts.publish_alert("stripe_dispute", "Dispute", "body", topic_arn="arn:topic")
+
+    assert sns.published == []
+    assert dynamodb_tables.Table(alerts.ALERT_DIGEST_TABLE).scan()["Count"] == 1
+
+
+def test_single_alert_window_is_sent_verbatim():
+    item = {"window_start": "2024-03-01T12:05:00Z", "alert_count": 1,
+            "example_2": {"subject": "Dispute", "message": "original", "at": "2024-03-01T12:07:30Z"}}
+
+    assert alerts.format_digest("stripe_dispute", item) == {"Subject": "Dispute", "Message": "original"}
+
+
+def test_digest_summarises_groups_and_examples(monkeypatch):
+    monkeypatch.setattr(alerts, "ALERT_DIGEST_WINDOW_SECONDS", 300)
+    item = {"window_start": "2024-03-01T12:05:00Z", "alert_count": 7, "group#fraudulent": 5, "group#duplicate": 2,
+            "example_0": {"subject": "s", "message": "second", "at": "2024-03-01T12:08:00Z"},
+            "example_1": {"subject": "s", "message": "first", "at": "2024-03-01T12:06:00Z"}}
+
+    digest = alerts.format_digest("stripe_dispute", item)
+
+    assert digest["Subject"] == "Stripe Dispute digest: 7 in 5 min"
+    message = digest["Message"]
+    assert message.index("fraudulent: 5") < message.index("duplicate: 2")
+    assert message.index("first") < message.index("second")
+
+
+def test_closed_windows_are_published_exactly_once(dynamodb_tables, sns):
+    alerts.enqueue_alert("stripe_dispute", "Dispute", "one", group="fraudulent", example_id="dp_1", now=NOW)
+    alerts.enqueue_alert("stripe_dispute", "Dispute", "two", group="fraudulent", example_id="dp_2", now=NOW)
+    later = datetime(2024, 3, 1, 12, 11, tzinfo=timezone.utc)
+
+    assert alerts.flush_digests(NOW, topic_arn="arn:topic") == 0
+    assert alerts.flush_digests(later, topic_arn="arn:topic") == 1
+    assert alerts.flush_digests(later, topic_arn="arn:topic") == 0
+
+    (published,) = sns.published
+    assert published["TopicArn"] == "arn:topic"
+    assert published["Message"].startswith("2 Stripe Dispute alerts")
+    assert "flushed_at" in _window(dynamodb_tables, "stripe_dispute", "2024-03-01T12:05:00Z")
+
+
+def test_failed_publish_releases_the_window_for_the_next_flush(dynamodb_tables, sns):
+    alerts.enqueue_alert("stripe_dispute", "Dispute", "one", now=NOW)
+    later = datetime(2024, 3, 1, 12, 11, tzinfo=timezone.utc)
+
+    sns.fail = True
+    with pytest.raises(RuntimeError):
+        alerts.flush_digests(later, topic_arn="arn:topic")
+    sns.fail = False
+
+    assert alerts.flush_digests(later, topic_arn="arn:topic") == 1
+    assert sns.published[0]["Message"] == "one"
+
+
+def test_zero_window_publishes_immediately(monkeypatch):
+    sns = _FakeSNS()
+    monkeypatch.setattr(alerts, "sns", sns)
+    monkeypatch.setattr(alerts, "dynamodb", None)
+    monkeypatch.setattr(alerts, "ALERT_DIGEST_WINDOW_SECONDS", 0)
+
+    alerts.publish_alert("stripe_dispute", "Dispute", "body", topic_arn="arn:topic")
+
+    assert sns.published == [{"TopicArn": "arn:topic", "Subject": "Dispute", "Message": "body"}]
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from shopify_events import carts
+
+
+def _checkout(dynamodb, token):
+    return dynamodb.Table(carts.ABANDONED_CART_TABLE).get_item(Key={"checkout_token": token}).get("Item")
+
+
+def _abandoned(since, until):
+    return [item["checkout_token"] for item in carts.recently_abandoned(since, until)]
+
+
+def test_abandoned_checkouts_get_a_utc_hour_bucket(dynamodb_tables):
+    carts.track_abandoned_checkout({"token": "abc", "updated_at": "2024-03-01T20:30:00-05:00"})
+
+    checkout = _checkout(dynamodb_tables, "abc")
+    assert checkout["abandoned_bucket"] == "2024-03-02T01"
+    assert checkout["abandoned_at"] == "2024-03-02T01:30:00Z"
+    assert checkout["status"] == "abandoned"
+
+
+def test_recently_abandoned_returns_open_checkouts_across_hours(dynamodb_tables):
+    carts.track_abandoned_checkout({"token": "early", "updated_at": "2024-03-02T00:10:00Z"})
+    carts.track_abandoned_checkout({"token": "a", "updated_at": "2024-03-02T00:50:00Z"})
+    carts.track_abandoned_checkout({"token": "b", "updated_at": "2024-03-02T01:20:00Z"})
+    carts.track_abandoned_checkout({"token": "late", "updated_at": "2024-03-02T02:00:00Z"})
+
+    found = _abandoned(datetime(2024, 3, 2, 0, 45, tzinfo=timezone.utc), datetime(2024, 3, 2, 1, 45, tzinfo=timezone.utc))
+
+    assert sorted(found) == ["a", "b"]
+
+
+def test_recovered_checkouts_leave_the_index_and_are_never_reopened(dynamodb_tables):
+    carts.track_abandoned_checkout({"token": "abc", "updated_at": "2024-03-02T01:30:00Z"})
+
+    assert carts.mark_checkout_recovered("abc", "2024-03-02T02:00:00Z", 42) is True
+    assert carts.mark_checkout_recovered("abc", "2024-03-02T03:00:00Z", 42) is False
+    carts.track_abandoned_checkout({"token": "abc", "updated_at": "2024-03-02T04:00:00Z"})
+
+    checkout = _checkout(dynamodb_tables, "abc")
+    assert checkout["status"] == "recovered"
+    assert checkout["recovered_order_id"] == "42"
+    assert "abandoned_bucket" not in checkout
+    assert _abandoned(datetime(2024, 3, 2, tzinfo=timezone.utc), datetime(2024, 3, 2, 5, tzinfo=timezone.utc)) == []
+
+
+def test_untracked_tokens_are_not_recovered(dynamodb_tables):
+    assert carts.mark_checkout_recovered("never-tracked") is False
+    assert _checkout(dynamodb_tables, "never-tracked") is None
@@ -0,0 +1,119 @@
+import gzip
+import io
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from lambda_common import clients
+from shopify_events import catalog, orders
+from shopify_events.catalog import CatalogSnapshot, variant_items
+from shopify_events.common import S3_BUCKET
+
+PRODUCT = {
+    "id": 10,
+    "title": "Daily Sock",
+    "vendor": "Hollow",
+    "product_type": "Socks",
+    "status": "active",
+    "variants": [
+        {"id": 101, "sku": "SOCK-M", "title": "M", "price": "12.00", "inventory_item_id": 501},
+        {"id": 102, "sku": "", "title": "Default Title", "price": "12.00"},
+    ],
+}
+
+
+class _FakeS3:
+    """Answers missing keys with ``missing_code``, as S3 does (403 without s3:ListBucket)."""
+
+    def __init__(self, objects, missing_code="NoSuchKey"):
+        self.objects = objects
+        self.missing_code = missing_code
+        self.gets = []
+
+    def get_object(self, Bucket, Key):
+        self.gets.append(Key)
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": self.missing_code}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+
+def test_variant_items_drop_empty_attributes():
+    items = variant_items(PRODUCT)
+
+    assert [item["variant_id"] for item in items] == ["101", "102"]
+    assert items[0]["inventory_item_id"] == "501"
+    assert items[0]["variant_title"] == "M"
+    assert "sku" not in items[1] and "variant_title" not in items[1]
+
+
+def test_snapshot_refresh_loads_once_and_looks_up_by_variant_or_sku(monkeypatch):
+    snapshot = {"version": "v1", "variants": {"101": {"sku": "SOCK-M", "product_type": "Socks", "cost": "3.50"}}}
+    fake = _FakeS3({
+        catalog.CATALOG_MANIFEST_KEY: json.dumps({"version": "v1", "key": "snap.json.gz"}).encode(),
+        "snap.json.gz": gzip.compress(json.dumps(snapshot).encode()),
+    })
+    monkeypatch.setattr(catalog, "s3", fake)
+    cache = CatalogSnapshot(refresh_seconds=60)
+
+    cache.refresh()
+    cache.refresh()
+    assert fake.gets == [catalog.CATALOG_MANIFEST_KEY, "snap.json.gz"]
+    assert cache.lookup(101)["product_type"] == "Socks"
+    assert cache.lookup(999, "sock-m")["cost"] == "3.50"
+    assert cache.lookup(999) is None
+
+    # An unchanged manifest does not re-download the snapshot.
+    cache.refresh(force=True)
+    assert fake.gets[-1] == catalog.CATALOG_MANIFEST_KEY
+
+
+def test_missing_manifest_leaves_catalog_empty(monkeypatch):
+    monkeypatch.setattr(catalog, "s3", _FakeS3({}))
+    cache = CatalogSnapshot()
+    cache.refresh()
+    assert cache.version is None and cache.lookup(101) is None
+
+
+def test_a_denied_manifest_read_counts_as_missing(monkeypatch):
+    monkeypatch.setattr(catalog, "s3", _FakeS3({}, missing_code="AccessDenied"))
+    assert catalog._read_manifest() is None
+
+    monkeypatch.setattr(catalog, "s3", _FakeS3({}, missing_code="InternalError"))
+    with pytest.raises(ClientError):
+        catalog._read_manifest()
+
+
+def test_first_publish_into_an_empty_bucket_creates_the_snapshot(dynamodb_tables):
+    clients.get_client("s3").create_bucket(Bucket=S3_BUCKET)
+    catalog.upsert_product(PRODUCT)
+
+    manifest = catalog.publish_snapshot()
+
+    assert manifest["variant_count"] == 2
+    cache = CatalogSnapshot()
+    cache.refresh()
+    assert cache.version == manifest["version"]
+    assert cache.lookup(None, "SOCK-M")["product_type"] == "Socks"
+    assert catalog.publish_snapshot() is None
+
+
+def test_orders_get_catalog_attributes(monkeypatch):
+    cache = CatalogSnapshot(refresh_seconds=3600)
+    cache.load({"version": "v1", "variants": {
+        "101": {"product_id": "10", "sku": "SOCK-M", "product_type": "Socks", "vendor": "Hollow", "cost": "3.50"},
+        "201": {"product_id": "20", "sku": "TEE-L", "product_type": "Shirts"},
+    }})
+    cache._checked_at = float("inf")
+    monkeypatch.setattr(orders, "CATALOG", cache)
+
+    enriched = orders.attach_catalog_attributes({}, [
+        {"variant_id": 101, "sku": "SOCK-M", "quantity": 2},
+        {"variant_id": None, "sku": "tee-l", "quantity": 1},
+    ])
+
+    assert enriched["product_types"] == ["Shirts", "Socks"]
+    assert enriched["catalog_version"] == "v1"
+    assert json.loads(enriched["line_item_catalog"])[0]["cost"] == "3.50"
+    # Cost is only totalled when every line item has one.
+    assert "total_cost" not in enriched
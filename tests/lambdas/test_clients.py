@@ -0,0 +1,31 @@
+from lambda_common import clients
+
+
+class _FakeSession:
+    def __init__(self):
+        self.created = []
+
+    def client(self, service):
+        self.created.append(("client", service))
+        return {"service": service}
+
+    def resource(self, service):
+        self.created.append(("resource", service))
+        return {"resource": service}
+
+
+def test_lazy_client_defers_creation_until_first_use(monkeypatch):
+    session = _FakeSession()
+    clients.reset_clients()
+    monkeypatch.setattr(clients, "_SESSION", session)
+
+    sns = clients.lazy_client("sns")
+    dynamodb = clients.lazy_resource("dynamodb")
+    assert session.created == []
+
+    assert sns.get("service") == "sns"
+    assert dynamodb.get("resource") == "dynamodb"
+    sns.keys()
+    assert session.created == [("client", "sns"), ("resource", "dynamodb")]
+
+    clients.reset_clients()
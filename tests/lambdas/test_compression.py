@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from lambda_common.compression import compress_body, decompress_body
+
+BODY = json.dumps({"data": {"line_items": [{"sku": f"SKU-{i}", "price": "19.99"} for i in range(50)]}})
+
+
+@pytest.mark.parametrize("codec, encoding, suffix", [("gzip", "gzip", ".gz"), ("zstd", "zstd", ".zst")])
+def test_compressed_bodies_round_trip(codec, encoding, suffix):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    data, extra, key_suffix = compress_body(BODY, codec)
+    assert extra == {"ContentEncoding": encoding}
+    assert key_suffix == suffix
+    assert len(data) < len(BODY) / 3
+    assert decompress_body(data) == BODY.encode()
+
+
+def test_uncompressed_bodies_pass_through():
+    data, extra, key_suffix = compress_body(BODY, "none")
+    assert (extra, key_suffix) == ({}, "")
+    assert decompress_body(data) == BODY.encode()
+    with pytest.raises(ValueError):
+        compress_body(BODY, "brotli")
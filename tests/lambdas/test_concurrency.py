@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+from lambda_common.concurrency import run_concurrently
+
+
+def test_run_concurrently_returns_results_in_order():
+    assert run_concurrently(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+    assert run_concurrently(lambda: "only") == ["only"]
+    assert run_concurrently() == []
+
+
+def test_run_concurrently_overlaps_calls():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def call():
+        # Deadlocks (and times out) unless both calls are in flight together.
+        barrier.wait()
+        return threading.current_thread().name
+
+    first, second = run_concurrently(call, call)
+    assert first != second
+
+
+def test_run_concurrently_waits_for_all_calls_before_raising():
+    finished = threading.Event()
+
+    def slow_write():
+        finished.wait(0.05)
+        finished.set()
+        return "written"
+
+    def failing_write():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_concurrently(failing_write, slow_write)
+    assert finished.is_set()
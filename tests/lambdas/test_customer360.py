@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+from lambda_common import customer360
+from lambda_common.customer360 import customer_key
+
+ORDER = {"customer_id": "1", "order_id": "o1", "total_price": Decimal("10.5"), "customer_email": "a@example.com"}
+
+
+def _customer(dynamodb, key):
+    return dynamodb.Table(customer360.CUSTOMER_360_TABLE).get_item(Key={"customer_key": key}).get("Item")
+
+
+def test_customer_key_prefers_shopify_id():
+    assert customer_key(66, "recharge", 7) == "66"
+    assert customer_key(None, "stripe", "cus_1") == "stripe#cus_1"
+    assert customer_key(None, "stripe", None) is None
+
+
+def test_redelivered_order_is_counted_once(dynamodb_tables):
+    customer360.record_order(ORDER)
+    customer360.record_order(ORDER)
+    customer360.record_order({**ORDER, "order_id": "o2", "total_price": Decimal("4")})
+
+    customer = _customer(dynamodb_tables, "1")
+    assert customer["order_count"] == 2
+    assert customer["lifetime_value"] == Decimal("14.5")
+    assert customer["email"] == "a@example.com"
+
+
+def test_cancellation_is_reversed_once_and_never_reopened(dynamodb_tables):
+    customer360.record_order(ORDER)
+    cancelled = {**ORDER, "cancelled_at": "2024-03-02T00:00:00Z"}
+    customer360.record_order(cancelled)
+    customer360.record_order(cancelled)
+
+    customer = _customer(dynamodb_tables, "1")
+    assert customer["order_count"] == 1
+    assert customer["cancelled_order_count"] == 1
+    assert customer["lifetime_value"] == 0
+
+
+def test_last_failed_charge_only_moves_forward(dynamodb_tables):
+    customer360.record_failed_charge("1", "stripe", "ch_2", "2024-01-02T00:00:00+00:00", amount=Decimal("12"))
+    customer360.record_failed_charge("1", "stripe", "ch_1", "2024-01-01T00:00:00+00:00", amount=Decimal("5"))
+
+    assert _customer(dynamodb_tables, "1")["last_failed_charge"]["charge_id"] == "ch_2"
+
+
+def test_subscription_status_adds_or_removes_membership(dynamodb_tables):
+    customer360.record_subscription({"id": 5, "customer_id": 9, "status": "ACTIVE"})
+    customer360.record_subscription({"id": 6, "customer_id": 9, "status": "active"})
+    assert _customer(dynamodb_tables, "recharge#9")["active_subscriptions"] == {"5", "6"}
+
+    customer360.record_subscription({"id": 5, "customer_id": 9, "status": "cancelled"})
+    assert _customer(dynamodb_tables, "recharge#9")["active_subscriptions"] == {"6"}
@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from shopify_events import customer_cache
+from shopify_events.customer_cache import CustomerProfileCache, apply_customer_profile
+
+
+class _FakeDynamoDB:
+    def __init__(self, items, unprocessed_rounds=0):
+        self.items = items
+        self.unprocessed_rounds = unprocessed_rounds
+        self.requests = []
+
+    def batch_get_item(self, RequestItems):
+        self.requests.append(RequestItems)
+        (table, request), = RequestItems.items()
+        keys = request["Keys"]
+        if self.unprocessed_rounds:
+            self.unprocessed_rounds -= 1
+            return {"Responses": {table: []}, "UnprocessedKeys": RequestItems}
+        found = [self.items[key["customer_id"]] for key in keys if key["customer_id"] in self.items]
+        return {"Responses": {table: found}}
+
+
+def test_misses_are_batched_and_then_served_from_memory(monkeypatch):
+    fake = _FakeDynamoDB({"1": {"customer_id": "1", "orders_count": Decimal("7")}})
+    monkeypatch.setattr(customer_cache, "dynamodb", fake)
+    cache = CustomerProfileCache("customers", max_size=10, ttl_seconds=60)
+
+    assert cache.get_many(["1", "2", "1"]) == {"1": {"customer_id": "1", "orders_count": Decimal("7")}, "2": None}
+    assert len(fake.requests) == 1
+    assert len(fake.requests[0]["customers"]["Keys"]) == 2
+
+    # Known profiles and known misses are both cached.
+    assert cache.get("1")["orders_count"] == Decimal("7")
+    assert cache.get("2") is None
+    assert len(fake.requests) == 1
+
+    cache.put({"customer_id": "2", "email": "new@example.com"})
+    assert cache.get("2")["email"] == "new@example.com"
+    cache.invalidate("2")
+    cache.get("2")
+    assert len(fake.requests) == 2
+
+
+def test_lru_evicts_and_unprocessed_keys_are_not_cached(monkeypatch):
+    fake = _FakeDynamoDB({}, unprocessed_rounds=10)
+    monkeypatch.setattr(customer_cache, "dynamodb", fake)
+    monkeypatch.setattr(customer_cache.time, "sleep", lambda _: None)
+    cache = CustomerProfileCache("customers", max_size=2, ttl_seconds=60)
+
+    assert cache.get("9") is None
+    assert len(fake.requests) == 4
+    cache.get("9")
+    assert len(fake.requests) == 8
+
+    for customer_id in ("a", "b", "c"):
+        cache.put({"customer_id": customer_id})
+    assert list(cache._entries) == ["b", "c"]
+
+
+def test_apply_customer_profile_only_fills_gaps():
+    order = {"customer_id": "1", "customer_email": "webhook@example.com"}
+    profile = {"customer_id": "1", "email": "cache@example.com", "orders_count": Decimal("4"), "total_spent": "99.50", "updated_at": "2024-11-29T00:00:00Z"}
+    enriched = apply_customer_profile(order, profile)
+    assert enriched["customer_email"] == "webhook@example.com"
+    assert enriched["customer_orders_count"] == 4 and isinstance(enriched["customer_orders_count"], int)
+    assert enriched["customer_total_spent"] == "99.50"
+    assert enriched["customer_profile_updated_at"] == "2024-11-29T00:00:00Z"
+    assert apply_customer_profile({"customer_id": "2"}, None) == {"customer_id": "2"}
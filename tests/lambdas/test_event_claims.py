@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+from lambda_common import event_claims
+
+TABLE = "test-stripe-events"
+NOW = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+
+
+def _claim(now=NOW):
+    return event_claims.claim(TABLE, "evt_1", 120, 7, now=now, event_type="charge.failed")
+
+
+def test_completed_events_are_duplicates(dynamodb_tables):
+    assert _claim() == event_claims.CLAIMED
+    event_claims.complete(TABLE, "evt_1")
+
+    assert _claim(NOW + timedelta(days=1)) == event_claims.DUPLICATE
+    item = dynamodb_tables.Table(TABLE).get_item(Key={"event_id": "evt_1"})["Item"]
+    assert item["status"] == "done" and "lease_until" not in item
+    assert item["event_type"] == "charge.failed"
+
+
+def test_live_lease_blocks_a_concurrent_delivery(dynamodb_tables):
+    assert _claim() == event_claims.CLAIMED
+
+    assert _claim(NOW + timedelta(seconds=30)) == event_claims.IN_PROGRESS
+
+
+def test_claimed_but_never_finished_event_is_taken_over_after_the_lease(dynamodb_tables):
+    # The first invocation claimed the event and then timed out: neither complete nor release ran.
+    assert _claim() == event_claims.CLAIMED
+
+    assert _claim(NOW + timedelta(seconds=121)) == event_claims.CLAIMED
+    assert _claim(NOW + timedelta(seconds=150)) == event_claims.IN_PROGRESS
+
+
+def test_released_claims_can_be_retried_at_once(dynamodb_tables):
+    assert _claim() == event_claims.CLAIMED
+    event_claims.release(TABLE, "evt_1")
+
+    assert _claim(NOW + timedelta(seconds=1)) == event_claims.CLAIMED
+
+
+def test_claims_from_before_leases_count_as_done(dynamodb_tables):
+    dynamodb_tables.Table(TABLE).put_item(Item={"event_id": "evt_1", "created": 1})
+
+    assert _claim() == event_claims.DUPLICATE
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from shopify_events import line_items
+from shopify_events.line_items import line_item_facts
+
+ORDER = {
+    "line_items": [
+        {"id": 1, "sku": "SOCK-M", "variant_id": 101, "quantity": 2, "price": "12.00"},
+        {"id": 2, "sku": "", "quantity": 1},
+    ]
+}
+ENRICHED = {"order_id": "9", "created_at": "2024-03-02T01:30:00Z"}
+MARCH_1 = datetime(2024, 3, 1, tzinfo=timezone.utc)
+MARCH_3 = datetime(2024, 3, 3, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def facts_enabled(dynamodb_tables, monkeypatch):
+    monkeypatch.setattr(line_items, "LINE_ITEM_FACTS_ENABLED", True)
+    return dynamodb_tables
+
+
+def test_facts_are_keyed_by_sku_and_utc_sold_at():
+    facts = line_item_facts(ORDER, {"order_id": "9", "created_at": "2024-03-01T20:30:00-05:00"})
+
+    assert len(facts) == 1
+    assert facts[0]["sku"] == "SOCK-M"
+    assert facts[0]["sold_at"] == "2024-03-02T01:30:00Z#1"
+    assert facts[0]["quantity"] == 2 and facts[0]["order_id"] == "9"
+
+
+def test_redelivered_orders_are_not_counted_twice(facts_enabled):
+    assert line_items.write_line_item_facts(ORDER, ENRICHED) == 1
+    assert line_items.write_line_item_facts(ORDER, ENRICHED) == 1
+    line_items.write_line_item_facts(
+        {"line_items": [{"id": 3, "sku": "SOCK-M", "quantity": 5}]}, {"order_id": "10", "created_at": "2024-03-04T00:00:00Z"}
+    )
+
+    assert line_items.units_sold("SOCK-M", MARCH_1, MARCH_3) == 2
+
+
+def test_cancelled_orders_delete_their_facts(facts_enabled):
+    line_items.write_line_item_facts(ORDER, ENRICHED)
+    line_items.write_line_item_facts(ORDER, {**ENRICHED, "cancelled_at": "2024-03-03T00:00:00Z"})
+
+    assert line_items.units_sold("SOCK-M", MARCH_1, MARCH_3) == 0
+
+
+def test_units_sold_sums_every_page(facts_enabled, paged_dynamodb, monkeypatch):
+    line_items.write_line_item_facts({"line_items": [{"id": n, "sku": "A", "quantity": 1} for n in range(30)]}, ENRICHED)
+    paged = paged_dynamodb(10)
+    monkeypatch.setattr(line_items, "dynamodb", paged)
+
+    assert line_items.units_sold("A", MARCH_1, MARCH_3) == 30
+    assert paged.queries > 1
+
+
+def test_disabled_facts_write_nothing(dynamodb_tables):
+    assert line_items.write_line_item_facts(ORDER, ENRICHED) == 0
+    assert line_items.units_sold("SOCK-M", MARCH_1, MARCH_3) == 0
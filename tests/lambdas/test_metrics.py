@@ -0,0 +1,59 @@
+import json
+
+from lambda_common import metrics
+
+
+def _emf_lines(captured):
+    return [json.loads(line) for line in captured.out.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_instrumented_handler_emits_one_emf_document(capsys, monkeypatch):
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "test-order-processor")
+
+    @metrics.instrumented()
+    def handler(event, _):
+        metrics.set_topic(event["topic"])
+        with metrics.stage("s3_put"):
+            pass
+        with metrics.stage("s3_put"):
+            pass
+        metrics.put_metric("s3_put_bytes", 512, "Bytes")
+        return {"statusCode": 200}
+
+    assert handler({"topic": "orders/create"}, None) == {"statusCode": 200}
+
+    [document] = _emf_lines(capsys.readouterr())
+    directive = document["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Namespace"] == metrics.NAMESPACE
+    assert ["Function", "Topic"] in directive["Dimensions"]
+    assert {m["Name"]: m["Unit"] for m in directive["Metrics"]} == {
+        "s3_put_ms": "Milliseconds",
+        "s3_put_bytes": "Bytes",
+        "handler_ms": "Milliseconds",
+    }
+    assert document["Function"] == "test-order-processor"
+    assert document["Topic"] == "orders/create"
+    assert len(document["s3_put_ms"]) == 2
+    assert document["s3_put_bytes"] == 512
+
+
+def test_nested_handlers_share_the_outer_recorder(capsys):
+    @metrics.instrumented()
+    def inner(event, _):
+        metrics.put_metric("inner_calls", 1)
+        return "inner"
+
+    @metrics.instrumented()
+    def outer(event, context):
+        return inner(event, context)
+
+    assert outer({}, None) == "inner"
+    [document] = _emf_lines(capsys.readouterr())
+    assert document["inner_calls"] == 1
+    assert metrics.current() is None
+
+
+def test_stage_is_a_no_op_outside_an_instrumented_handler(capsys):
+    with metrics.stage("enrich"):
+        metrics.put_metric("ignored", 1)
+    assert capsys.readouterr().out == ""
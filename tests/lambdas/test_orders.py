@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from lambda_common import clients, customer360
+from shopify_events import line_items, orders
+from shopify_events.common import S3_BUCKET
+
+
+def _event(topic, payload):
+    return {"detail-type": "shopifyWebhook", "detail": {"payload": payload, "metadata": {"X-Shopify-Topic": topic}}}
+
+
+def _payload(order_id):
+    return {
+        "id": order_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "customer": {"id": 7, "email": "a@example.com"},
+        "total_price": "25.00",
+        "line_items": [{"id": order_id * 10, "sku": "SOCK-M", "quantity": 2, "price": "12.50"}],
+    }
+
+
+@pytest.fixture
+def store(dynamodb_tables):
+    clients.get_client("s3").create_bucket(Bucket=S3_BUCKET)
+    return dynamodb_tables
+
+
+@pytest.fixture
+def facts_enabled(store, monkeypatch):
+    monkeypatch.setattr(orders, "LINE_ITEM_FACTS_ENABLED", True)
+    monkeypatch.setattr(line_items, "LINE_ITEM_FACTS_ENABLED", True)
+    return store
+
+
+def _units_sold():
+    now = datetime.now(timezone.utc)
+    return line_items.units_sold("SOCK-M", now - timedelta(days=1), now + timedelta(days=1))
+
+
+def _customer(dynamodb):
+    return dynamodb.Table(customer360.CUSTOMER_360_TABLE).get_item(Key={"customer_key": "7"}).get("Item")
+
+
+def test_orders_are_recorded_in_customer360(store):
+    assert orders.handler(_event("orders/create", _payload(1)), None)["statusCode"] == 200
+
+    assert _customer(store)["order_count"] == 1
+
+
+def test_draft_orders_stay_out_of_customer360(store):
+    assert orders.handler(_event("draft_orders/create", _payload(2)), None)["statusCode"] == 200
+
+    assert _customer(store) is None
+
+
+def test_only_orders_topics_write_line_item_facts(facts_enabled):
+    orders.handler(_event("orders/create", _payload(1)), None)
+    orders.handler(_event("draft_orders/create", _payload(2)), None)
+    orders.handler(_event("fulfillments/create", _payload(3)), None)
+
+    assert _units_sold() == 2
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+from lambda_common import partition_counts
+from lambda_common.raw_keys import raw_partition
+
+HOUR = datetime(2024, 3, 1, 0, 30, tzinfo=timezone.utc)
+
+
+class _FailingDynamoDB:
+    def Table(self, _name):
+        raise RuntimeError("throttled")
+
+
+def test_entity_is_source_and_dataset_of_the_raw_prefix():
+    assert partition_counts.entity_for("raw/shopify/orders/events/") == "shopify/orders"
+    assert partition_counts.entity_for("raw/stripe/disputes/events/") == "stripe/disputes"
+
+
+def test_events_are_counted_per_entity_and_hour(dynamodb_tables):
+    for _ in range(3):
+        partition_counts.count_raw_event("shopify/orders", HOUR)
+    partition_counts.count_raw_event("shopify/orders", HOUR + timedelta(hours=2))
+    partition_counts.count_raw_event("recharge/charges", HOUR)
+
+    counts = partition_counts.hourly_counts("shopify/orders", HOUR, HOUR + timedelta(hours=2))
+
+    assert counts == {"2024-03-01T00": 3, "2024-03-01T02": 1}
+
+
+def test_shards_of_an_hour_are_summed(dynamodb_tables, monkeypatch):
+    monkeypatch.setattr(partition_counts, "PARTITION_COUNT_SHARDS", 4)
+    for _ in range(40):
+        partition_counts.count_raw_event("shopify/orders", HOUR)
+
+    items = dynamodb_tables.Table(partition_counts.PARTITION_COUNTS_TABLE).scan()["Items"]
+
+    assert 1 < len(items) <= 4
+    assert {item["hour"][:-3] for item in items} == {"2024-03-01T00"}
+    assert partition_counts.hourly_counts("shopify/orders", HOUR, HOUR) == {"2024-03-01T00": 40}
+
+
+def test_offset_events_are_counted_in_their_archive_partition_hour(dynamodb_tables):
+    event_dt = datetime(2024, 2, 29, 23, 30, tzinfo=timezone(timedelta(hours=-5)))
+
+    partition_counts.count_raw_event("shopify/orders", event_dt)
+
+    assert raw_partition(event_dt, shards=0) == "date=2024-03-01/hour=04/"
+    assert partition_counts.hourly_counts("shopify/orders", HOUR, HOUR + timedelta(hours=4)) == {"2024-03-01T04": 1}
+
+
+def test_count_failures_never_reach_the_caller(monkeypatch):
+    metrics = []
+    monkeypatch.setattr(partition_counts, "dynamodb", _FailingDynamoDB())
+    monkeypatch.setattr(partition_counts, "put_metric", lambda name, value: metrics.append(name))
+
+    partition_counts.count_raw_event("recharge/charges", HOUR)
+
+    assert metrics == ["partition_count_errors"]
+
+
+def test_hourly_counts_follows_pages(dynamodb_tables, paged_dynamodb, monkeypatch):
+    monkeypatch.setattr(partition_counts, "PARTITION_COUNT_SHARDS", 1)
+    for hours in range(5):
+        partition_counts.count_raw_event("shopify/orders", HOUR + timedelta(hours=hours))
+    paged = paged_dynamodb(2)
+    monkeypatch.setattr(partition_counts, "dynamodb", paged)
+
+    counts = partition_counts.hourly_counts("shopify/orders", HOUR, HOUR + timedelta(hours=4))
+
+    assert sum(counts.values()) == 5
+    assert paged.queries == 3
@@ -0,0 +1,53 @@
+from datetime import date
+from decimal import Decimal
+
+from lambda_common import payment_intents
+from lambda_common.payment_intents import failed_day
+
+CHARGE = {
+    "id": "ch_1", "payment_intent": "pi_1", "invoice": "in_1", "customer": "cus_1", "amount": 2500,
+    "status": "failed", "failure_code": "card_declined", "created": 1709251200,
+}
+INTENT = {"id": "pi_1", "status": "requires_payment_method", "amount": 2500, "currency": "usd", "created": 1709251200}
+
+
+def _intent(dynamodb):
+    return dynamodb.Table(payment_intents.PAYMENT_INTENTS_TABLE).get_item(Key={"payment_intent_id": "pi_1"})["Item"]
+
+
+def test_each_charge_is_appended_once(dynamodb_tables):
+    assert payment_intents.record_charge_attempt(CHARGE, "charge.failed") is True
+    assert payment_intents.record_charge_attempt(CHARGE, "charge.failed") is False
+    retry = {**CHARGE, "id": "ch_2", "status": "succeeded", "failure_code": None, "created": 1709254800}
+    assert payment_intents.record_charge_attempt(retry, "charge.succeeded") is True
+
+    intent = _intent(dynamodb_tables)
+    assert [attempt["charge_id"] for attempt in payment_intents.attempts_for("pi_1")] == ["ch_1", "ch_2"]
+    assert intent["attempts"][0]["failure_code"] == "card_declined"
+    assert intent["attempts"][0]["amount"] == Decimal("25")
+    assert intent["attempt_count"] == 2 and intent["failure_count"] == 1
+    assert intent["invoice_id"] == "in_1"
+
+
+def test_unfinished_or_unlinked_charges_are_skipped(dynamodb_tables):
+    assert payment_intents.record_charge_attempt(CHARGE, "charge.pending") is False
+    assert payment_intents.record_charge_attempt({**CHARGE, "payment_intent": None}, "charge.failed") is False
+    assert payment_intents.attempts_for("pi_1") == []
+
+
+def test_intent_status_only_moves_forward(dynamodb_tables):
+    assert payment_intents.record_payment_intent({**INTENT, "status": "succeeded"}, "payment_intent.succeeded", 200)
+    assert not payment_intents.record_payment_intent(INTENT, "payment_intent.payment_failed", 100)
+
+    assert _intent(dynamodb_tables)["status"] == "succeeded"
+
+
+def test_failure_codes_are_counted_per_failed_day(dynamodb_tables):
+    table = dynamodb_tables.Table(payment_intents.PAYMENT_ATTEMPTS_TABLE)
+    for charge_id, code in (("ch_1", "card_declined"), ("ch_2", "expired_card"), ("ch_3", "card_declined")):
+        table.put_item(Item={"charge_id": charge_id, "failed_day": "2024-03-01", "failure_code": code})
+    table.put_item(Item={"charge_id": "ch_4", "failed_day": "2024-03-02", "failure_code": "card_declined"})
+    table.put_item(Item={"charge_id": "ch_5", "status": "succeeded"})
+
+    assert payment_intents.failure_code_distribution(date(2024, 3, 1)) == {"card_declined": 2, "expired_card": 1}
+    assert failed_day(CHARGE["created"]) == "2024-03-01"
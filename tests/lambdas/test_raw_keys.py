@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta, timezone
+
+from lambda_common.raw_keys import hour_prefix, raw_partition, shard_for
+
+EVENT_DT = datetime(2024, 11, 29, 14, 5, 9, tzinfo=timezone.utc)
+
+
+def test_unsharded_layout_is_unchanged():
+    assert raw_partition(EVENT_DT, 123, shards=0) == "date=2024-11-29/hour=14/"
+    assert raw_partition(EVENT_DT, 123, shards=1) == "date=2024-11-29/hour=14/"
+    assert raw_partition(EVENT_DT, 123, hourly=False, shards=0) == "date=2024-11-29/"
+
+
+def test_sharded_layout_is_stable_and_below_the_hour():
+    partition = raw_partition(EVENT_DT, 5500000000001, shards=16)
+    assert partition == f"date=2024-11-29/hour=14/shard={shard_for(5500000000001, 16)}/"
+    assert partition == raw_partition(EVENT_DT, "5500000000001", shards=16)
+    assert f"raw/shopify/orders/events/{partition}".startswith(hour_prefix("raw/shopify/orders/events/", EVENT_DT))
+    assert len({shard_for(record_id, 16) for record_id in range(1000)}) == 16
+
+
+def test_partitions_are_utc_hours():
+    offset_dt = datetime(2024, 11, 29, 9, 5, 9, tzinfo=timezone(timedelta(hours=-5)))
+
+    assert raw_partition(offset_dt, shards=0) == raw_partition(EVENT_DT, shards=0)
+    assert hour_prefix("raw/", offset_dt) == "raw/date=2024-11-29/hour=14/"
@@ -0,0 +1,51 @@
+import re
+from pathlib import Path
+
+from lambda_common import clients
+from shopify_events import carts, customers, fulfillments, orders, products, router
+from shopify_events.common import S3_BUCKET
+
+TEMPLATE = Path(__file__).resolve().parents[2] / 'infrastructure' / 'shopify' / 'eventbridge-rules.yaml'
+
+
+def _event(topic, payload=None):
+    return {"detail-type": "shopifyWebhook", "detail": {"payload": payload or {}, "metadata": {"X-Shopify-Topic": topic}}}
+
+
+def test_routes_cover_every_topic_prefix_in_the_eventbridge_rules():
+    prefixes = set(re.findall(r"- prefix: ([a-z_]+)/", TEMPLATE.read_text(encoding="utf-8")))
+    assert prefixes
+    assert {prefix for prefix in prefixes if router.resolve_route(f"{prefix}/create") is None} == set()
+
+
+def test_resolve_route_picks_entity_handler():
+    assert router.resolve_route("orders/paid") is orders.handler
+    assert router.resolve_route("fulfillments/create") is fulfillments.handler
+    assert router.resolve_route("fulfillment_orders/moved") is fulfillments.handler
+    assert router.resolve_route("customers/delete") is customers.handler
+    assert router.resolve_route("checkouts/update") is carts.handler
+    assert router.resolve_route("carts/create") is carts.handler
+    assert router.resolve_route("products/update") is products.handler
+    assert router.resolve_route("app/uninstalled") is None
+    assert router.resolve_route(None) is None
+
+
+def test_handler_rejects_unrouted_topics():
+    assert router.handler(_event("app/uninstalled"), None)["statusCode"] == 400
+
+
+def test_handler_dispatches_to_entity_handler():
+    # Entity handlers reject empty payloads before touching AWS.
+    response = router.handler(_event("products/update"), None)
+    assert response == {"statusCode": 400, "body": "No product data"}
+
+
+def test_fulfillments_are_archived_under_their_own_prefix_only(dynamodb_tables):
+    clients.get_client("s3").create_bucket(Bucket=S3_BUCKET)
+
+    response = router.handler(_event("fulfillments/create", {"id": 5, "order_id": 9, "status": "success"}), None)
+
+    assert response["statusCode"] == 200
+    keys = [obj["Key"] for obj in clients.get_client("s3").list_objects_v2(Bucket=S3_BUCKET)["Contents"]]
+    assert len(keys) == 1 and keys[0].startswith("raw/shopify/fulfillments/events/")
+    assert dynamodb_tables.Table(orders.DYNAMODB_TABLE).scan()["Items"] == []
@@ -0,0 +1,50 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from lambda_common import serialization
+
+DOCUMENT = {
+    "price": Decimal("19.99"),
+    "created": datetime(2024, 11, 29, 14, 5, tzinfo=timezone.utc),
+    "day": date(2024, 11, 29),
+    "tags": {"vip"},
+    "rate": 0.0825,
+    "count": 3,
+    "huge": 2**70,
+    "name": "Ünïcode",
+    "nested": [{1: None, True: "yes"}],
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    serialization.set_backend(request.param)
+    yield request.param
+    serialization.set_backend("orjson" if serialization.orjson is not None else "stdlib")
+
+
+def test_dumps_matches_stdlib_default_str(backend):
+    expected = json.loads(json.dumps(DOCUMENT, default=str))
+    assert json.loads(serialization.dumps(DOCUMENT, default=str)) == expected
+    assert serialization.loads(serialization.dumps_bytes(DOCUMENT, default=str)) == expected
+    with pytest.raises(TypeError):
+        serialization.dumps({"price": Decimal("1")})
+
+
+def test_non_finite_floats_encode_as_null_with_either_backend(backend):
+    document = {"rate": float("nan"), "bounds": [float("inf"), -float("inf"), 1.5], "huge": 2**70}
+
+    encoded = serialization.dumps_bytes(document)
+
+    assert json.loads(encoded) == {"rate": None, "bounds": [None, None, 1.5], "huge": 2**70}
+    assert serialization.loads(serialization.dumps({"rate": float("nan")})) == {"rate": None}
+
+
+def test_to_dynamodb_matches_json_round_trip():
+    expected = json.loads(json.dumps(DOCUMENT, default=str), parse_float=Decimal)
+    assert serialization.to_dynamodb(DOCUMENT) == expected
@@ -0,0 +1,60 @@
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+
+from lambda_common.stripe_webhook import SignatureVerificationError, construct_event
+
+SECRET = "whsec_test"
+PAYLOAD = json.dumps({"id": "evt_1", "type": "charge.succeeded", "data": {"object": {"id": "ch_1"}}})
+
+
+def _sign(payload, timestamp, secret=SECRET):
+    return hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+
+
+def test_any_v1_signature_may_match():
+    now = int(time.time())
+    header = f"t={now},v1={_sign(PAYLOAD, now, 'whsec_old')},v0=ignored,v1={_sign(PAYLOAD, now)}"
+
+    assert construct_event(PAYLOAD, header, SECRET)["data"]["object"]["id"] == "ch_1"
+    assert construct_event(PAYLOAD.encode(), header, SECRET)["id"] == "evt_1"
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "v1=abc",
+    "t=notanumber,v1=abc",
+    f"t={int(time.time())},v0=abc",
+    f"t={int(time.time())},v1={'0' * 64}",
+    f"t={int(time.time()) - 600},v1={_sign(PAYLOAD, int(time.time()) - 600)}",
+])
+def test_bad_headers_are_rejected(header):
+    with pytest.raises(SignatureVerificationError):
+        construct_event(PAYLOAD, header, SECRET)
+
+
+def test_tolerance_can_be_disabled_and_bad_json_is_a_value_error():
+    old = int(time.time()) - 600
+    assert construct_event(PAYLOAD, f"t={old},v1={_sign(PAYLOAD, old)}", SECRET, tolerance=None)["id"] == "evt_1"
+
+    now = int(time.time())
+    with pytest.raises(ValueError):
+        construct_event("{not json", f"t={now},v1={_sign('{not json', now)}", SECRET)
+
+
+def test_matches_the_sdk():
+    stripe = pytest.importorskip("stripe")
+    now = int(time.time())
+    for header in (f"t={now},v1={_sign(PAYLOAD, now)}", f"t={now - 600},v1={_sign(PAYLOAD, now - 600)}", f"t={now},v1=00"):
+        try:
+            expected = dict(stripe.Webhook.construct_event(PAYLOAD, header, SECRET))["id"]
+        except stripe.error.SignatureVerificationError:
+            expected = SignatureVerificationError
+        try:
+            actual = construct_event(PAYLOAD, header, SECRET)["id"]
+        except SignatureVerificationError:
+            actual = SignatureVerificationError
+        assert actual == expected
@@ -0,0 +1,26 @@
+from lambda_common.subscriptions import DEFAULT_SUBSCRIPTION_SKUS, SubscriptionClassifier
+
+CLASSIFIER = SubscriptionClassifier(DEFAULT_SUBSCRIPTION_SKUS.split(","))
+
+
+def _order(*skus, tags=""):
+    return {"tags": tags, "line_items": [{"sku": sku} for sku in skus]}
+
+
+def test_classify_matches_configured_skus_case_insensitively():
+    assert CLASSIFIER.classify(_order("TSHIRT", "MARS_Monthly")) == (True, "monthly")
+    assert CLASSIFIER.classify(_order("mars_quarterly_3x")) == (True, "quarterly")
+
+
+def test_classify_uses_first_line_item_with_a_cadence():
+    # The cadence comes from any line item, not only the one matching a subscription SKU.
+    assert CLASSIFIER.classify(_order("bundle_3x", "marstestsupport")) == (True, "quarterly")
+
+
+def test_classify_tag_driven_subscription_defaults_to_monthly():
+    assert CLASSIFIER.classify(_order("TSHIRT", tags="VIP, Recurring")) == (True, "monthly")
+
+
+def test_classify_non_subscription_order():
+    assert CLASSIFIER.classify(_order("TSHIRT", "mug_monthly_special")) == (False, None)
+    assert CLASSIFIER.classify({"tags": None, "line_items": [{"sku": None}]}) == (False, None)
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+from lambda_common import volume_baseline
+
+MONDAY_9AM = datetime(2024, 3, 4, 9, tzinfo=timezone.utc)
+
+
+def _profile_with(weekly_counts):
+    profile = volume_baseline.empty_profile()
+    for weeks_ago, count in zip(range(len(weekly_counts), 0, -1), weekly_counts):
+        volume_baseline.fold(profile, MONDAY_9AM - timedelta(weeks=weeks_ago), count)
+    return profile
+
+
+def test_hour_of_week_starts_monday_midnight_utc():
+    assert volume_baseline.hour_of_week(datetime(2024, 3, 4, 0, tzinfo=timezone.utc)) == 0
+    assert volume_baseline.hour_of_week(MONDAY_9AM) == 9
+    assert volume_baseline.hour_of_week(datetime(2024, 3, 10, 23, tzinfo=timezone.utc)) == 167
+
+
+def test_one_holiday_week_does_not_move_the_baseline():
+    profile = _profile_with([100, 104, 98, 20, 102, 101])
+
+    result = volume_baseline.observe(profile, MONDAY_9AM, 99)
+
+    assert result["median"] == 100.5
+    assert abs(result["z"]) < 1
+    assert not volume_baseline.is_drop(result)
+
+
+def test_drop_against_a_warmed_up_slot_is_flagged():
+    result = volume_baseline.observe(_profile_with([100, 104, 98, 102, 101, 97]), MONDAY_9AM, 40)
+
+    assert result["z"] < -volume_baseline.BASELINE_Z_THRESHOLD
+    assert volume_baseline.is_drop(result)
+
+
+def test_slots_still_warming_up_never_fail():
+    result = volume_baseline.observe(_profile_with([100, 100]), MONDAY_9AM, 0)
+
+    assert result["samples"] == 2
+    assert not volume_baseline.is_drop(result)
+
+
+def test_folding_keeps_a_bounded_history_per_slot():
+    profile = _profile_with(list(range(volume_baseline.BASELINE_WEEKS * 3)))
+
+    assert len(profile["slots"]["9"]) == volume_baseline.BASELINE_WEEKS + 1
+    assert profile["last_hour"] == "2024-02-26T09"
+
+
+def test_rescoring_the_same_hour_replaces_its_sample():
+    profile = _profile_with([100, 104, 98, 102, 101, 97])
+
+    first = volume_baseline.observe(profile, MONDAY_9AM, 40)
+    second = volume_baseline.observe(profile, MONDAY_9AM, 95)
+
+    assert first["samples"] == second["samples"]
+    assert profile["slots"]["9"][-1] == 95
+    assert not volume_baseline.is_drop(second)
+
+
+def test_a_new_profile_is_rebuilt_over_several_runs(monkeypatch):
+    monkeypatch.setattr(volume_baseline, "BASELINE_MAX_CATCHUP_HOURS", 500)
+    profile = volume_baseline.empty_profile()
+    history = volume_baseline.BASELINE_WEEKS * volume_baseline.HOURS_PER_WEEK
+
+    runs = 0
+    while True:
+        hours, remaining = volume_baseline.pending_hours(profile, MONDAY_9AM)
+        assert len(hours) <= 500
+        for hour in hours:
+            volume_baseline.fold(profile, hour, 1)
+        runs += 1
+        if not remaining:
+            break
+
+    assert runs == -(-history // 500)
+    assert volume_baseline.last_hour(profile) == MONDAY_9AM - timedelta(hours=1)
+    assert volume_baseline.pending_hours(profile, MONDAY_9AM) == ([], 0)
+
+
+def test_an_up_to_date_profile_only_folds_the_hours_since_its_last_run():
+    profile = _profile_with([100])
+
+    hours, remaining = volume_baseline.pending_hours(profile, MONDAY_9AM)
+
+    assert remaining == 0
+    assert len(hours) == volume_baseline.HOURS_PER_WEEK - 1